@@ -24,9 +24,54 @@
 # carpeta es "inboundSignals"). Una vez que se lee el
 # contenido de esos archivos y se computa la proporción
 # de similutd entre las señales, los resultados numéricos
-# se guardan en un archivo TXT que se envía a la carpeta
-# "results". Se generará un archivo de resultados por cada
-# archivo de señales entrante.
+# se guardan en una base de datos ("results/results.db", ver
+# el módulo results_store_ES), con una fila por canal de cada
+# archivo de señales entrante. Opcionalmente, con el argumento
+# "--output txt", se generará en su lugar un archivo TXT de
+# resultados por cada archivo de señales entrante, que se envía
+# a la carpeta "results" (con "--output both" se hacen las dos
+# cosas).
+
+# Los archivos de señales entrantes que se detectan se anotan en un
+# registro ("journal.db", ver el módulo journal_ES), junto con el
+# número de su archivo de resultados y si ya se han escrito sus
+# resultados. Así, si el programa se cierra, al volver a ejecutarlo
+# se comparan los archivos que quedaron pendientes y los que llegaron
+# mientras tanto, y la numeración de los resultados continúa donde
+# se quedó. Para empezar de cero (vaciando las carpetas de señales
+# entrantes y de resultados y borrando el registro), se puede
+# ejecutar el programa con el argumento "--reset".
+
+# Con el argumento "--metrics ARCHIVO", el programa escribe
+# periódicamente sus métricas de rendimiento (duración de cada etapa
+# de la comparación, latencia desde que llega cada archivo hasta que
+# se guardan sus resultados, número de archivos comparados por
+# segundo y archivos en espera) en ese archivo, en formato JSON o
+# Prometheus (ver el módulo metrics_ES).
+
+# Con el argumento "--windows", cada archivo de señales entrante se
+# compara por ventanas solapadas del mismo número de puntos que las
+# plantillas, en lugar de con una sola transformada de Fourier de
+# todo el archivo (ver el método score_windows() de la clase
+# Comparator en el módulo comparison_ES). Así, en las grabaciones
+# largas y continuas se obtiene una serie temporal con la proporción
+# de similitud de cada canal en cada ventana, que se guarda en la
+# tabla "windows" de la base de datos, o en el archivo TXT de
+# resultados con una línea por ventana (el momento de su primer
+# punto y la proporción de similitud de cada canal, separados por
+# tabulaciones). Con el argumento "--window-hop" se indica cada
+# cuántos puntos empieza una ventana nueva (por defecto, la mitad
+# de la ventana).
+
+# Con el argumento "--library CARPETA", cada archivo de señales
+# entrante se compara a la vez con todos los conjuntos de plantillas
+# de esa carpeta (una subcarpeta por conjunto, ver el módulo
+# library_ES), en lugar de con las de la carpeta "templates". Los
+# resultados de cada canal, y los del archivo completo, se ordenan de
+# mayor a menor proporción de similitud, para saber a qué conjunto se
+# parece más, y se guardan en la tabla "matches" de la base de datos,
+# o en el archivo TXT de resultados con una línea por canal (ver
+# format_matches() en el módulo library_ES).
 
 ###################################################
 ###################################################
@@ -43,22 +88,50 @@
 # - os: Se ha usado para trazar los paths de los
 # los archivos que manipula el programa y que se puedan
 # leer.
-# - numpy (np): Se ha usado para hacer cálculo matricial
-# y aplicar algoritmos de procesamiento de señales.
-# - scipy: El módulo scipy constituye un entorno con
-# funciones para computar una gran variedad de operaciones.
-# Una de sus secciones está destinada al cálculo
-# estadístico (scipy.stats), la cual se emplea en este
-# script.
-# - neo: Se ha utilizado para leer archivos que contienen
-# señales típicamente fisiológicas en formatos comunes
-# como SMR o PLX.
+# - time: Se ha usado para medir la duración de la escritura de
+# los resultados.
+# - numpy (np): Se ha usado para distinguir los resultados de las
+# comparaciones por ventanas.
+# - atexit y signal: Se han usado para guardar los resultados
+# pendientes cuando se cierra el programa.
+# - threading, queue y concurrent.futures: Se han usado para
+# comparar varios archivos de señales a la vez en distintos
+# procesos, y para escribir sus resultados en orden.
+# - comparison_ES: Módulo propio que contiene la comparación de
+# los archivos de señales con las plantillas (clase Comparator).
+# Utiliza los módulos spectrum_ES, scoring_ES y signal_io_ES, que
+# contienen el cálculo del dominio de frecuencia de las señales,
+# el cálculo de la proporción de similitud y la lectura de los
+# archivos de señales (TXT, NPY, SMR o PLX) respectivamente.
+# - template_store_ES: Módulo propio que contiene la lectura
+# del archivo de las plantillas.
+# - library_ES: Módulo propio que contiene la comparación con
+# varios conjuntos de plantillas a la vez.
+# - journal_ES: Módulo propio que contiene el registro de los
+# archivos de señales entrantes que se han comparado.
+# - results_store_ES: Módulo propio que contiene el almacén de
+# los resultados en una base de datos.
+# - watcher_ES: Módulo propio que contiene la detección de los
+# archivos que llegan a la carpeta de las señales entrantes.
+# - metrics_ES: Módulo propio que contiene las métricas de
+# rendimiento del programa.
 
 import sys
 import os
+import time
+import atexit
+import signal
+import threading
+import queue
 import numpy as np
-import scipy.stats
-import neo
+from concurrent.futures import ProcessPoolExecutor
+from comparison_ES import Comparator, format_scores, init_worker, score_file, score_file_windows
+from template_store_ES import load_templates, load_library
+from library_ES import TemplateLibrary, ranked_matches, format_matches, init_library_worker
+from journal_ES import Journal
+from results_store_ES import ResultStore
+from watcher_ES import InboxWatcher
+from metrics_ES import Metrics
 
 ###################################################
 ###################################################
@@ -83,397 +156,601 @@ def reset_dir(dir_name): # requiere del módulo os.
     else: # se ejecuta si no existe.
         os.mkdir(dir_name) # se crea el directorio.
 
-# - neo_reader(file_format, file_name): Requiere del módulo neo.
-# Esta función sirve para extraer los valores que componen una
-# señal que se encuentra en archivos usados para almacenar señales
-# electrofisiológicas.
-# Por ahora, esta función solo permite leer señales desde archivos
-# SMR o PLX. Su argumento file_format es un string que debe
-# corresponderse con alguno de los formatos con los que opera
-# la función (SMR, PLX). Sirve para indicar las funciones
-# apropiadas para extraer los datos de los archivos en cuestión.
-# El argumento file_name se refiere a la localización del archivo
-# del que se pretenden extraer los datos.
-
-def neo_reader(file_format, file_name): # requiere del módulo neo.
-    file_format = file_format.upper() # cambia a mayúsculas el formato.
-    if file_format not in ["SMR","PLX"]: # se ejecuta si el formato no es adecuado.
-        print("WARNING (from neo_reader() function): " +
-              "File formats that can be processed by " +
-              "neo_reader() function are: SMR, PLX. " +
-              "Please, use just one of those file " +
-              "formats.\n") # mensaje de error.
+# - results_saved(result_numbers, journal, metrics): Marca como
+# terminados en el registro "journal" los archivos de la lista
+# "result_numbers", cuyos resultados ya están guardados, y, si
+# "metrics" no es None, registra su latencia en las métricas.
+
+def results_saved(result_numbers, journal, metrics):
+    journal.mark_done_many(result_numbers = result_numbers) # se marcan los archivos como terminados en el registro.
+    if metrics is not None: # se ejecuta si se registran las métricas.
+        metrics.complete(result_numbers = result_numbers) # se registra la latencia de los archivos.
+
+# - write_result(scores, result_number, new_file, arrived, journal,
+# store, write_txt, metrics, timings, library): Requiere de los módulos
+# os, time, NumPy (np) y library_ES. Guarda los resultados "scores" de la
+# comparación del archivo de señales "new_file" (un vector con un
+# resultado por canal, la matriz de una comparación por ventanas, o,
+# si "library" no es None, la matriz de la comparación con el objeto
+# TemplateLibrary "library"). El argumento "arrived" es el momento de
+# llegada del archivo (en segundos desde 1970), que se toma al
+# detectarlo: al guardar los resultados, el archivo puede haberse
+# movido o borrado ya. Si "store" no es None,
+# se acumulan en el almacén de resultados, que los marcará como
+# terminados en el registro "journal" cuando los escriba en el disco.
+# Si "write_txt" es True, se escriben además en el archivo
+# "result<result_number>.txt",
+# que se mueve a la carpeta de resultados. Si solo se escriben en el
+# archivo TXT, se marcan como terminados en el registro en el momento.
+# Si "metrics" no es None, se registran en las métricas la llegada del
+# archivo y la duración de cada etapa de su comparación (el
+# diccionario "timings", al que se añade la duración de la escritura).
+
+def write_result(scores, result_number, new_file, arrived, journal, store, write_txt,
+                 metrics = None, timings = None, library = None): # requiere de los módulos os, time, NumPy (np) y library_ES.
+    start = time.perf_counter() # momento en el que empieza la escritura.
+    matches = None # resultados ordenados de la comparación con la biblioteca.
+    if library is not None: # se ejecuta si el archivo se ha comparado con la biblioteca.
+        matches = ranked_matches(names = library.names,
+                                 scores = scores,
+                                 channel_ids = library.file_ids) # se ordenan los resultados de cada canal.
+    if metrics is not None: # se ejecuta si se registran las métricas.
+        metrics.track(result_number = result_number,
+                      arrived = arrived) # se registra la llegada del archivo.
+    if write_txt: # se ejecuta si se quieren los resultados en archivos TXT.
+        output_name = "result" + str(result_number) + ".txt" # se nombra el archivo que contendrá los resultados de la comparación.
+        output_file = open(output_name, "w") # se crea el archivo.
+        if matches is not None: # se ejecuta si el archivo se ha comparado con la biblioteca.
+            output_file.write(format_matches(matches)) # se sobreescribe el archivo con los resultados ordenados.
+        else: # se ejecuta si el archivo se ha comparado con un solo conjunto de plantillas.
+            output_file.write(format_scores(scores)) # se sobreescribe el archivo con los resultados de similitud.
+        output_file.close() # se cierra el archivo.
+        os.rename(output_name, "results/"+output_name) # se mueve el archivo a la carpeta destinada a acumular los resultados.
+        print(output_name + " file generated from " +
+              new_file + " file is now available in " +
+              "the results directory.") # mensaje de información de que los resultados ya se han emitido en un archivo TXT.
+    if store is None: # se ejecuta si los resultados no se guardan en la base de datos.
+        results_saved(result_numbers = [result_number],
+                      journal = journal,
+                      metrics = metrics) # se marca el archivo como terminado en el registro.
+    elif matches is not None: # se ejecuta si los resultados de una comparación con la biblioteca se guardan en la base de datos.
+        store.add_matches(result_number = result_number,
+                          source = os.path.basename(new_file),
+                          matches = matches,
+                          arrived = arrived) # se acumulan los resultados en el almacén.
+    elif np.ndim(scores) == 2: # se ejecuta si los resultados de una comparación por ventanas se guardan en la base de datos.
+        store.add_windows(result_number = result_number,
+                          source = os.path.basename(new_file),
+                          series = scores,
+                          arrived = arrived) # se acumulan los resultados en el almacén.
+    else: # se ejecuta si los resultados se guardan en la base de datos.
+        store.add(result_number = result_number,
+                  source = os.path.basename(new_file),
+                  scores = scores,
+                  arrived = arrived) # se acumulan los resultados en el almacén.
+    if store is not None and not write_txt: # se ejecuta si no se ha informado ya de los resultados.
+        print("Results of " + new_file + " file (result number " +
+              str(result_number) + ") added to the results " +
+              "database.") # mensaje de información.
+    if metrics is not None and timings is not None: # se ejecuta si se registran las métricas.
+        timings["write"] = time.perf_counter() - start # duración de la escritura.
+        metrics.observe_stages(timings = timings,
+                               file_format = os.path.splitext(new_file)[1][1:]) # se registra la duración de cada etapa.
+
+# - report_failure(error, result_number, new_file, journal, metrics,
+# stage): Muestra un mensaje de error cuando el archivo de señales
+# "new_file" no se ha podido comparar con las plantillas (o, según
+# "stage", no se han podido guardar sus resultados), y lo marca como
+# fallido en el registro "journal" para que no se vuelva a comparar
+# (y en las métricas "metrics", si no es None).
+
+def report_failure(error, result_number, new_file, journal, metrics = None,
+                   stage = "compared with the templates"):
+    print("ERROR: " + new_file + " file could not " +
+          "be " + stage + " (" +
+          repr(error) + ").") # mensaje de error.
+    journal.mark_failed(result_number = result_number) # se marca el archivo como fallido en el registro.
+    if metrics is not None: # se ejecuta si se registran las métricas.
+        metrics.count_failure() # se registra el archivo fallido.
+
+# - result_writer(pending, journal, store, write_txt, metrics, library):
+# Escribe, en orden, los resultados de los archivos que se están
+# comparando en otros procesos. Los argumentos "journal", "store",
+# "write_txt", "metrics" y "library" son los mismos que los de
+# write_result(), y "pending" es
+# una cola
+# (queue.Queue) con el número de resultado, el archivo de señales, su
+# momento de llegada y el objeto "future" de cada comparación, en el orden de llegada de
+# los archivos. Se ejecuta en un hilo aparte para
+# que el programa siga detectando archivos nuevos mientras tanto. Si
+# una comparación o la escritura de sus resultados da error, el
+# archivo se marca como fallido y se sigue con el siguiente (si no, el
+# hilo terminaría sin avisar, y los resultados de los archivos
+# siguientes no se escribirían nunca).
+
+def result_writer(pending, journal, store, write_txt, metrics = None, library = None): # requiere del módulo queue.
+    while True: # bucle que se ejecuta indefinidamente.
+        result_number, new_file, arrived, future = pending.get() # siguiente comparación, por orden de llegada.
+        if metrics is not None: # se ejecuta si se registran las métricas.
+            metrics.set_queue_depth(depth = pending.qsize()) # número de archivos en espera.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            scores, timings = future.result() # se espera a que termine la comparación.
+        except Exception as error: # se ejecuta si la comparación ha dado error.
+            report_failure(error = error,
+                           result_number = result_number,
+                           new_file = new_file,
+                           journal = journal,
+                           metrics = metrics) # se registra el error.
+            continue # se pasa a la siguiente comparación.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            write_result(scores = scores,
+                         result_number = result_number,
+                         new_file = new_file,
+                         arrived = arrived,
+                         journal = journal,
+                         store = store,
+                         write_txt = write_txt,
+                         metrics = metrics,
+                         timings = timings,
+                         library = library) # se guardan los resultados.
+        except Exception as error: # se ejecuta si la escritura ha dado error.
+            report_failure(error = error,
+                           result_number = result_number,
+                           new_file = new_file,
+                           journal = journal,
+                           metrics = metrics,
+                           stage = "saved in the results") # se registra el error.
+
+# - main(): Es el programa en sí: lee los argumentos del prompt, pide
+# el tipo de media con input(), abre las plantillas, el registro y el
+# almacén de resultados, y compara los archivos de señales que llegan
+# a la carpeta de señales entrantes. Solo se ejecuta cuando se lanza
+# este script (no cuando se importa), de modo que los procesos que
+# comparan archivos a la vez no vuelven a ejecutarlo, y la
+# comparación se puede usar desde otros programas con un objeto
+# Comparator (ver el módulo comparison_ES).
+
+def main():
+    ###################################################
+    ###################################################
+    ###                                             ###
+    ###          LECTURA DE LA INFORMACIÓN          ###
+    ###              DE LAS PLANTILLAS              ###
+    ###                                             ###
+    ###################################################
+    ###################################################
+
+    # En esta primera parte del script, se preparan los directorios
+    # que alojarán los resultados del algoritmo de comparación de
+    # señales y que almacenarán los archivos de señales entrantes
+    # que serán comparadas con las señales promedio representadas
+    # en las plantillas. También se lee la información de las
+    # plantillas, y se ejecuta el algoritmo de comparación de
+    # señales, que irá generando los resultados simultáneamente
+    # a medida que llegan archivos de señales entrantes al
+    # directorio correspondiente.
+
+    print("\nLaunching " + sys.argv[0] + ".") # mensaje de información.
+
+    # Opcionalmente, se puede indicar el número de procesos que
+    # compararán archivos de señales a la vez con el argumento
+    # "--workers" (por ejemplo: "--workers 4"). Si no se indica, los
+    # archivos se comparan de uno en uno en este mismo proceso.
+
+    workers = 1 # número de procesos que compararán archivos de señales.
+    if "--workers" in sys.argv: # se ejecuta si se ha indicado el número de procesos.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            workers = int(sys.argv[sys.argv.index("--workers")+1]) # número de procesos indicado.
+        except: # se ejecuta si no se ha indicado un número entero después de "--workers".
+            print("ERROR: --workers argument requires an " +
+            "integer number of worker processes.") # mensaje de error.
+            quit() # se cierra el programa.
+
+    # Con el argumento "--fft-workers" (por ejemplo: "--fft-workers 4"),
+    # las filas (canales) de cada transformada de Fourier se reparten
+    # entre ese número de hilos, dentro de cada proceso (1 por defecto).
+    # Sirve sobre todo cuando los archivos se comparan de uno en uno y
+    # tienen muchos canales: con varios procesos, cada uno ya ocupa un
+    # procesador.
+
+    fft_workers = 1 # número de hilos de la transformada de Fourier.
+    if "--fft-workers" in sys.argv: # se ejecuta si se ha indicado el número de hilos.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            fft_workers = int(sys.argv[sys.argv.index("--fft-workers")+1]) # número de hilos indicado.
+        except: # se ejecuta si no se ha indicado un número entero después de "--fft-workers".
+            print("ERROR: --fft-workers argument requires an " +
+            "integer number of FFT threads.") # mensaje de error.
+            quit() # se cierra el programa.
+
+    # También se puede indicar dónde se guardan los resultados con el
+    # argumento "--output": "db" (en la base de datos, la opción por
+    # defecto), "txt" (un archivo TXT por archivo de señales entrante) o
+    # "both" (en los dos sitios).
+
+    output_mode = "db" # dónde se guardan los resultados.
+    if "--output" in sys.argv: # se ejecuta si se ha indicado dónde guardar los resultados.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            output_mode = sys.argv[sys.argv.index("--output")+1].lower() # opción indicada.
+        except: # se ejecuta si no se ha indicado nada después de "--output".
+            output_mode = "" # opción no válida.
+        if output_mode not in ["db","txt","both"]: # se ejecuta si la opción no es válida.
+            print("ERROR: --output argument must be one of: " +
+            "db, txt, both.") # mensaje de error.
+            quit() # se cierra el programa.
+    write_txt = output_mode in ["txt","both"] # indica si se escriben archivos TXT de resultados.
+
+    # Con el argumento "--windows", los archivos de señales se comparan
+    # por ventanas, y con "--window-hop" (por ejemplo: "--window-hop
+    # 250") se indica cada cuántos puntos empieza una ventana nueva.
+
+    windowed = "--windows" in sys.argv # indica si los archivos se comparan por ventanas.
+    window_hop = None # distancia entre ventanas (None es la mitad de la ventana).
+    if "--window-hop" in sys.argv: # se ejecuta si se ha indicado la distancia entre ventanas.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            window_hop = int(sys.argv[sys.argv.index("--window-hop")+1]) # distancia indicada.
+        except: # se ejecuta si no se ha indicado un número entero después de "--window-hop".
+            print("ERROR: --window-hop argument requires an " +
+            "integer number of points.") # mensaje de error.
+            quit() # se cierra el programa.
+
+    # Con el argumento "--library" (por ejemplo: "--library biblioteca")
+    # se indica la carpeta de la biblioteca de plantillas con la que se
+    # comparan los archivos de señales.
+
+    library_dir = None # carpeta de la biblioteca de plantillas (None si se usa la carpeta "templates").
+    if "--library" in sys.argv: # se ejecuta si se ha indicado la biblioteca.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            library_dir = sys.argv[sys.argv.index("--library")+1] # carpeta indicada.
+        except: # se ejecuta si no se ha indicado nada después de "--library".
+            print("ERROR: --library argument requires a " +
+            "directory name.") # mensaje de error.
+            quit() # se cierra el programa.
+        if windowed: # se ejecuta si también se ha pedido la comparación por ventanas.
+            print("ERROR: --library and --windows arguments " +
+            "cannot be used together.") # mensaje de error.
+            quit() # se cierra el programa.
+
+    # Por último, se puede indicar el archivo en el que se escriben las
+    # métricas de rendimiento con el argumento "--metrics" (por
+    # ejemplo: "--metrics metrics.prom" o "--metrics metrics.json"), y
+    # cada cuántos segundos se escriben con "--metrics-interval" (5 por
+    # defecto).
+
+    metrics_name = None # archivo de las métricas (None si no se registran).
+    if "--metrics" in sys.argv: # se ejecuta si se quieren registrar las métricas.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            metrics_name = sys.argv[sys.argv.index("--metrics")+1] # archivo indicado.
+        except: # se ejecuta si no se ha indicado nada después de "--metrics".
+            print("ERROR: --metrics argument requires an " +
+            "output file name.") # mensaje de error.
+            quit() # se cierra el programa.
+    metrics_interval = 5.0 # tiempo entre dos escrituras de las métricas (s).
+    if "--metrics-interval" in sys.argv: # se ejecuta si se ha indicado el tiempo entre escrituras.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            metrics_interval = float(sys.argv[sys.argv.index("--metrics-interval")+1]) # tiempo indicado.
+        except: # se ejecuta si no se ha indicado un número después de "--metrics-interval".
+            print("ERROR: --metrics-interval argument requires " +
+            "a number of seconds.") # mensaje de error.
+            quit() # se cierra el programa.
+
+    # Con el anterior script, se ha generado un archivo con las
+    # plantillas (templates/templates.npz) que, además de ellas,
+    # contiene los datos del número de puntos por dominio de frecuencia estandarizado
+    # de las señales y el número de canales que tenía cada archivo
+    # de señales. Es necesario usar el número de puntos de las
+    # señales a la hora de calcular la transformada de Fourier
+    # en las señales entrantes, para luego poder comparar las
+    # señales, frecuencia por frecuencia (desde la versión 4 de las
+    # plantillas, el de la transformada se guarda aparte, "fft_pnts",
+    # y el comparador lo toma de ellas). El número de canales
+    # se ha querido registrar para en el fututo incorporar al
+    # programa un sistema de verificación para asegurar que
+    # el número de canales de los archivos de las señales usadas
+    # para crear las plantillas es el mismo que el de los archivos
+    # de las señales que se quieren comparar con ellas. En caso
+    # contrario, saldría un mensaje de error, y el programa
+    # se cerraría.
+
+    templ = "templates" # nombre del directorio que contiene las plantillas.
+
+    # Las carpetas de resultados y de señales entrantes, y el registro
+    # de los archivos ya comparados, se conservan de una ejecución a
+    # otra, salvo que se indique el argumento "--reset".
+
+    journal_name = "journal.db" # nombre del archivo del registro.
+
+    if "--reset" in sys.argv: # se ejecuta si se quiere empezar de cero.
+        reset_dir("results") # se resetea la carpeta de resultados.
+        print("Resetting 'results' directory... Done.") # mensaje de información.
+        reset_dir("inboundSignals") # se resetea la carpeta a donde llegarán los archivos de señales entrantes.
+        print("Resetting 'inboundSignals' directory... Done.") # mensaje de información.
+        for File in [journal_name, journal_name + "-wal", journal_name + "-shm"]: # bucle que itera sobre los archivos del registro.
+            if os.path.isfile(File): # se ejecuta si el archivo existe.
+                os.remove(File) # se elimina el archivo.
+        print("Resetting journal... Done.") # mensaje de información.
+    else: # se ejecuta si se quiere continuar donde se quedó la ejecución anterior.
+        os.makedirs("results", exist_ok = True) # se crea la carpeta de resultados si no existe.
+        os.makedirs("inboundSignals", exist_ok = True) # se crea la carpeta de señales entrantes si no existe.
+
+    journal = Journal(db_name = journal_name) # se abre (o se crea) el registro de los archivos de señales.
+    print("")
+
+    # Este programa permite computar la similitud entre las plantillas y
+    # las señales de dos formas. La primera es mediante el cálculo de la
+    # media aritmética de las proporciones de similitud calculadas
+    # entre las frecuencias, una por una. De esta manera, los valores
+    # de amplitud de todas las frecuencias ponderan de la misma
+    # forma a la hora de decidir el porcentaje de similitud. En cambio,
+    # también se puede indicar que, dependiendo de la amplitud de
+    # las frecuencias, estos valores contribuyan proporcionalmente
+    # al cálculo de la similitud entre las señales. Así, cuanto
+    # mayor sea la amplitud de una frecuencia, más contribuirá
+    # a la similitud y de manera proporcional. El que el programa
+    # vaya a emplear una forma de cálculo u otra, dependerá de una
+    # variable que se obtendrá como un input desde el prompt donde
+    # se lanza el programa.
+
+    mean_calc = input("Do you want to compute the arithmetic " +
+                      "mean for the frequency amplitudes in " +
+                      "order to stablish a comparison between " +
+                      "signals? (If not, the weighted average " +
+                      "will be computed.) [Y, n] ").upper() # variable que determina si se hará la media aritmética o ponderada.
+    if mean_calc not in ["Y", "YES", "N", "NO"]: # se ejecuta si la variable recién introducida no es alguna reconocida por el programa.
+        print("No valid answer was entered. Shutting program " +
+              "down.") # mensaje de error.
+        quit() # se cierra el programa.
+    elif mean_calc in ["Y","YES"]: # se ejecuta si se quiere usar la media aritmética como cálculo de similitud.
+        print("Arithmetic mean selected as the calculation " +
+        "algorithm for computing the comparison between " +
+        "signals.\n") # mensaje de información.
+    elif mean_calc in ["N","NO"]: # se ejecuta si se quiere usar la media ponderada como cálculo de similitud.
+        print("Weighted averaging selected as the calculation " +
+        "algorithm for computing the comparison between " +
+        "signals.\n") # mensaje de información.
+
+    # Para comparar las señales entrantes con las señales
+    # promedio representadas en las plantillas, primero
+    # se va a leer la información de las plantillas y se
+    # va a guardar a modo de diccionario. De esta manera,
+    # la información está ordenada y resulta más práctico
+    # acceder a ella cuando se vaya a usar.
+    # Los diccionarios son una variable de Python que permiten
+    # guardar valores ('values') y utilizarlos, usando una etiqueta
+    # o 'key' para referirse a ellos. La etiqueta, como en
+    # el caso de su valor puede tratarse de cualquier
+    # tipo de variable. En este caso, el diccionario contiene
+    # una matriz con las medias de los valores de amplitud de
+    # las frecuencias de la señal promedio de cada canal (una
+    # fila por canal), otra con las desviaciones estándar
+    # asociadas, el número de frecuencias y el número de canal
+    # de cada plantilla, el número de puntos y el número de
+    # canales (ver el módulo template_store_ES). Las matrices
+    # se abren directamente del archivo de las plantillas con
+    # un mapa de memoria, sin leer texto, y los procesos que
+    # comparan archivos a la vez comparten esa memoria. Si las
+    # plantillas se generaron con una versión anterior del
+    # programa (un archivo TXT por canal), se leen esos archivos
+    # por orden de número de canal.
+
+    # Si se compara con una biblioteca, se abren todos sus conjuntos de
+    # plantillas y se reúnen en un objeto TemplateLibrary (ver el módulo
+    # library_ES). Los canales que se comparan son los del primer
+    # conjunto.
+
+    library = None # plantillas de la biblioteca (None si no se usa).
+    if library_dir is None: # se ejecuta si se compara con las plantillas de la carpeta "templates".
+        dic = load_templates(templ_dir = templ) # diccionario con las plantillas de todos los canales.
+    else: # se ejecuta si se compara con la biblioteca.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            library = TemplateLibrary(library = load_library(library_dir = library_dir),
+                                      is_arith = mean_calc,
+                                      fft_workers = fft_workers) # se preparan las plantillas de todos los conjuntos.
+        except (OSError, ValueError) as error: # se ejecuta si la biblioteca no es válida.
+            print("ERROR: template library " + library_dir +
+                  " could not be loaded (" + str(error) + ").") # mensaje de error.
+            quit() # se cierra el programa.
+        dic = {"max_pnts": library.max_numb_pnts,
+               "channel_ids": library.file_ids} # número de puntos y canales de la biblioteca.
+        print("Template library with " + str(len(library.names)) +
+              " template sets: " + ", ".join(library.names) + ".") # mensaje de información.
+    pnts = dic["max_pnts"] # número máximo de puntos por señal.
+    if window_hop is not None and not 1 <= window_hop <= pnts: # se ejecuta si la distancia entre ventanas no es válida.
+        print("ERROR: --window-hop argument must be between 1 " +
+              "and " + str(pnts) + " points (the template " +
+              "window).") # mensaje de error.
         quit() # se cierra el programa.
-    elif file_format == "SMR": # se ejecuta si el formato es SMR.
-        reader = neo.io.Spike2IO(filename = file_name) # se lee el archivo.
-        data = reader.read(lazy = False)[0] # se almacenan los datos en una variable.
-    elif file_format == "PLX": # se ejecuta si el formato es PLX.
-        reader = neo.io.PlexonIO(filename = file_name) # se lee el archivo.
-        data = reader.read(lazy = False) # se almacenan los datos en una variable.
-    return data # devuelve los datos.
-
-# - comparator(): Requiere de los módulos NumPy, SciPy,
-# y neo. Esta función constituye la parte más importante
-# de este script, y es crucial a la hora de generar los
-# archivos TXT que contienen el resultado de la comparación
-# entre señales.
-
-# Con respecto a las operaciones que realiza, con esta función,
-# se crea una matriz vacía que tiene tantas filas como canales
-# tienen los archivos de las señales, y tantas columnas como el
-# número de puntos estandarizado que se usó para calcular el
-# dominio de frecuencia de las señales utilizadas para crear la
-# plantillas. En esta matriz, se van a incorporar los
-# valores de las amplitudes del dominio de frecuencia de
-# todas las señales de cada archivo entrante. Después, estos
-# valores se compararán con los de la plantilla. El
-# valor de amplitud de una frecuencia de la señal entrante
-# representa un punto en la distribución normal definida
-# por los valores de media aritmética y desviación estándar
-# de la frecuencia correspondiente en la plantilla. El
-# máximo de la distribución estándar se alcanza en su
-# dominio en el punto igual a la media de la distribución.
-# Sabiendo esto, se divide el valor asociado al de la amplitud
-# de la señal entrante en la distribución normal, entre
-# el máximo, y esa proproción representa la similitud
-# entre las dos señales para esa frecuencia (por tanto,
-# si el valor de amplitud de la señal entrante para
-# el de esa frecuencia, y el de la plantilla, es el
-# mismo, la proproción será igual a 1. Si es más bajo
-# o más alto, el valor de la proporción oscilará entre
-# 0 y 1, dependiendo de la proximidad que haya entre
-# ambos). Al final, para cada frecuencia habrá una
-# proporción de similitud correspondiente. El resultado
-# de cada comparación entre amplitudes, una a una, pasa a
-# formar parte de un vector. Dependiendo de la clase
-# de cómputo elegido, con todas las proporciones
-# se calculará una media aritmética, o media ponderada
-# (con la que se considera el valor total de la amplitud
-# de la señal sobre el de la suma de las amplitudes de
-# la plantillas, cuyo cociente se multiplica por el
-# valor de la proporción calculada), para finalmente
-# generar la propoción de similitud entre señales. La
-# función itera este cómputo tantas veces como señales
-# o canales haya por archivo. Los resultados se acumulan
-# en una variable que los ordena como strings por filas.
-# Estos resultados están destinados a que se sobreescriban
-# en un archivo TXT.
-
-# Esta función tiene cuatro argumentos: template, max_numb_pnts,
-# what_file y neo. El argumento "template" debe ser un
-# diccionario cuyas etiquetas se refieran al número de
-# canal que haya en los archivos de las señales, y el
-# valor de las etiquetas sea una matriz con dos columnas,
-# que contengan los valores de media aritmética de amplitud
-# de cada una de las frecuencias que forman la señal promedio
-# en la primera columna, y los valores de desviación estándar
-# asociados a cada una de las medias en la segunda columna
-# (en resumen, la matriz contiene los mismos datos que las
-# plantillas de las señales). El argumento "max_numb_pnts"
-# se refiere al número de puntos estandarizado que se usó
-# para calcular el dominio de frecuencia al hacer las plantillas.
-# Este número proviene del cómputo que se ha realizado con el
-# script que genera las plantillas. Para que las plantillas
-# encajen con las señales entrantes que se quieran comparar
-# con ellas, este número ha de ser constante. El argumento
-# "what_file" debe ser la localización de un archivo que
-# contenga las señales que se vayan a comparar con las
-# señales promedio de las plantillas. Finalmente, el argumento
-# "is_arith" es un string que se introduce como input desde
-# el prompt desde donde se ejecuta el programa. Este argumento
-# indica si a la hora de hacer el cómputo para calcular el
-# porcentaje de similitud entre las señales, se usará, o bien
-# una media aritmética (si el argumento es igual a "Y" o "YES"),
-# o ponderada (si es "N" o "NO"), de la similitud que hay
-# para cada una de las frecuencias, una por una. Hay que recordar
-# que este algoritmo de comparación de señales pretende que,
-# de forma ideal, los resultados sean binarios: Se busca que
-# los resultados indiquen, cuando se apliquen los programas
-# en la interfaz cerebro-cerebro, si las señales son iguales
-# (lo que implicaría una proporción de similitud de 1), o
-# se las señales son distintas (lo que supone un resultado
-# de 0).
-
-# En caso de que para una frecuencia, los valores de amplitud
-# sean iguales en las señales que se están utilizando para
-# hacer una plantilla, la desviación estándar al hacer la
-# media de esos valores es igual al cero. Ese valor de desvación
-# estándar no puede ser utilizado para crear una distribución
-# normal. Por ello, se han añadido unas líneas de código por
-# medio de las cuales, si la desviación estándar es igual a
-# cero, se va a atribuir arbitrariamente un valor de desviación
-# estándar igual a 0,1 (líneas 284 y 285). De esta manera, el
-# programa si que puede trazar la distribución normal para comparar
-# las frecuencias de las dos señales.
-
-# Uno de los errores de programación que se podría considerar
-# en este script, es que algunas de las variables que utiliza
-# esta función son variables globales que no se incorporan
-# como argumentos, y otras son locales tras haberse creado
-# un argumento adecuado para la función. Para que la función
-# se pueda utilizar transversalmente entre scripts, lo mejor
-# sería definir más argumentos que consideraran las variables
-# globales de este script que se utilizan con la función.
-# Algunas de las variables que deberían de aparecer como locales
-# serían la variable que contiene el formato de los archivos de
-# señales usados ("Format"), y el vector con los índices de los
-# canales ("file_ids") que permite que se vayan analizando las
-# señales de los archivos en orden (el nombre de esta variable
-# se debe a que, al hacer las plantillas de las señales, cada
-# canal tiene asociada una plantilla, que está en un archivo
-# distinto. Por tanto, el número de plantillas será igual al
-# número de canales).
-
-def comparator(template,max_numb_pnts,what_file,is_arith): # requiere de los módulos NumPy, SciPy y neo.
-    output = "" # string vacío que registrará los resultados que se sobreescribirán en un archivo de texto.
-    Format = what_file.split(".")[1] # formato del archivo que se va a leer.
-    file_arr = np.zeros([channels + 1,max_numb_pnts]) # matriz vacía.
-    row_idx = 1 # índice de fila de la matriz.
-    
-    if Format == "txt": # se ejecuta si el formato de los archivos de señales es TXT.
-        inbound_file = np.transpose(np.loadtxt(what_file,
-                                           delimiter = "\t")) # se transpone la matriz de datos que contiene el archivo entrante.
-        for file_idx in file_ids: # bucle que itera sobre los índices de los canales.
-            signal = inbound_file[int(file_idx),:] # se selecciona una señal de uno de los canales del archivo.
-            fCoefs = (np.fft.fft(signal,
-                                 n = max_numb_pnts)/
-                      len(signal)) # se calculan sus coeficientes de Fourier.
-            ampls = np.absolute(fCoefs) # se calculan los valores de amplitud del dominio de frecuencia.
-            ampls[1:len(ampls)] *= 2 # se normalizan los valores de amplitud.
-            file_arr[int(file_idx),:] = ampls # se introducen por orden en la matriz que se creó vacía.
-
-    elif Format == "smr" or Format == "plx": # se ejecuta si el formato de los archivos es SMR o PLX.
-        neo_data = neo_reader(file_format = Format,
-                              file_name = what_file) # se leen los datos del archivo.
-        if Format == "smr": # se ejecuta si el formato del archivo es SMR.
-            for seg in neo_data.segments: # bucle que itera sobre cada uno de los segmentos de los datos leídos.
-                for an_sig in seg.analogsignals: # bucle que itera sobre la información que hay asignada a cada canal.
-                    array = np.transpose(np.array(an_sig)) # transpone la matriz que representa a la señal o señales de cada canal.
-                    for ind_sig in array: # bucle que itera sobre cada una de las filas de la matriz.
-                        fCoefs = (np.fft.fft(ind_sig,
-                                  n = max_numb_pnts)/
-                                  len(ind_sig)) # calcula los coeficientes de Fourier de la señal.
-                        ampls = np.absolute(fCoefs) # calcula la amplitud a partir de los coeficientes.
-                        ampls[1:len(ampls)] *= 2 # normaliza el valor de los coeficientes.
-                        file_arr[row_idx,:] = ampls # las amplitudes pasan a ocupar una fila de la matriz vacía originalmente.
-                        row_idx = row_idx + 1 # el índice de fila incrementa en una unidad.
-        elif Format == "plx": # se ejecuta si el formato de los archivos es PLX.
-            for block in neo_data: # bucle que itera sobre cada uno de los bloques de los datos.
-                for seg in block.segments: # bucle que itera sobre cada uno de los segmentos de los datos.
-                    for an_sig in seg.analogsignals: # bucle que itera sobre la información que hay asignada a cada canal.
-                        array = np.transpose(np.array(an_sig)) # transpone la matriz que representa a la o las señales de cada canal.
-                        for ind_sig in array: # bucle que itera sobre cada fila de la matriz.
-                            fCoefs = (np.fft.fft(ind_sig,
-                                      n = max_numb_pnts)/
-                                      len(ind_sig)) # calcula los coeficientes de Fourier de la señal.
-                            ampls = np.absolute(fCoefs) # calcula la amplitud a partir de los coeficientes.
-                            ampls[1:len(ampls)] *= 2 # normaliza el valor de los coeficientes.
-                            file_arr[row_idx,:] = ampls # las amplitudes pasan a ocupar una fila de la matriz vacía originalmente.
-                            row_idx = row_idx + 1 # el índice de fila incrementa en una unidad.
-
-    for file_idx in file_ids: # bucle que itera sobre los índices del número de canales por cada archivo de señales.
-        ampls = file_arr[int(file_idx),:] # se seleccionan las amplitudes de las frecuencias de un canal del archivo de señales entrante.
-        templ_mean = template["channel"+str(int(file_idx))][:,0] # se seleccionan las medias de la plantilla correspondiente.
-        templ_std = template["channel"+str(int(file_idx))][:,1] # se seleccionan las desviaciones estándar de la plantilla.
-        idx = 0 # índice para seleccionar a cada una de las amplitudes de la señal entrante y de la plantilla.
-        gauss = np.zeros(len(templ_mean)) # vector unidimensional vacío de la longitud de la plantilla.
-        templ_mean_sum = np.sum(templ_mean) # suma de todas las amplitudes de la señal promedio de la plantilla.
-        for element in templ_mean: # bucle que itera sobre cada amplitud de la plantilla.
-            mean = element # valor de amplitud individual de la plantilla.
-            std = templ_std[idx] # desviación estándar correspondiente a esa amplitud.
-            if std == 0: # se ejecuta si la desviación estándar de la plantilla es igual a cero.
-                std = 1e-1 # la desviación estándar es igual a 0,1.
-            input_val = ampls[idx] # valor de amplitud de la señal entrante que se quiere comparar.
-            gauss_val = (scipy.stats.norm(mean,
-                         std).pdf(input_val)/
-                         scipy.stats.norm(mean,
-                         std).pdf(mean)) # divide el valor de la señal entrante en función de distribución normal entre su máximo.
-            if is_arith in ["Y","YES"]: # se ejecuta si se quiere calcular la media aritmética de las proporciones de similitud.
-                gauss[idx] = gauss_val # se incorpora el valor de la proporción al vector vacío antes creado.
-            if is_arith in ["N","NO"]: # se ejecuta si se calcula la media ponderada de las proporciones.
-                gauss[idx] = gauss_val*(input_val/templ_mean_sum) # se calcula una proporción ponderada y se incorpora en el vector vacío.
-            idx = idx + 1 # el índice de valor de la plantilla aumenta en una unidad.
-        if is_arith in ["Y","YES"]: # se ejecuta si se quiere calcular la media aritmética de las proporciones de similitud.
-            output = output + str(np.mean(gauss)) + "\n" # se incorpora la media aritmética del vector de proporciones a un string.
-        elif is_arith in ["N","NO"]: # se ejecuta si se calcula la media ponderada de las proporciones.
-            output = output + str(np.sum(gauss)) + "\n" # se incorpora la media ponderada del vector de proporciones a un string.
-    
-    return output # se obtiene el string con todos los resultados de las distintas señales de cada canal.
-
-###################################################
-###################################################
-###                                             ###
-###          LECTURA DE LA INFORMACIÓN          ###
-###              DE LAS PLANTILLAS              ###
-###                                             ###
-###################################################
-###################################################
-
-# En esta primera parte del script, se preparan los directorios
-# que alojarán los resultados del algoritmo de comparación de
-# señales y que almacenarán los archivos de señales entrantes
-# que serán comparadas con las señales promedio representadas
-# en las plantillas. También se lee la información de las
-# plantillas, y se ejecuta el algoritmo de comparación de
-# señales, que irá generando los resultados simultáneamente
-# a medida que llegan archivos de señales entrantes al
-# directorio correspondiente.
-
-print("\nLaunching " + sys.argv[0] + ".") # mensaje de información.
-
-# Con el anterior script, se ha generado un archivo de texto
-# (nombrado no_cols_and_channels) que contiene los datos
-# del número de puntos por dominio de frecuencia estandarizado
-# de las señales y el número de canales que tenía cada archivo
-# de señales. Es necesario usar el número de puntos de las
-# señales a la hora de calcular la transformada de Fourier
-# en las señales entrantes, para luego poder comparar las
-# señales, frecuencia por frecuencia. El número de canales
-# se ha querido registrar para en el fututo incorporar al
-# programa un sistema de verificación para asegurar que
-# el número de canales de los archivos de las señales usadas
-# para crear las plantillas es el mismo que el de los archivos
-# de las señales que se quieren comparar con ellas. En caso
-# contrario, saldría un mensaje de error, y el programa
-# se cerraría.
-
-cols_and_channels_file = open("no_cols_and_channels.txt", "r") # abre el archivo TXT.
-file_data = cols_and_channels_file.read().splitlines() # lee los datos del archivo TXT.
-pnts = int(file_data[0]) # número máximo de puntos por señal.
-channels = int(file_data[1]) # número de canales por archivo de señales.
-
-templ = "templates" # nombre del directorio que contiene las plantillas.
-
-reset_dir("results") # se resetea la carpeta de resultados.
-print("Resetting 'results' directory... Done.") # mensaje de información.
-reset_dir("inboundSignals") # se resetea la carpeta a donde llegarán los archivos de señales entrantes.
-print("Resetting 'inboundSignals' directory... Done.\n") # mensaje de información.
-
-# Este programa permite computar la similitud entre las plantillas y
-# las señales de dos formas. La primera es mediante el cálculo de la
-# media aritmética de las proporciones de similitud calculadas
-# entre las frecuencias, una por una. De esta manera, los valores
-# de amplitud de todas las frecuencias ponderan de la misma
-# forma a la hora de decidir el porcentaje de similitud. En cambio,
-# también se puede indicar que, dependiendo de la amplitud de
-# las frecuencias, estos valores contribuyan proporcionalmente
-# al cálculo de la similitud entre las señales. Así, cuanto
-# mayor sea la amplitud de una frecuencia, más contribuirá
-# a la similitud y de manera proporcional. El que el programa
-# vaya a emplear una forma de cálculo u otra, dependerá de una
-# variable que se obtendrá como un input desde el prompt donde
-# se lanza el programa.
-
-mean_calc = input("Do you want to compute the arithmetic " +
-                  "mean for the frequency amplitudes in " +
-                  "order to stablish a comparison between " +
-                  "signals? (If not, the weighted average " +
-                  "will be computed.) [Y, n] ").upper() # variable que determina si se hará la media aritmética o ponderada.
-if mean_calc not in ["Y", "YES", "N", "NO"]: # se ejecuta si la variable recién introducida no es alguna reconocida por el programa.
-    print("No valid answer was entered. Shutting program " +
-          "down.") # mensaje de error.
-    quit() # se cierra el programa.
-elif mean_calc in ["Y","YES"]: # se ejecuta si se quiere usar la media aritmética como cálculo de similitud.
-    print("Arithmetic mean selected as the calculation " +
-    "algorithm for computing the comparison between " +
-    "signals.\n") # mensaje de información.
-elif mean_calc in ["N","NO"]: # se ejecuta si se quiere usar la media ponderada como cálculo de similitud.
-    print("Weighted averaging selected as the calculation " +
-    "algorithm for computing the comparison between " +
-    "signals.\n") # mensaje de información.
-
-# Para comparar las señales entrantes con las señales
-# promedio representadas en las plantillas, primero
-# se va a leer la información de las plantillas y se
-# va a guardar a modo de diccionario. De esta manera,
-# la información está ordenada y resulta más práctico
-# acceder a ella cuando se vaya a usar.
-# Los diccionarios son una variable de Python que permiten
-# guardar valores ('values') y utilizarlos, usando una etiqueta
-# o 'key' para referirse a ellos. La etiqueta, como en
-# el caso de su valor puede tratarse de cualquier
-# tipo de variable. En este caso, se va a generar un
-# diccionario que va a tener tantas etiquetas como canales
-# tengan los archivos de señales que se han utilizado,
-# y cada etiqueta será un string que describa al canal
-# (por ejemplo: "channel1", "channel2", "channel3",
-# "channel4"). Luego, el valor de cada etiqueta se
-# corresponderá con una matriz de dos columnas, que
-# contendrá en la primera la media de los valores de
-# amplitud de las frecuencias de la señal promedio,
-# y en la segunda los valores de desviación estándar
-# asociados.
-
-idx = 1 # índice del número de canal. Representa el número de canal de los archivos que se han usado para hacer las plantillas.
-dic = {} # diccionario vacío. Se llenará con los valores asociados a las plantillas de cada uno de los canales.
-
-for File in os.listdir(templ): # bucle que itera cada archivo del directorio de las plantillas.
-    data = np.loadtxt(templ + "/" + File,
-                      delimiter = "\t") # lee la información de las plantillas (esta información es una matriz de dos columnas).
-    dic["channel"+str(idx)] = data # incorpora esa información a modo de valor ('value') de una etiqueta ('key') en el diccionario.
-    idx = idx + 1 # el número de índice que informa sobre el número de canal aumenta en una unidad por cada iteración.
-
-print("Reading templates... Done.") # mensaje de información.
-
-###################################################
-###################################################
-###                                             ###
-###         COMPARACIÓN DE SEÑALES Y            ###
-###         GENERACIÓN DE RESULTADOS            ###
-###                                             ###
-###################################################
-###################################################
 
-# Para comparar las señales, debido a que este programa
-# pretende formar parte de una interfaz cerebro-cerebro,
-# se necesita que la comparación entre las señales y el
-# resultado se produzcan simultánemente a medida que se
-# reciben las señales. Para lograr esto, se ha creado un
-# bucle infinito que computa el algoritmo de comparación
-# solo cuando se detecta que un nuevo archivo de señales
-# ha llegado a la carpeta destinada a recibirlos. Por
-# medio de este bucle, los archivos que no se han analizado
-# lo harán una vez y en orden de llegada, para que los
-# resultados sean coherentes con el orden en el que se
-# ha producido la actividad electrofisiológica. Los
-# archivos que ya se han analizado no lo volverán a hacer. 
-
-no_files = len(os.listdir(templ)) # número de plantillas en la carpeta de plantillas.
-file_ids = np.linspace(1,no_files,no_files) # vector con los índices del número de plantillas o canales.
-
-result_number = 1 # índice para el número de resultado. Servirá para nombrar los archivos TXT con los resultados e irá incrementándose.
-old_files = [] # lista vacía que contendrá la localización de los archivos que ya se han comparado y no tienen que volver a hacerlo.
-current_path = os.getcwd() # localización desde donde se está ejecutando el script.
-inbound_signals_path = current_path + "\\inboundSignals\\" # localización de la carpeta que recibe los archivos de señales entrantes.
-
-print("System ready to process inbound signals.\n") # mensaje de información.
-
-while True: # bucle que se ejecuta indefinidamente.
-    file_list = os.listdir("inboundSignals") # enlista los archivos de la carpeta que recibe los archivos de las señales entrantes.
-    new_files = [] # lista vacía con cada iteración del bucle que contendrá los archivos cuyas señales han de compararse.
-
-    for signal_file in file_list: # bucle que itera sobre los archivos de señales de la carpeta.
-        if signal_file.split(".")[1] in ["txt","smr","plx"] and signal_file not in old_files: # se ejecuta si el archivo es de algún
-        # formato reconocido por el script, y si además no se ha analizado antes.
+    print("Reading templates... Done.") # mensaje de información.
+
+    ###################################################
+    ###################################################
+    ###                                             ###
+    ###         COMPARACIÓN DE SEÑALES Y            ###
+    ###         GENERACIÓN DE RESULTADOS            ###
+    ###                                             ###
+    ###################################################
+    ###################################################
+
+    # Para comparar las señales, debido a que este programa
+    # pretende formar parte de una interfaz cerebro-cerebro,
+    # se necesita que la comparación entre las señales y el
+    # resultado se produzcan simultánemente a medida que se
+    # reciben las señales. Para lograr esto, se ha creado un
+    # bucle infinito que computa el algoritmo de comparación
+    # solo cuando se detecta que un nuevo archivo de señales
+    # ha llegado a la carpeta destinada a recibirlos. Por
+    # medio de este bucle, los archivos que no se han analizado
+    # lo harán una vez y en orden de llegada, para que los
+    # resultados sean coherentes con el orden en el que se
+    # ha producido la actividad electrofisiológica. Los
+    # archivos que ya se han analizado no lo volverán a hacer. 
+
+    file_ids = dic["channel_ids"] # vector con los números de los canales de las plantillas, en orden.
+
+    # Si se registran las métricas, se empiezan a acumular, y se
+    # escriben por última vez al cerrar el programa (después de que se
+    # guarden los resultados pendientes).
+
+    metrics = None # métricas de rendimiento (None si no se registran).
+    if metrics_name is not None: # se ejecuta si se registran las métricas.
+        metrics = Metrics(file_name = metrics_name,
+                          interval = metrics_interval) # se empiezan a acumular las métricas.
+        atexit.register(metrics.close) # al cerrar el programa, se escriben las métricas.
+
+    # Si los resultados se guardan en la base de datos, se abre el
+    # almacén de resultados, que escribe los resultados por lotes y
+    # marca los archivos de cada lote como terminados en el registro
+    # cuando ya están guardados en el disco. Cuando se cierra el programa
+    # (con Ctrl+C o con la señal SIGTERM), se escriben los resultados que
+    # quedan en memoria.
+
+    store = None # almacén de resultados (None si no se usa la base de datos).
+    if output_mode in ["db","both"]: # se ejecuta si los resultados se guardan en la base de datos.
+        if mean_calc in ["Y","YES"]: # se ejecuta si se usa la media aritmética.
+            metric = "arithmetic" # tipo de media de los resultados.
+        else: # se ejecuta si se usa la media ponderada.
+            metric = "weighted" # tipo de media de los resultados.
+        store = ResultStore(db_name = os.path.join("results", "results.db"),
+                            channel_ids = file_ids,
+                            metric = metric,
+                            on_flush = lambda result_numbers: results_saved(result_numbers,
+                                                                            journal,
+                                                                            metrics)) # se abre el almacén de resultados.
+        atexit.register(store.close) # al cerrar el programa, se escriben los resultados pendientes.
+    if store is not None or metrics is not None: # se ejecuta si hay algo que guardar al cerrar el programa.
+        signal.signal(signal.SIGTERM,
+                      lambda signum, frame: sys.exit(0)) # la señal SIGTERM cierra el programa de forma ordenada.
+
+    current_path = os.getcwd() # localización desde donde se está ejecutando el script.
+    inbound_signals_path = os.path.join(current_path,
+                                        "inboundSignals") # localización de la carpeta que recibe los archivos de señales entrantes.
+
+    # La detección de los archivos nuevos se hace con un objeto
+    # InboxWatcher (ver el módulo watcher_ES), que espera sin consumir
+    # procesador hasta que llega algún archivo a la carpeta de las
+    # señales entrantes, y que recuerda qué archivos se han detectado
+    # ya para no analizarlos otra vez.
+
+    # Los archivos que ya están en el registro no se vuelven a detectar,
+    # salvo los que quedaron pendientes en la ejecución anterior, que se
+    # comparan de nuevo con el número de resultado que ya tenían. Si
+    # alguno de ellos ya no está en la carpeta, se marca como fallido.
+
+    pending_names = set() # nombres de los archivos pendientes del registro.
+    for name, result_number in journal.pending(): # bucle que itera sobre los archivos pendientes del registro.
+        if os.path.isfile(os.path.join(inbound_signals_path, name)): # se ejecuta si el archivo sigue en la carpeta.
+            pending_names.add(name) # el archivo se volverá a comparar.
+            print("Resuming " + name + " file (result" +
+                  str(result_number) + ".txt).") # mensaje de información.
+        else: # se ejecuta si el archivo ya no está en la carpeta.
+            journal.mark_failed(result_number = result_number) # se marca el archivo como fallido.
+            print("WARNING: pending " + name + " file is no " +
+                  "longer in the inbound signals directory.") # mensaje de aviso.
+
+    watcher = InboxWatcher(dir_name = inbound_signals_path,
+                           extensions = ["txt","npy","smr","plx"],
+                           seen = journal.names() - pending_names) # se empieza a vigilar la carpeta de las señales entrantes.
+
+    # Si se compara más de un archivo a la vez, se crean los procesos,
+    # que reciben las plantillas una sola vez al crearse, y un hilo que
+    # escribe los resultados. El número de resultado de cada archivo se
+    # asigna al enviarlo a los procesos, en orden de llegada, por lo que
+    # los archivos "result<N>.txt" mantienen el orden de llegada de los
+    # archivos de señales aunque unas comparaciones terminen antes que
+    # otras. Cada proceso abre las plantillas por su cuenta (ver
+    # init_worker() en el módulo comparison_ES). Si se compara un archivo
+    # cada vez, las plantillas se preparan una sola vez en un objeto
+    # Comparator.
+
+    if workers > 1: # se ejecuta si se van a comparar varios archivos a la vez.
+        if library is None: # se ejecuta si se compara con las plantillas de la carpeta "templates".
+            pool = ProcessPoolExecutor(max_workers = workers,
+                                       initializer = init_worker,
+                                       initargs = (templ, mean_calc, fft_workers)) # se crean los procesos.
+        else: # se ejecuta si se compara con la biblioteca.
+            pool = ProcessPoolExecutor(max_workers = workers,
+                                       initializer = init_library_worker,
+                                       initargs = (library_dir, mean_calc, fft_workers)) # se crean los procesos.
+        pending = queue.Queue() # cola con las comparaciones pendientes de escribir.
+        threading.Thread(target = result_writer,
+                         args = (pending, journal, store, write_txt, metrics, library),
+                         daemon = True).start() # se inicia el hilo que escribe los resultados.
+    elif library is not None: # se ejecuta si se compara un archivo cada vez con la biblioteca.
+        comp = library # las plantillas ya están preparadas.
+    else: # se ejecuta si se compara un archivo cada vez.
+        comp = Comparator(template = dic,
+                          is_arith = mean_calc,
+                          max_numb_pnts = pnts,
+                          file_ids = file_ids,
+                          fft_workers = fft_workers) # se preparan las plantillas.
+
+    print("System ready to process inbound signals.\n") # mensaje de información.
+
+    while True: # bucle que se ejecuta indefinidamente.
+        new_files = [] # lista vacía con cada iteración del bucle que contendrá los archivos cuyas señales han de compararse.
+
+        for signal_file in watcher.wait_new_files(): # bucle que itera sobre los archivos nuevos de la carpeta (espera hasta que llegue alguno).
             print("New inbound file (" + signal_file +
                   ") detected in inbound signals directory.") # mensaje de información de detección del archivo.
-            file_path = inbound_signals_path + signal_file # localización del archivo de señales entrante.
-            new_files.append(file_path) # se incorpora la localización del archivo a la lista de archivos no analizados.
-            old_files.append(signal_file) # se incorpora la localización del archivo a la lista de archivos ya analizados.
-        
-    new_files.sort(key = os.path.getctime) # se ordenan los archivos todavía no analizados por su orden de llegada a la carpeta. 
-
-    if len(new_files) > 0: # se ejecuta si hay nuevos archivos en la carpeta que todavía no se han analizado.
-        for new_file in new_files: # bucle que itera sobre cada uno de los archivos no analizados.
-            output_name = "result" + str(result_number) + ".txt" # se nombra el archivo que contendrá los resultados de la comparación.
-            output_file = open(output_name, "w") # se crea el archivo.
-            output_file.write(comparator(template = dic,
-                                         max_numb_pnts = pnts,
-                                         what_file = new_file,
-                                         is_arith = mean_calc)) # se sobreescribe el archivo con los resultados de similitud.
-            output_file.close() # se cierra el archivo.
-            os.rename(output_name, "results/"+output_name) # se mueve el archivo a la carpeta destinada a acumular los resultados.
-            print(output_name + " file generated from " +
-                  new_file + " file is now available in " +
-                  "the results directory.") # mensaje de información de que los resultados ya se han emitido en un archivo TXT.
-            result_number = result_number + 1 # el número de archivo de resultados aumenta en una unidad.
\ No newline at end of file
+            file_path = os.path.join(inbound_signals_path,
+                                     signal_file) # localización del archivo de señales entrante.
+            try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+                arrived = os.path.getctime(file_path) # momento de llegada del archivo (se toma una sola vez, al detectarlo).
+            except OSError: # se ejecuta si el archivo ya no está en la carpeta.
+                print("WARNING: " + signal_file + " file is no " +
+                      "longer in the inbound signals directory.") # mensaje de aviso.
+                continue # se pasa al siguiente archivo.
+            new_files.append((arrived, file_path)) # se incorpora el momento de llegada y la localización del archivo a la lista de archivos no analizados.
+
+        new_files.sort() # se ordenan los archivos todavía no analizados por su orden de llegada a la carpeta.
+
+        for file_idx, (arrived, new_file) in enumerate(new_files): # bucle que itera sobre cada uno de los archivos no analizados.
+            result_number = journal.register(file_path = new_file) # se registra el archivo y se obtiene su número de resultado.
+            if workers > 1: # se ejecuta si se comparan varios archivos a la vez.
+                if windowed: # se ejecuta si los archivos se comparan por ventanas.
+                    future = pool.submit(score_file_windows, new_file, window_hop) # se envía el archivo a los procesos.
+                else: # se ejecuta si cada archivo se compara entero.
+                    future = pool.submit(score_file, new_file) # se envía el archivo a los procesos.
+                pending.put((result_number, new_file, arrived, future)) # se registra la comparación para escribir sus resultados en orden.
+                if metrics is not None: # se ejecuta si se registran las métricas.
+                    metrics.set_queue_depth(depth = pending.qsize()) # número de archivos en espera.
+                continue # se pasa al siguiente archivo.
+            if metrics is not None: # se ejecuta si se registran las métricas.
+                metrics.set_queue_depth(depth = len(new_files) - file_idx - 1) # número de archivos en espera.
+            timings = {} # diccionario vacío con la duración de cada etapa de la comparación.
+            try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+                if windowed: # se ejecuta si los archivos se comparan por ventanas.
+                    scores = comp.score_file_windows(what_file = new_file,
+                                                     hop = window_hop,
+                                                     timings = timings) # se comparan las ventanas con las plantillas.
+                else: # se ejecuta si cada archivo se compara entero.
+                    scores = comp.score_file(what_file = new_file,
+                                             timings = timings) # se comparan las señales con las plantillas.
+            except Exception as error: # se ejecuta si la comparación ha dado error.
+                report_failure(error = error,
+                               result_number = result_number,
+                               new_file = new_file,
+                               journal = journal,
+                               metrics = metrics) # se registra el error.
+                continue # se pasa al siguiente archivo.
+            try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+                write_result(scores = scores,
+                             result_number = result_number,
+                             new_file = new_file,
+                             arrived = arrived,
+                             journal = journal,
+                             store = store,
+                             write_txt = write_txt,
+                             metrics = metrics,
+                             timings = timings,
+                             library = library) # se guardan los resultados.
+            except Exception as error: # se ejecuta si la escritura ha dado error.
+                report_failure(error = error,
+                               result_number = result_number,
+                               new_file = new_file,
+                               journal = journal,
+                               metrics = metrics,
+                               stage = "saved in the results") # se registra el error.
+
+if __name__ == "__main__": # se ejecuta solo si se lanza este script (no si se importa).
+    main() # se ejecuta el programa.
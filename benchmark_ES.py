@@ -0,0 +1,472 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este programa mide cuánto tarda cada parte del algoritmo, para
+# poder comparar el rendimiento de una versión a otra del programa.
+# Genera archivos de señales sintéticos (con el número de puntos,
+# de canales, de archivos y la tasa de muestreo que se indiquen),
+# genera plantillas con ellos y compara con ellas otros archivos
+# sintéticos, igual que lo harían template_gen_ES.py y
+# auto_comparator_ES.py, pero midiendo el tiempo de cada etapa:
+
+# - Generación de las plantillas: lectura de la descripción de los
+# archivos ("probe"), lectura de las señales ("read"), transformada de
+# Fourier ("fft"), actualización de las medias y desviaciones
+# estándar ("reduce"), sumadas para todos los archivos, y escritura
+# del archivo de las plantillas ("write"). Además, se mide el tiempo
+# total de build_templates() con el número de procesos indicado.
+# - Comparación: preparación de las plantillas ("prepare"), lectura
+# de las señales ("read"), transformada de Fourier ("fft"), cálculo
+# de la proporción de similitud ("score"), escritura de los
+# archivos TXT de resultados ("write_txt") y de la base de datos de
+# resultados ("write_db"). Además, se mide el tiempo total de
+# Comparator.score_file() por archivo.
+
+# Las etapas no se vuelven a programar aquí: se llama a
+# build_templates() y a Comparator.score_file(), y se registra la
+# duración de cada etapa que devuelven en el diccionario "timings",
+# por lo que los tiempos corresponden al código real del algoritmo
+# (incluido el diezmado de las señales, con "--decimate").
+
+# Los archivos sintéticos contienen, en cada canal, la suma de
+# unas pocas ondas de baja frecuencia y ruido, con valores de 16
+# bits (como los de un conversor analógico-digital), y se escriben
+# en los formatos TXT y NPY. El módulo neo no permite escribir
+# archivos SMR ni PLX, así que esos formatos solo se miden si se
+# indica una carpeta con archivos reales con el argumento
+# "--fixtures" (todos los archivos de la carpeta se usan para
+# generar las plantillas y para compararlos con ellas).
+
+# El resultado se escribe en un archivo JSON (por defecto, en la
+# carpeta "benchmarks", con la fecha y la hora en el nombre), con la
+# configuración, las versiones de Python y de los módulos, la
+# revisión de git (si la hay) y, para cada formato y etapa, el número
+# de mediciones y su tiempo total, medio, mediano, mínimo, máximo y
+# el percentil 95 (en segundos). Así, se pueden comparar los
+# informes de dos versiones para detectar empeoramientos.
+
+# Los argumentos opcionales son los siguientes:
+
+# - "--length N": número de puntos de cada señal (60000).
+# - "--channels N": número de canales de cada archivo (8).
+# - "--files N": número de archivos para hacer las plantillas (20).
+# - "--inbound N": número de archivos que se comparan (20).
+# - "--rate HZ": tasa de muestreo de las señales (1000).
+# - "--formats LISTA": formatos sintéticos, separados por comas
+# ("txt,npy").
+# - "--limit-freq HZ": frecuencia límite de las plantillas (40). Si
+# se indica "--prop P", las plantillas se hacen con la proporción P
+# de la suma acumulada de las amplitudes.
+# - "--weighted": se usa la media ponderada en lugar de la
+# aritmética.
+# - "--float32": las plantillas se calculan en precisión simple.
+# - "--decimate": las señales se diezman antes de la transformada de
+# Fourier (ver decimation_factor() en el módulo template_builder_ES).
+# No se puede usar con "--prop".
+# - "--workers N": número de procesos de build_templates() (1).
+# - "--fft-workers N": número de hilos de la transformada de Fourier
+# (1).
+# - "--exact-length": la transformada de Fourier se calcula con el
+# número de puntos de la señal más larga, en lugar del número de
+# puntos eficiente más cercano (ver transform_points() en el módulo
+# template_builder_ES).
+# - "--fixtures CARPETA": carpeta con archivos SMR o PLX reales.
+# - "--output ARCHIVO": localización del informe JSON.
+# - "--keep": no se borran los archivos sintéticos al terminar.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - sys: Se ha usado para leer los argumentos del prompt.
+# - os, shutil y tempfile: Se han usado para crear y borrar la
+# carpeta de los archivos sintéticos.
+# - time: Se ha usado para medir el tiempo de cada etapa.
+# - json: Se ha usado para escribir el informe.
+# - platform y subprocess: Se han usado para registrar la versión
+# de Python y la revisión de git en el informe.
+# - numpy (np): Se ha usado para generar las señales sintéticas y
+# calcular el resumen de los tiempos.
+# - scipy y neo: Se han usado para registrar sus versiones.
+# - Los módulos propios del algoritmo que se miden (template_store_ES,
+# template_builder_ES, comparison_ES y results_store_ES).
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+import json
+import platform
+import subprocess
+import numpy as np
+import scipy
+import neo
+from template_store_ES import save_templates
+from template_builder_ES import build_templates
+from comparison_ES import Comparator, format_scores
+from results_store_ES import ResultStore
+
+###################################################
+###################################################
+###                                             ###
+###              CONSTANTES USADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+REPORT_VERSION = 1 # versión del formato del informe.
+SYNTHETIC_FORMATS = ["txt", "npy"] # formatos en los que se pueden escribir archivos sintéticos.
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - StageTimer(): Requiere de los módulos time y NumPy (np). Acumula
+# los tiempos de cada etapa. Sus métodos son:
+
+# - start(): empieza a medir.
+# - lap(stage): registra el tiempo transcurrido desde la última
+# llamada a start() o lap() en la etapa "stage", y vuelve a
+# empezar a medir.
+# - add(stage, seconds): registra directamente un tiempo.
+# - summary(): devuelve un diccionario con una etiqueta por etapa
+# (en el orden en el que se registraron) y el resumen de sus
+# tiempos.
+
+class StageTimer: # requiere de los módulos time y NumPy (np).
+    def __init__(self):
+        self.times = {} # tiempos de cada etapa (s).
+        self.last = time.perf_counter() # momento de la última medición.
+
+    def start(self):
+        self.last = time.perf_counter() # se empieza a medir.
+
+    def lap(self, stage):
+        now = time.perf_counter() # momento actual.
+        self.add(stage = stage,
+                 seconds = now - self.last) # se registra el tiempo de la etapa.
+        self.last = now # se vuelve a empezar a medir.
+
+    def add(self, stage, seconds):
+        self.times.setdefault(stage, []).append(seconds) # se registra el tiempo.
+
+    def summary(self):
+        result = {} # diccionario vacío que contendrá el resumen de cada etapa.
+        for stage, times in self.times.items(): # bucle que itera sobre cada etapa.
+            times = np.array(times) # tiempos de la etapa.
+            result[stage] = {"count": len(times),
+                             "total_s": float(np.sum(times)),
+                             "mean_s": float(np.mean(times)),
+                             "median_s": float(np.median(times)),
+                             "min_s": float(np.min(times)),
+                             "max_s": float(np.max(times)),
+                             "p95_s": float(np.percentile(times, 95))} # resumen de los tiempos.
+        return result # devuelve el resumen.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - option(name, default, cast): Requiere del módulo sys. Devuelve el
+# valor que sigue al argumento "name" del prompt, convertido con la
+# función "cast" (por ejemplo, int). Si no se ha indicado el
+# argumento, devuelve "default". Si el valor no es válido, se cierra
+# el programa.
+
+def option(name, default, cast): # requiere del módulo sys.
+    if name not in sys.argv: # se ejecuta si no se ha indicado el argumento.
+        return default # devuelve el valor por defecto.
+    try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+        return cast(sys.argv[sys.argv.index(name)+1]) # devuelve el valor indicado.
+    except: # se ejecuta si el valor no es válido.
+        print("ERROR: " + name + " argument requires a " +
+              cast.__name__ + " value.") # mensaje de error.
+        quit() # se cierra el programa.
+
+# - synthetic_recording(rng, length, channels, rate): Requiere del
+# módulo NumPy (np). Devuelve una matriz con una señal sintética de
+# "length" puntos por canal, con la misma disposición que los
+# archivos TXT (una fila por punto, la primera columna con el vector
+# de tiempo y una columna por canal). Cada canal es la suma de tres
+# ondas de entre 0,5 y 15 Hz y ruido, con valores enteros de 16 bits.
+# El argumento "rng" es el generador de números aleatorios de NumPy.
+
+def synthetic_recording(rng, length, channels, rate): # requiere del módulo NumPy (np).
+    t = np.arange(length)/rate # vector de tiempo.
+    data = np.zeros([length,channels+1]) # matriz vacía con el vector de tiempo y los canales.
+    data[:,0] = t # vector de tiempo.
+    for channel in range(channels): # bucle que itera sobre cada canal.
+        freqs = rng.uniform(0.5, 15, 3) # frecuencias de las ondas del canal.
+        amps = rng.uniform(1000, 8000, 3) # amplitudes de las ondas del canal.
+        wave = np.sum(amps[:,None]*np.sin(2*np.pi*freqs[:,None]*t +
+                                          rng.uniform(0, 2*np.pi, 3)[:,None]),
+                      axis = 0) # suma de las ondas.
+        wave += rng.normal(0, 500, length) # ruido.
+        data[:,channel+1] = np.clip(np.round(wave), -32768, 32767) # valores de 16 bits.
+    return data # devuelve la matriz.
+
+# - write_recording(file_name, file_format, data): Requiere del módulo
+# NumPy (np). Escribe la matriz "data" en el archivo "file_name" con el
+# formato "file_format" (TXT o NPY).
+
+def write_recording(file_name, file_format, data): # requiere del módulo NumPy (np).
+    if file_format == "txt": # se ejecuta si el formato es TXT.
+        np.savetxt(file_name, data, delimiter = "\t") # se escribe el archivo de texto.
+    else: # se ejecuta si el formato es NPY.
+        np.save(file_name, data) # se escribe el archivo binario.
+
+# - make_files(dir_name, prefix, file_format, no_files, seed, length,
+# channels, rate): Requiere del módulo NumPy (np). Escribe "no_files"
+# archivos sintéticos en la carpeta "dir_name" y devuelve la lista
+# de sus localizaciones.
+
+def make_files(dir_name, prefix, file_format, no_files, seed, length, channels, rate): # requiere del módulo NumPy (np).
+    rng = np.random.default_rng(seed) # generador de números aleatorios.
+    os.makedirs(dir_name, exist_ok = True) # se crea la carpeta.
+    file_names = [] # lista vacía que contendrá la localización de los archivos.
+    for file_idx in range(no_files): # bucle que itera sobre cada archivo.
+        file_name = os.path.join(dir_name, prefix + str(file_idx) + "." + file_format) # localización del archivo.
+        write_recording(file_name = file_name,
+                        file_format = file_format,
+                        data = synthetic_recording(rng = rng,
+                                                   length = length,
+                                                   channels = channels,
+                                                   rate = rate)) # se escribe el archivo.
+        file_names.append(file_name) # se incorpora a la lista.
+    return file_names # devuelve la lista.
+
+# - time_template_gen(file_names, templ_dir, limit_freq, prop, dtype,
+# workers, exact_length, fft_workers, decimate): Genera las plantillas
+# con los archivos de "file_names" con build_templates() (en un solo
+# proceso, para poder medir cada etapa) y las escribe en la carpeta
+# "templ_dir". Si "workers" es mayor que 1, vuelve a medir el tiempo
+# total de build_templates() con "workers" procesos. Devuelve el
+# resumen de los tiempos (ver StageTimer) y las plantillas.
+
+def time_template_gen(file_names, templ_dir, limit_freq, prop, dtype, workers,
+                      exact_length = False, fft_workers = 1, decimate = False):
+    mode = "first_frequencies" if prop is None else "cumulative_sum" # forma de elegir las frecuencias de las plantillas.
+    timer = StageTimer() # acumulador de tiempos.
+    timings = {} # diccionario vacío con la duración de cada etapa.
+    template = build_templates(file_names = file_names,
+                               mode = mode,
+                               limit_freq = limit_freq,
+                               prop = prop,
+                               dtype = dtype,
+                               decimate = decimate,
+                               exact_length = exact_length,
+                               fft_workers = fft_workers,
+                               timings = timings) # se generan las plantillas.
+    if workers <= 1: # se ejecuta si no se reparten los archivos entre varios procesos.
+        timer.lap(stage = "build_templates") # tiempo total.
+    for stage in ["probe", "read", "fft", "reduce"]: # bucle que itera sobre cada etapa.
+        timer.add(stage = stage,
+                  seconds = timings[stage]) # se registra el tiempo de la etapa.
+    timer.start() # se empieza a medir.
+    save_templates(templ_dir = templ_dir,
+                   bundle = template) # se escriben las plantillas.
+    timer.lap(stage = "write") # tiempo de la escritura.
+    if workers > 1: # se ejecuta si se reparten los archivos entre varios procesos.
+        timer.start() # se empieza a medir.
+        build_templates(file_names = file_names,
+                        mode = mode,
+                        limit_freq = limit_freq,
+                        prop = prop,
+                        workers = workers,
+                        dtype = dtype,
+                        decimate = decimate,
+                        exact_length = exact_length,
+                        fft_workers = fft_workers) # se generan las plantillas con varios procesos.
+        timer.lap(stage = "build_templates") # tiempo total.
+    return timer.summary(), template # devuelve el resumen de los tiempos y las plantillas.
+
+# - time_comparator(template, file_names, is_arith, out_dir,
+# fft_workers): Compara los archivos de "file_names" con las
+# plantillas "template" con Comparator.score_file(), registrando la
+# duración de cada etapa que devuelve, y escribe los resultados en
+# archivos TXT y en una base de datos de la carpeta "out_dir".
+# Devuelve el resumen de los tiempos (ver StageTimer).
+
+def time_comparator(template, file_names, is_arith, out_dir, fft_workers = 1):
+    timer = StageTimer() # acumulador de tiempos.
+    comp = Comparator(template = template,
+                      is_arith = is_arith,
+                      fft_workers = fft_workers) # se preparan las plantillas.
+    timer.lap(stage = "prepare") # tiempo de la preparación.
+    store = ResultStore(db_name = os.path.join(out_dir, "results.db"),
+                        channel_ids = comp.file_ids,
+                        metric = "benchmark") # almacén de resultados.
+    for result_number, file_name in enumerate(file_names, 1): # bucle que itera sobre los archivos.
+        timings = {} # diccionario vacío con la duración de cada etapa.
+        timer.start() # se empieza a medir.
+        scores = comp.score_file(what_file = file_name,
+                                 timings = timings) # se compara el archivo con las plantillas.
+        timer.lap(stage = "score_file") # tiempo total.
+        for stage in ["read", "fft", "score"]: # bucle que itera sobre cada etapa.
+            timer.add(stage = stage,
+                      seconds = timings[stage]) # se registra el tiempo de la etapa.
+        with open(os.path.join(out_dir, "result" + str(result_number) + ".txt"), "w") as File: # se crea el archivo de resultados.
+            File.write(format_scores(scores)) # se escriben los resultados.
+        timer.lap(stage = "write_txt") # tiempo de la escritura del archivo TXT.
+        store.add(result_number = result_number,
+                  source = os.path.basename(file_name),
+                  scores = scores,
+                  arrived = time.time()) # se acumulan los resultados en el almacén.
+        timer.lap(stage = "write_db") # tiempo de la escritura en la base de datos.
+    store.close() # se escriben los resultados pendientes.
+    timer.lap(stage = "write_db") # tiempo de la última escritura en la base de datos.
+    return timer.summary() # devuelve el resumen de los tiempos.
+
+# - git_revision(): Requiere del módulo subprocess. Devuelve la
+# revisión de git de la carpeta de este programa, o None si no se
+# puede obtener.
+
+def git_revision(): # requiere del módulo subprocess.
+    try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                       cwd = os.path.dirname(os.path.abspath(__file__)),
+                                       stderr = subprocess.DEVNULL).decode().strip() # devuelve la revisión.
+    except Exception: # se ejecuta si no es un repositorio de git (o no está instalado).
+        return None # no hay revisión.
+
+# - main(): Es el programa en sí: lee los argumentos del prompt,
+# genera los archivos sintéticos, mide las dos partes del algoritmo
+# con cada formato y escribe el informe.
+
+def main():
+    print("\nLaunching " + sys.argv[0] + ".\n") # mensaje de inicialización.
+    config = {"length": option("--length", 60000, int),
+              "channels": option("--channels", 8, int),
+              "files": option("--files", 20, int),
+              "inbound": option("--inbound", 20, int),
+              "rate": option("--rate", 1000.0, float),
+              "formats": option("--formats", "txt,npy", str).lower().split(","),
+              "limit_freq": option("--limit-freq", 40.0, float),
+              "prop": option("--prop", None, float),
+              "is_arith": "N" if "--weighted" in sys.argv else "Y",
+              "dtype": "float32" if "--float32" in sys.argv else "float64",
+              "decimate": "--decimate" in sys.argv,
+              "workers": option("--workers", 1, int),
+              "fft_workers": option("--fft-workers", 1, int),
+              "exact_length": "--exact-length" in sys.argv,
+              "fixtures": option("--fixtures", None, str)} # configuración de la medición.
+    for file_format in config["formats"]: # bucle que itera sobre los formatos indicados.
+        if file_format not in SYNTHETIC_FORMATS: # se ejecuta si no se pueden escribir archivos sintéticos con ese formato.
+            print("ERROR: synthetic files can only be written " +
+                  "as: " + ", ".join(SYNTHETIC_FORMATS) + ". Use " +
+                  "--fixtures for SMR or PLX files.") # mensaje de error.
+            quit() # se cierra el programa.
+    if config["decimate"] and config["prop"] is not None: # se ejecuta si se quieren diezmar las señales sin frecuencia límite.
+        print("ERROR: --decimate can't be used with --prop.") # mensaje de error.
+        quit() # se cierra el programa.
+    output = option("--output",
+                    os.path.join("benchmarks",
+                                 "benchmark_" + time.strftime("%Y%m%d-%H%M%S") + ".json"),
+                    str) # localización del informe.
+    work_dir = tempfile.mkdtemp(prefix = "benchmark_") # carpeta de los archivos sintéticos.
+    cases = [] # lista vacía con los conjuntos de archivos que se miden (formato, plantillas y entrantes).
+    print("Writing synthetic files to " + work_dir + "...") # mensaje de información.
+    for file_format in config["formats"]: # bucle que itera sobre los formatos sintéticos.
+        sample_files = make_files(dir_name = os.path.join(work_dir, file_format, "samples"),
+                                  prefix = "sample",
+                                  file_format = file_format,
+                                  no_files = config["files"],
+                                  seed = 1,
+                                  length = config["length"],
+                                  channels = config["channels"],
+                                  rate = config["rate"]) # archivos para hacer las plantillas.
+        inbound_files = make_files(dir_name = os.path.join(work_dir, file_format, "inbound"),
+                                   prefix = "inbound",
+                                   file_format = file_format,
+                                   no_files = config["inbound"],
+                                   seed = 2,
+                                   length = config["length"],
+                                   channels = config["channels"],
+                                   rate = config["rate"]) # archivos que se comparan.
+        cases.append((file_format, sample_files, inbound_files)) # se incorpora el conjunto.
+    if config["fixtures"] is not None: # se ejecuta si se ha indicado una carpeta con archivos reales.
+        fixtures = sorted(os.path.join(config["fixtures"], File)
+                          for File in os.listdir(config["fixtures"])) # archivos de la carpeta.
+        for file_format in ["smr", "plx"]: # bucle que itera sobre los formatos de neo.
+            files = [File for File in fixtures
+                     if File.lower().endswith("." + file_format)] # archivos de ese formato.
+            if len(files) > 0: # se ejecuta si hay archivos de ese formato.
+                cases.append((file_format, files, files)) # se incorpora el conjunto.
+    print("Done.\n") # mensaje de información.
+
+    results = [] # lista vacía que contendrá los resultados de cada formato.
+    dtype = np.dtype(config["dtype"]).type # tipo de número de las plantillas.
+    for file_format, sample_files, inbound_files in cases: # bucle que itera sobre cada conjunto de archivos.
+        templ_dir = os.path.join(work_dir, file_format, "templates") # carpeta de las plantillas.
+        out_dir = os.path.join(work_dir, file_format, "results") # carpeta de los resultados.
+        os.makedirs(templ_dir, exist_ok = True) # se crea la carpeta de las plantillas.
+        os.makedirs(out_dir, exist_ok = True) # se crea la carpeta de los resultados.
+        print("Timing template generation (" + file_format.upper() + ")...") # mensaje de información.
+        template_gen, template = time_template_gen(file_names = sample_files,
+                                                   templ_dir = templ_dir,
+                                                   limit_freq = config["limit_freq"],
+                                                   prop = config["prop"],
+                                                   dtype = dtype,
+                                                   workers = config["workers"],
+                                                   exact_length = config["exact_length"],
+                                                   fft_workers = config["fft_workers"],
+                                                   decimate = config["decimate"]) # tiempos de la generación de las plantillas y plantillas con las que se compara.
+        print("Timing comparison (" + file_format.upper() + ")...") # mensaje de información.
+        comparator = time_comparator(template = template,
+                                     file_names = inbound_files,
+                                     is_arith = config["is_arith"],
+                                     out_dir = out_dir,
+                                     fft_workers = config["fft_workers"]) # tiempos de la comparación.
+        results.append({"format": file_format,
+                        "synthetic": file_format in SYNTHETIC_FORMATS,
+                        "sample_files": len(sample_files),
+                        "inbound_files": len(inbound_files),
+                        "max_pnts": template["max_pnts"],
+                        "fft_pnts": template["fft_pnts"],
+                        "decimation": int(template["decimation"]),
+                        "no_freqs": int(np.max(template["lengths"])),
+                        "template_gen": template_gen,
+                        "comparator": comparator}) # se incorporan los resultados.
+        print("Read " + str(round(comparator["read"]["mean_s"]*1000, 3)) +
+              " ms, FFT " + str(round(comparator["fft"]["mean_s"]*1000, 3)) +
+              " ms, score " + str(round(comparator["score"]["mean_s"]*1000, 3)) +
+              " ms per inbound file.\n") # mensaje con el resumen de la comparación.
+
+    report = {"version": REPORT_VERSION,
+              "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+              "git_revision": git_revision(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "numpy": np.__version__,
+              "scipy": scipy.__version__,
+              "neo": neo.__version__,
+              "config": config,
+              "results": results} # informe.
+    if os.path.dirname(output) != "": # se ejecuta si el informe va en una carpeta.
+        os.makedirs(os.path.dirname(output), exist_ok = True) # se crea la carpeta si no existe.
+    with open(output, "w") as File: # se crea el archivo del informe.
+        json.dump(report, File, indent = 2) # se escribe el informe.
+    if "--keep" not in sys.argv: # se ejecuta si no se quieren conservar los archivos sintéticos.
+        shutil.rmtree(work_dir) # se borran los archivos sintéticos.
+    print("Benchmark report written to " + output + ".\n") # mensaje de información.
+
+if __name__ == "__main__": # se ejecuta solo si se lanza este script (no si se importa).
+    main() # se ejecuta el programa.
@@ -0,0 +1,491 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene la comparación de un archivo de señales
+# entrantes con las plantillas, que se utiliza desde el script
+# auto_comparator_ES.py. Al estar en un módulo aparte, la
+# comparación se puede ejecutar en otros procesos, para comparar
+# varios archivos entrantes a la vez.
+
+# La comparación también se puede usar desde otros programas, sin
+# lanzar el script auto_comparator_ES.py, con un objeto Comparator,
+# que prepara las plantillas una sola vez y luego compara tantas
+# señales como se quiera:
+
+# from template_store_ES import load_templates
+# from comparison_ES import Comparator
+# comp = Comparator(template = load_templates(templ_dir = "templates"),
+#                   is_arith = "Y")
+# scores = comp.score_file(what_file = "inboundSignals/s1.txt")
+# scores = comp.score(signals = matriz) # una fila por canal.
+
+# Las grabaciones largas y continuas también se pueden comparar por
+# ventanas solapadas, en lugar de con una sola transformada de Fourier
+# de todo el archivo. Cada ventana tiene tantos puntos como la señal
+# más larga de las plantillas, y su transformada, tantos como la de
+# las plantillas (así, sus frecuencias son las mismas que las de las
+# plantillas), y las ventanas empiezan cada "hop" puntos
+# (por defecto, la mitad de la ventana). El archivo se lee por bloques
+# y cada ventana se compara en cuanto se han leído sus puntos, por lo
+# que la memoria necesaria depende del tamaño de la ventana y no del
+# del archivo. El resultado es una serie temporal con la proporción de
+# similitud de cada canal en cada ventana:
+
+# for start_time, scores in comp.score_windows(what_file = "larga.txt"):
+#     ...
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - os: Se ha usado para obtener el formato de los archivos.
+# - time: Se ha usado para medir la duración de cada etapa de la
+# comparación.
+# - numpy (np): Se ha usado para hacer cálculo matricial.
+# - spectrum_ES: Módulo propio que contiene el cálculo del
+# dominio de frecuencia de las señales.
+# - scoring_ES: Módulo propio que contiene el cálculo
+# vectorizado de la proporción de similitud entre las
+# señales entrantes y las plantillas.
+# - signal_io_ES: Módulo propio que contiene la lectura de
+# los archivos de señales (TXT, NPY, SMR o PLX).
+# - template_store_ES: Módulo propio que contiene la lectura del
+# archivo de las plantillas (en los procesos que comparan varios
+# archivos a la vez).
+
+import os
+import time
+import numpy as np
+from spectrum_ES import amplitude_spectrum, decimation_stages, decimated_length, SpectrumPlan
+from scoring_ES import compile_templates
+from signal_io_ES import signal_matrix, signal_chunks
+from template_store_ES import load_templates
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - Comparator(template, is_arith, max_numb_pnts, file_ids,
+# fft_workers): Requiere
+# de los módulos NumPy (np), os, spectrum_ES, scoring_ES y
+# signal_io_ES. Compara señales con las plantillas del diccionario
+# "template" (el que devuelve load_templates() del módulo
+# template_store_ES, o build_templates() del módulo
+# template_builder_ES). El argumento "is_arith" tiene el mismo
+# significado que en comparator() ("Y" o "YES" para la media
+# aritmética, "N" o "NO" para la ponderada). Los argumentos opcionales
+# "max_numb_pnts" y "file_ids" son el número de puntos que se leen de
+# cada señal y los números de los canales que se comparan; si no se
+# indican, se toman de las plantillas. La transformada de Fourier se
+# calcula con el número de puntos de las plantillas ("fft_pnts", ver
+# el módulo template_store_ES), para que sus frecuencias sean las
+# mismas, y sus filas se reparten entre "fft_workers" hilos. Las
+# plantillas se preparan una sola vez, al crear el objeto
+# (compile_templates() del módulo scoring_ES), con las constantes que
+# no dependen de la señal entrante ya calculadas, y, si las señales
+# se diezmaron al hacer las plantillas, también los filtros con los
+# que se diezman las señales entrantes antes de la transformada de
+# Fourier (decimation_stages() del módulo spectrum_ES) y el método con
+# el que se calculan las amplitudes de las frecuencias de las
+# plantillas (clase SpectrumPlan del módulo spectrum_ES: si son muy
+# pocas, se calculan solo esas, sin la transformada completa). Sus
+# métodos son:
+
+# - prepare(compiled, is_arith, max_numb_pnts, fft_pnts, file_ids,
+# decimation, decimation_band, fft_workers): prepara el objeto con las
+# plantillas ya preparadas "compiled" (un objeto CompiledTemplates del
+# módulo scoring_ES, con una fila por canal de "file_ids"), el número
+# de puntos "fft_pnts" de su transformada de Fourier (o
+# "max_numb_pnts", si es mayor) y el factor "decimation" y la
+# frecuencia límite relativa "decimation_band" con los que se
+# diezmaron las señales. Se llama al crear el objeto, y también desde
+# las subclases que reúnen las plantillas de otra forma (ver la clase
+# TemplateLibrary en el módulo library_ES), para que todas se preparen
+# igual.
+
+# - score(signals, lengths, timings): compara las señales de la matriz
+# "signals" (una fila por canal, en el orden de "file_ids", o un
+# vector si solo hay un canal) y devuelve el vector con la proporción
+# de similitud de cada canal. El argumento opcional "lengths" es el
+# número de puntos original de cada señal, si las filas ya vienen
+# rellenas con ceros (ver signal_matrix() en el módulo signal_io_ES).
+# Si se indica el diccionario "timings", se guarda en él la duración
+# (en segundos) de la transformada de Fourier ("fft") y del cálculo
+# de la proporción de similitud ("score").
+# - score_spectra(ampls): compara con las plantillas la matriz de
+# amplitudes "ampls" (una fila por canal, en el orden de "file_ids")
+# y devuelve el vector con la proporción de similitud de cada canal.
+# Es la parte de score() que se hace después de la transformada de
+# Fourier.
+# - score_file(what_file, timings): lee el archivo de señales
+# "what_file" (TXT, NPY, SMR o PLX) y devuelve lo mismo que score().
+# Si se indica el diccionario "timings", se guarda en él, además, la
+# duración de la lectura ("read").
+# - score_windows(what_file, hop, timings): lee el archivo de señales
+# "what_file" por bloques y compara con las plantillas cada ventana de
+# "max_numb_pnts" puntos, empezando una ventana nueva cada "hop" puntos
+# (la mitad de la ventana si no se indica). Devuelve (con yield), para
+# cada ventana, el momento de su primer punto (en segundos, según el
+# vector de tiempo del archivo) y el vector con la proporción de
+# similitud de cada canal. Si al final del archivo quedan puntos que
+# no han entrado en ninguna ventana completa (o el archivo es más
+# corto que una ventana), se compara una última ventana con los
+# puntos restantes, rellena con ceros, igual que score_file(). Si se
+# indica el diccionario "timings", se guarda en él la duración total
+# de la lectura, de las transformadas de Fourier y del cálculo de la
+# proporción de similitud de todas las ventanas.
+# - score_file_windows(what_file, hop, timings): devuelve la serie
+# completa de score_windows() en una matriz con una fila por ventana:
+# la primera columna es el momento del primer punto de la ventana, y
+# las demás, la proporción de similitud de cada canal (la misma
+# disposición que los archivos de señales TXT).
+
+# Si "is_arith" no es una de las respuestas reconocidas, o "hop" no
+# está entre 1 y "max_numb_pnts", da un error ValueError.
+
+class Comparator: # requiere de los módulos NumPy (np), os, spectrum_ES, scoring_ES y signal_io_ES.
+    def __init__(self, template, is_arith, max_numb_pnts = None, file_ids = None, fft_workers = 1):
+        if max_numb_pnts is None: # se ejecuta si no se ha indicado el número de puntos.
+            max_numb_pnts = template["max_pnts"] # número de puntos de las plantillas.
+        if file_ids is None: # se ejecuta si no se han indicado los canales.
+            file_ids = template["channel_ids"] # canales de las plantillas, en orden.
+        self.prepare(compiled = compile_templates(template = template,
+                                                  file_ids = file_ids),
+                     is_arith = is_arith,
+                     max_numb_pnts = max_numb_pnts,
+                     fft_pnts = template["fft_pnts"],
+                     file_ids = file_ids,
+                     decimation = template["decimation"],
+                     decimation_band = template["decimation_band"],
+                     fft_workers = fft_workers) # se preparan las plantillas de todos los canales.
+
+    def prepare(self, compiled, is_arith, max_numb_pnts, fft_pnts, file_ids, decimation = 1, decimation_band = 0.0, fft_workers = 1):
+        if is_arith not in ["Y","YES","N","NO"]: # se ejecuta si el tipo de media no es uno de los reconocidos.
+            raise ValueError("is_arith must be one of: Y, YES, N, NO") # error.
+        self.is_arith = is_arith # tipo de media de la proporción de similitud.
+        self.max_numb_pnts = int(max_numb_pnts) # número de puntos que se leen de cada señal.
+        self.fft_pnts = max(int(fft_pnts), self.max_numb_pnts) # número de puntos de la transformada de Fourier (el de las plantillas).
+        self.file_ids = file_ids # números de los canales que se comparan.
+        self.compiled = compiled # plantillas preparadas.
+        self.means = self.compiled.means # matriz de medias (una fila por canal).
+        self.stds = self.compiled.stds # matriz de desviaciones (una fila por canal).
+        self.lengths = self.compiled.lengths # número de frecuencias de cada plantilla.
+        self.dtype = self.means.dtype # precisión de las plantillas (float64 o float32).
+        self.no_freqs = np.shape(self.means)[1] # número de frecuencias de la plantilla más larga (solo se calculan esas).
+        self.decimation = decimation_stages(factor = decimation,
+                                            band = decimation_band) # etapas con las que se diezman las señales (None si no se diezman).
+        self.plan = SpectrumPlan(n = decimated_length(n = self.fft_pnts,
+                                                      decimation = self.decimation),
+                                 k = self.no_freqs,
+                                 dtype = self.dtype,
+                                 workers = fft_workers) # método con el que se calculan las amplitudes.
+
+    def score(self, signals, lengths = None, timings = None):
+        start = time.perf_counter() # momento en el que empieza la transformada de Fourier.
+        signals = np.atleast_2d(np.asarray(signals, dtype = self.dtype)) # matriz de señales (con la misma precisión que las plantillas).
+        no_signals = min(len(signals), len(self.file_ids)) # número de señales que se comparan con las plantillas.
+        file_arr = np.zeros([len(self.file_ids),self.no_freqs], dtype = self.dtype) # matriz vacía para las amplitudes de cada canal.
+        if lengths is not None: # se ejecuta si se ha indicado la longitud original de las señales.
+            lengths = lengths[0:no_signals] # longitudes de las señales que se comparan.
+        amplitude_spectrum(signals = signals[0:no_signals,:],
+                           n = self.fft_pnts,
+                           k = self.no_freqs,
+                           lengths = lengths,
+                           out = file_arr[0:no_signals,:],
+                           decimation = self.decimation,
+                           plan = self.plan) # se calculan las amplitudes de todos los canales y se introducen por orden en la matriz.
+        fft_end = time.perf_counter() # momento en el que termina la transformada de Fourier.
+        scores = self.score_spectra(ampls = file_arr) # se calcula la proporción de similitud de todos los canales a la vez.
+        if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+            timings["fft"] = fft_end - start # duración de la transformada de Fourier.
+            timings["score"] = time.perf_counter() - fft_end # duración del cálculo de la proporción de similitud.
+        return scores # devuelve el vector con los resultados de cada canal.
+
+    def score_spectra(self, ampls):
+        return self.compiled.scores(ampls = ampls,
+                                    is_arith = self.is_arith) # devuelve el vector con los resultados de cada canal.
+
+    def score_file(self, what_file, timings = None):
+        start = time.perf_counter() # momento en el que empieza la lectura.
+        Format = os.path.splitext(what_file)[1][1:] # formato del archivo que se va a leer.
+        signals, lengths = signal_matrix(file_format = Format,
+                                         file_name = what_file,
+                                         n = self.max_numb_pnts,
+                                         max_signals = len(self.file_ids),
+                                         dtype = self.dtype) # se leen las señales del archivo en una matriz (una fila por canal).
+        if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+            timings["read"] = time.perf_counter() - start # duración de la lectura.
+        return self.score(signals = signals,
+                          lengths = lengths,
+                          timings = timings) # devuelve el vector con los resultados de cada canal.
+
+    def score_windows(self, what_file, hop = None, timings = None):
+        window = self.max_numb_pnts # número de puntos de cada ventana.
+        if hop is None: # se ejecuta si no se ha indicado la distancia entre ventanas.
+            hop = max(window//2, 1) # las ventanas se solapan a la mitad.
+        if hop < 1 or hop > window: # se ejecuta si la distancia entre ventanas no es válida.
+            raise ValueError("hop must be between 1 and " + str(window) + " points") # error.
+        if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+            timings.update(read = 0.0, fft = 0.0, score = 0.0) # duraciones acumuladas de todas las ventanas.
+        window_timings = {} # duración de las etapas de cada ventana.
+        Format = os.path.splitext(what_file)[1][1:] # formato del archivo que se va a leer.
+        chunks = signal_chunks(file_format = Format,
+                               file_name = what_file,
+                               chunk_size = hop,
+                               max_signals = len(self.file_ids),
+                               dtype = self.dtype) # bloques de 'hop' puntos del archivo.
+        times = None # vector de tiempo de los puntos leídos que todavía se usan.
+        signals = None # matriz con los puntos leídos que todavía se usan (una fila por canal).
+        covered = 0 # número de puntos que ya han entrado en alguna ventana.
+        start = 0 # índice del primer punto de 'signals' en el archivo.
+        while True: # bucle que itera sobre cada bloque del archivo.
+            read_start = time.perf_counter() # momento en el que empieza la lectura.
+            chunk = next(chunks, None) # siguiente bloque del archivo.
+            if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+                timings["read"] += time.perf_counter() - read_start # duración de la lectura.
+            if chunk is None: # se ejecuta si ya no quedan bloques.
+                break # se termina el bucle.
+            if signals is None: # se ejecuta si es el primer bloque.
+                times, signals = chunk # vector de tiempo y señales del bloque.
+            else: # se ejecuta si ya había puntos leídos.
+                times = np.concatenate((times, chunk[0])) # se añade el vector de tiempo del bloque.
+                signals = np.concatenate((signals, chunk[1]), axis = 1) # se añaden las señales del bloque.
+            while np.shape(signals)[1] >= window: # bucle que se repite mientras haya una ventana completa.
+                scores = self.score(signals = signals[:,0:window],
+                                    timings = window_timings) # se compara la ventana con las plantillas.
+                if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+                    timings["fft"] += window_timings["fft"] # duración de la transformada de Fourier.
+                    timings["score"] += window_timings["score"] # duración del cálculo de la proporción de similitud.
+                yield float(times[0]), scores # se devuelve el resultado de la ventana.
+                covered = start + window # los puntos de la ventana ya se han comparado.
+                times = times[hop:] # se descartan los puntos anteriores a la siguiente ventana.
+                signals = signals[:,hop:] # se descartan los puntos anteriores a la siguiente ventana.
+                start = start + hop # índice del primer punto de la siguiente ventana.
+        if signals is not None and start + np.shape(signals)[1] > covered: # se ejecuta si quedan puntos sin comparar.
+            scores = self.score(signals = signals,
+                                lengths = np.full(len(signals), np.shape(signals)[1]),
+                                timings = window_timings) # se compara la última ventana (rellena con ceros).
+            if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+                timings["fft"] += window_timings["fft"] # duración de la transformada de Fourier.
+                timings["score"] += window_timings["score"] # duración del cálculo de la proporción de similitud.
+            yield float(times[0]), scores # se devuelve el resultado de la última ventana.
+
+    def score_file_windows(self, what_file, hop = None, timings = None):
+        series = [np.concatenate(([start_time], scores))
+                  for start_time, scores in self.score_windows(what_file = what_file,
+                                                               hop = hop,
+                                                               timings = timings)] # fila de cada ventana (momento de inicio y resultados).
+        return np.array(series, dtype = float) # devuelve la matriz con la serie de resultados.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - comparator(): Requiere de los módulos NumPy, spectrum_ES,
+# scoring_ES y signal_io_ES. Esta función constituye la parte más importante
+# del algoritmo, y es crucial a la hora de generar los
+# archivos TXT que contienen el resultado de la comparación
+# entre señales.
+
+# Con respecto a las operaciones que realiza, con esta función,
+# se crea una matriz vacía que tiene tantas filas como canales
+# tienen los archivos de las señales, y tantas columnas como el
+# número de puntos estandarizado que se usó para calcular el
+# dominio de frecuencia de las señales utilizadas para crear la
+# plantillas. En esta matriz, se van a incorporar los
+# valores de las amplitudes del dominio de frecuencia de
+# todas las señales de cada archivo entrante. Después, estos
+# valores se compararán con los de la plantilla. El
+# valor de amplitud de una frecuencia de la señal entrante
+# representa un punto en la distribución normal definida
+# por los valores de media aritmética y desviación estándar
+# de la frecuencia correspondiente en la plantilla. El
+# máximo de la distribución estándar se alcanza en su
+# dominio en el punto igual a la media de la distribución.
+# Sabiendo esto, se divide el valor asociado al de la amplitud
+# de la señal entrante en la distribución normal, entre
+# el máximo, y esa proproción representa la similitud
+# entre las dos señales para esa frecuencia (por tanto,
+# si el valor de amplitud de la señal entrante para
+# el de esa frecuencia, y el de la plantilla, es el
+# mismo, la proproción será igual a 1. Si es más bajo
+# o más alto, el valor de la proporción oscilará entre
+# 0 y 1, dependiendo de la proximidad que haya entre
+# ambos). Al final, para cada frecuencia habrá una
+# proporción de similitud correspondiente. El resultado
+# de cada comparación entre amplitudes, una a una, pasa a
+# formar parte de un vector. Dependiendo de la clase
+# de cómputo elegido, con todas las proporciones
+# se calculará una media aritmética, o media ponderada
+# (con la que se considera el valor total de la amplitud
+# de la señal sobre el de la suma de las amplitudes de
+# la plantillas, cuyo cociente se multiplica por el
+# valor de la proporción calculada), para finalmente
+# generar la propoción de similitud entre señales. La
+# función hace este cómputo para todas las señales o
+# canales del archivo a la vez, con operaciones matriciales
+# (ver el módulo scoring_ES). Los resultados se acumulan
+# en una variable que los ordena como strings por filas.
+# Estos resultados están destinados a que se sobreescriban
+# en un archivo TXT.
+
+# Esta función tiene cuatro argumentos principales: template,
+# max_numb_pnts, what_file e is_arith. El argumento "template" debe ser el
+# diccionario de plantillas que devuelve la función load_templates()
+# del módulo template_store_ES, que contiene una matriz con los valores
+# de media aritmética de amplitud de cada una de las frecuencias que
+# forman la señal promedio de cada canal (una fila por canal), otra
+# matriz con los valores de desviación estándar asociados a cada una
+# de las medias, el número de frecuencias de la plantilla de cada canal
+# y el número de canal de cada fila (en resumen, contiene los mismos
+# datos que las plantillas de las señales). El argumento "max_numb_pnts"
+# se refiere al número de puntos estandarizado que se usó
+# para calcular el dominio de frecuencia al hacer las plantillas.
+# Este número proviene del cómputo que se ha realizado con el
+# script que genera las plantillas. Para que las plantillas
+# encajen con las señales entrantes que se quieran comparar
+# con ellas, este número ha de ser constante. (Desde la versión 4 de
+# las plantillas, es el número de puntos que se leen de cada señal, y
+# la transformada de Fourier se calcula con el de las plantillas,
+# "fft_pnts", con el que se obtienen las mismas frecuencias.) El
+# argumento "what_file" debe ser la localización de un archivo que
+# contenga las señales que se vayan a comparar con las
+# señales promedio de las plantillas. Finalmente, el argumento
+# "is_arith" es un string que se introduce como input desde
+# el prompt desde donde se ejecuta el programa. Este argumento
+# indica si a la hora de hacer el cómputo para calcular el
+# porcentaje de similitud entre las señales, se usará, o bien
+# una media aritmética (si el argumento es igual a "Y" o "YES"),
+# o ponderada (si es "N" o "NO"), de la similitud que hay
+# para cada una de las frecuencias, una por una. Hay que recordar
+# que este algoritmo de comparación de señales pretende que,
+# de forma ideal, los resultados sean binarios: Se busca que
+# los resultados indiquen, cuando se apliquen los programas
+# en la interfaz cerebro-cerebro, si las señales son iguales
+# (lo que implicaría una proporción de similitud de 1), o
+# se las señales son distintas (lo que supone un resultado
+# de 0).
+
+# En caso de que para una frecuencia, los valores de amplitud
+# sean iguales en las señales que se están utilizando para
+# hacer una plantilla, la desviación estándar al hacer la
+# media de esos valores es igual al cero. Ese valor de desvación
+# estándar no puede ser utilizado para crear una distribución
+# normal. Por ello, se han añadido unas líneas de código por
+# medio de las cuales, si la desviación estándar es igual a
+# cero, se va a atribuir arbitrariamente un valor de desviación
+# estándar igual a 0,1 (en la función stack_templates() del módulo
+# scoring_ES). De esta manera, el programa si que puede trazar la
+# distribución normal para comparar las frecuencias de las dos señales.
+
+# Además de esos argumentos, la función recibe otro, que en
+# versiones anteriores del script se tomaba de una variable
+# global: "file_ids", el vector con los índices de los canales
+# que permite que se vayan analizando las señales de los archivos
+# en orden (el nombre de esta variable se debe a que, al hacer las
+# plantillas de las señales, cada canal tiene asociada una
+# plantilla. Por tanto, el número de plantillas será igual al
+# número de canales, y la matriz de amplitudes tiene una fila por
+# plantilla). Así, la función se puede utilizar desde otros
+# scripts o desde otros procesos.
+
+# La comparación se hace en la función file_scores() (con un objeto
+# Comparator), que devuelve el vector con la proporción de
+# similitud de cada canal, y
+# comparator() la convierte en el string que se escribe en los
+# archivos TXT de resultados (función format_scores()). Así, los
+# resultados también se pueden guardar directamente como números
+# (ver el módulo results_store_ES). Las señales entrantes se leen y
+# se comparan con la misma precisión con la que se guardaron las
+# plantillas (float64, o float32 si se generaron con el argumento
+# "--float32" del script template_gen_ES.py).
+
+def file_scores(template,max_numb_pnts,what_file,is_arith,file_ids): # requiere de los módulos NumPy, spectrum_ES, scoring_ES y signal_io_ES.
+    comp = Comparator(template = template,
+                      is_arith = is_arith,
+                      max_numb_pnts = max_numb_pnts,
+                      file_ids = file_ids) # se preparan las plantillas.
+    return comp.score_file(what_file = what_file) # devuelve el vector con los resultados de cada canal.
+
+# - format_scores(scores): Devuelve el string con los resultados de
+# cada canal del vector "scores", uno por línea, tal y como se
+# escriben en los archivos TXT de resultados. Si "scores" es la matriz
+# de una comparación por ventanas (ver Comparator.score_file_windows()),
+# se escribe una línea por ventana, con sus valores separados por
+# tabulaciones.
+
+def format_scores(scores):
+    if np.ndim(scores) == 2: # se ejecuta si los resultados son una serie de ventanas.
+        return "".join("\t".join(str(value) for value in row) + "\n"
+                       for row in scores) # devuelve el string con los resultados de cada ventana.
+    return "".join(str(score) + "\n"
+                   for score in scores) # devuelve el string con todos los resultados de las distintas señales de cada canal.
+
+def comparator(template,max_numb_pnts,what_file,is_arith,file_ids): # requiere de los módulos NumPy, spectrum_ES, scoring_ES y signal_io_ES.
+    return format_scores(file_scores(template = template,
+                                     max_numb_pnts = max_numb_pnts,
+                                     what_file = what_file,
+                                     is_arith = is_arith,
+                                     file_ids = file_ids)) # devuelve el string con los resultados de la comparación.
+
+# Para comparar varios archivos a la vez, se crean varios procesos
+# con el módulo concurrent.futures. Cada proceso abre una sola vez
+# las plantillas y crea su objeto Comparator (función init_worker()),
+# y luego compara los archivos que se le van enviando (función
+# score_file()). Como cada proceso abre las plantillas con un mapa de
+# memoria (ver el módulo template_store_ES), en lugar de recibir una
+# copia, todos comparten las mismas páginas de memoria, se creen los
+# procesos como se creen.
+
+worker_state = {} # objeto Comparator de cada proceso.
+
+# - init_worker(templ_dir, is_arith, fft_workers): Requiere del módulo
+# template_store_ES. Abre las plantillas de la carpeta "templ_dir" y
+# guarda en el proceso el objeto Comparator con el que se comparan
+# los archivos. El argumento "is_arith" es el mismo que el de
+# comparator(), y "fft_workers", el número de hilos de la
+# transformada de Fourier de cada proceso.
+
+def init_worker(templ_dir, is_arith, fft_workers = 1): # requiere del módulo template_store_ES.
+    worker_state["comparator"] = Comparator(template = load_templates(templ_dir = templ_dir),
+                                            is_arith = is_arith,
+                                            fft_workers = fft_workers) # se preparan las plantillas.
+
+# - score_file(what_file): Compara el archivo de señales "what_file"
+# con las plantillas abiertas con init_worker(), y devuelve el mismo
+# vector que file_scores() y el diccionario con la duración de cada
+# etapa de la comparación (ver Comparator.score_file()).
+
+def score_file(what_file):
+    timings = {} # diccionario vacío con la duración de cada etapa.
+    scores = worker_state["comparator"].score_file(what_file = what_file,
+                                                   timings = timings) # se comparan las señales con las plantillas.
+    return scores, timings # devuelve los resultados de la comparación y la duración de cada etapa.
+
+# - score_file_windows(what_file, hop): Igual que score_file(), pero
+# compara el archivo por ventanas (ver Comparator.score_file_windows())
+# y devuelve la matriz con la serie de resultados.
+
+def score_file_windows(what_file, hop = None):
+    timings = {} # diccionario vacío con la duración de cada etapa.
+    series = worker_state["comparator"].score_file_windows(what_file = what_file,
+                                                           hop = hop,
+                                                           timings = timings) # se comparan las ventanas con las plantillas.
+    return series, timings # devuelve la serie de resultados y la duración de cada etapa.
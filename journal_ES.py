@@ -0,0 +1,159 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene el registro (diario) de los archivos de
+# señales entrantes que se utiliza desde el script
+# auto_comparator_ES.py, para que el comparador se pueda cerrar y
+# volver a ejecutar sin perder ni repetir trabajo.
+
+# El registro es una base de datos SQLite (un solo archivo,
+# "journal.db"), con una fila por archivo de señales detectado.
+# Cada fila contiene la identidad del archivo (su nombre, su
+# tamaño y su fecha de modificación), su estado ("pending" si
+# todavía no se han escrito sus resultados, "done" si ya se han
+# escrito y "failed" si no se ha podido comparar) y el número de
+# su archivo de resultados. El número de resultado es la clave
+# de la tabla, y el nombre del archivo tiene un índice, por lo que
+# comprobar si un archivo ya está registrado no depende del número
+# de archivos analizados.
+
+# Cada archivo se registra (con su número de resultado) antes de
+# compararlo, y se marca como terminado después de escribir sus
+# resultados. Cada cambio se guarda en el disco en el momento
+# (modo WAL de SQLite), de modo que, si el programa se cierra,
+# al volver a ejecutarlo se vuelven a comparar los archivos que
+# quedaron pendientes, con el mismo número de resultado, no se
+# vuelven a comparar los que ya se terminaron, y los archivos
+# nuevos continúan la numeración.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - os: Se ha usado para obtener el tamaño y la fecha de
+# modificación de los archivos.
+# - time: Se ha usado para registrar cuándo cambia el estado
+# de cada archivo.
+# - sqlite3: Se ha usado para guardar el registro en el disco.
+# - threading: Se ha usado para que el registro se pueda usar
+# desde el hilo que escribe los resultados.
+
+import os
+import time
+import sqlite3
+import threading
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - Journal(db_name): Abre (o crea, si no existe) el registro de la
+# base de datos "db_name". Sus métodos son:
+
+# - register(file_path): registra el archivo de señales "file_path"
+# como pendiente y devuelve su número de resultado. Si el archivo ya
+# estaba registrado con la misma identidad, o si estaba pendiente,
+# devuelve el número que ya tenía.
+# - mark_done(result_number): indica que ya se han escrito los
+# resultados del archivo con ese número de resultado.
+# - mark_done_many(result_numbers): hace lo mismo que mark_done()
+# para todos los números de la lista "result_numbers", con una sola
+# escritura en el disco.
+# - mark_failed(result_number): indica que el archivo con ese número
+# de resultado no se ha podido comparar.
+# - names(): devuelve el conjunto de nombres de los archivos
+# registrados.
+# - pending(): devuelve la lista de archivos pendientes (nombre y
+# número de resultado), por orden de número de resultado.
+# - close(): cierra la base de datos.
+
+class Journal: # requiere de los módulos os, time, sqlite3 y threading.
+    def __init__(self, db_name):
+        self.lock = threading.Lock() # cerrojo para que solo un hilo use la base de datos a la vez.
+        self.db = sqlite3.connect(db_name,
+                                  check_same_thread = False) # se abre la base de datos.
+        self.db.execute("PRAGMA journal_mode = WAL") # cada cambio se añade al final de un archivo, sin reescribir la base de datos.
+        self.db.execute("PRAGMA synchronous = NORMAL") # se espera a guardar en el disco solo lo imprescindible.
+        self.db.execute("""CREATE TABLE IF NOT EXISTS files (
+                           result_number INTEGER PRIMARY KEY,
+                           name TEXT NOT NULL,
+                           size INTEGER NOT NULL,
+                           mtime_ns INTEGER NOT NULL,
+                           state TEXT NOT NULL,
+                           updated REAL NOT NULL)""") # tabla con una fila por archivo de señales.
+        self.db.execute("""CREATE INDEX IF NOT EXISTS files_name
+                           ON files (name)""") # índice para buscar los archivos por su nombre.
+        self.db.commit() # se guardan los cambios.
+
+    def register(self, file_path):
+        stat = os.stat(file_path) # tamaño y fecha de modificación del archivo.
+        name = os.path.basename(file_path) # nombre del archivo.
+        with self.lock, self.db: # se guardan los cambios al terminar.
+            row = self.db.execute("""SELECT result_number, size, mtime_ns, state
+                                     FROM files WHERE name = ?
+                                     ORDER BY result_number DESC""",
+                                  (name,)).fetchone() # se busca el último registro del archivo.
+            if row is not None and row[1:3] == (stat.st_size, stat.st_mtime_ns): # se ejecuta si el archivo ya estaba registrado.
+                return row[0] # devuelve su número de resultado.
+            if row is not None and row[3] == "pending": # se ejecuta si el archivo estaba pendiente pero ha cambiado.
+                self.db.execute("""UPDATE files SET size = ?, mtime_ns = ?, updated = ?
+                                   WHERE result_number = ?""",
+                                (stat.st_size, stat.st_mtime_ns,
+                                 time.time(), row[0])) # se actualiza su identidad.
+                return row[0] # devuelve su número de resultado.
+            cursor = self.db.execute("""INSERT INTO files
+                                        (name, size, mtime_ns, state, updated)
+                                        VALUES (?, ?, ?, 'pending', ?)""",
+                                     (name, stat.st_size, stat.st_mtime_ns,
+                                      time.time())) # se registra el archivo como pendiente.
+            return cursor.lastrowid # devuelve el número de resultado del archivo.
+
+    def set_state(self, result_number, state):
+        with self.lock, self.db: # se guardan los cambios al terminar.
+            self.db.execute("""UPDATE files SET state = ?, updated = ?
+                               WHERE result_number = ?""",
+                            (state, time.time(), result_number)) # se cambia el estado del archivo.
+
+    def mark_done(self, result_number):
+        self.set_state(result_number = result_number,
+                       state = "done") # el archivo se marca como terminado.
+
+    def mark_done_many(self, result_numbers):
+        updated = time.time() # momento del cambio de estado.
+        with self.lock, self.db: # se guardan los cambios al terminar.
+            self.db.executemany("""UPDATE files SET state = 'done', updated = ?
+                                   WHERE result_number = ?""",
+                                [(updated, result_number)
+                                 for result_number in result_numbers]) # los archivos se marcan como terminados.
+
+    def mark_failed(self, result_number):
+        self.set_state(result_number = result_number,
+                       state = "failed") # el archivo se marca como fallido.
+
+    def names(self):
+        with self.lock: # solo este hilo usa la base de datos.
+            return set(name for (name,) in
+                       self.db.execute("SELECT name FROM files")) # devuelve los nombres de los archivos registrados.
+
+    def pending(self):
+        with self.lock: # solo este hilo usa la base de datos.
+            return self.db.execute("""SELECT name, result_number FROM files
+                                      WHERE state = 'pending'
+                                      ORDER BY result_number""").fetchall() # devuelve los archivos pendientes.
+
+    def close(self):
+        with self.lock: # solo este hilo usa la base de datos.
+            self.db.close() # se cierra la base de datos.
@@ -0,0 +1,184 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene la comparación de cada archivo de señales
+# entrante con varios conjuntos de plantillas a la vez (una
+# biblioteca, ver load_library() en el módulo template_store_ES),
+# para saber a cuál se parece más (por ejemplo, a qué condición o a
+# qué sujeto). Se utiliza desde el script auto_comparator_ES.py con
+# el argumento "--library".
+
+# En lugar de comparar el archivo una vez por conjunto, las plantillas
+# de todos los conjuntos se reúnen en una sola matriz, con una fila
+# por canal de cada conjunto, y se preparan una sola vez (clase
+# CompiledTemplates del módulo scoring_ES). Así, el archivo se lee y
+# su transformada de Fourier se calcula una sola vez, y la proporción
+# de similitud con todos los conjuntos se calcula con las mismas
+# operaciones matriciales que con uno solo. El tiempo de cálculo solo
+# crece con el número de filas de la matriz.
+
+# Para que la transformada de Fourier sirva para todos los conjuntos,
+# todos tienen que haberse generado con el mismo número de puntos
+# (el de la señal más larga y el de la transformada, es decir, las
+# mismas frecuencias), diezmando las señales de la misma forma y
+# con la misma precisión, y tener las
+# plantillas de los mismos canales. Los resultados con cada conjunto
+# son idénticos a los de compararlo por separado.
+
+# Los resultados se ordenan de mayor a menor proporción de similitud,
+# para cada canal y para el archivo completo (con la media de la
+# proporción de similitud de todos los canales).
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - numpy (np): Se ha usado para hacer cálculo matricial.
+# - scoring_ES: Módulo propio que contiene el cálculo vectorizado de
+# la proporción de similitud.
+# - comparison_ES: Módulo propio que contiene la comparación de los
+# archivos de señales con las plantillas (clase Comparator).
+# - template_store_ES: Módulo propio que contiene la lectura de la
+# biblioteca de plantillas.
+
+import numpy as np
+from scoring_ES import stack_templates, CompiledTemplates
+from comparison_ES import Comparator, worker_state
+from template_store_ES import load_library
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - TemplateLibrary(library, is_arith, file_ids, fft_workers):
+# Requiere del módulo NumPy (np). Compara señales con todos los
+# conjuntos de plantillas del diccionario "library" (el que devuelve
+# load_library() del módulo template_store_ES) a la vez. Los
+# argumentos "is_arith", "file_ids" y "fft_workers" son los mismos
+# que los de la clase Comparator (si no se indica "file_ids", se
+# toman los canales del primer conjunto). Tiene
+# los mismos métodos que Comparator (es una subclase suya, y se
+# prepara con su método prepare(), con las plantillas de todos los
+# conjuntos reunidas en una sola matriz), pero
+# score() y score_file() devuelven una matriz con una fila por
+# conjunto (en el orden de "names") y una columna por canal. Sus
+# atributos "names" (nombres de los conjuntos) y "file_ids" se usan
+# para ordenar los resultados (ver ranked_matches()).
+
+# Si "is_arith" no es una de las respuestas reconocidas, o los
+# conjuntos no tienen el mismo número de puntos, el mismo diezmado o
+# la misma precisión, da un error ValueError.
+
+class TemplateLibrary(Comparator): # requiere del módulo NumPy (np).
+    def __init__(self, library, is_arith, file_ids = None, fft_workers = 1):
+        self.names = list(library) # nombres de los conjuntos de plantillas.
+        templates = [library[name] for name in self.names] # plantillas de cada conjunto.
+        max_pnts = {(int(template["max_pnts"]), int(template["fft_pnts"]))
+                    for template in templates} # número de puntos de la señal más larga y de la transformada de cada conjunto.
+        if len(max_pnts) > 1: # se ejecuta si los conjuntos no tienen las mismas frecuencias.
+            raise ValueError("all template sets must share max_pnts and fft_pnts, found " +
+                             str(sorted(max_pnts))) # error.
+        decimations = {(int(template["decimation"]), float(template["decimation_band"]))
+                       for template in templates} # diezmado de cada conjunto.
+        if len(decimations) > 1: # se ejecuta si los conjuntos no se diezmaron de la misma forma.
+            raise ValueError("all template sets must share the same decimation") # error.
+        if file_ids is None: # se ejecuta si no se han indicado los canales.
+            file_ids = templates[0]["channel_ids"] # canales del primer conjunto, en orden.
+        stacks = [stack_templates(template = template,
+                                  file_ids = file_ids)
+                  for template in templates] # medias, desviaciones y longitudes de cada conjunto.
+        dtypes = {means.dtype for means, stds, lengths in stacks} # precisión de cada conjunto.
+        if len(dtypes) > 1: # se ejecuta si los conjuntos no tienen la misma precisión.
+            raise ValueError("all template sets must share the same precision") # error.
+        no_channels = len(file_ids) # número de canales de cada conjunto.
+        width = max(np.shape(means)[1] for means, stds, lengths in stacks) # número de frecuencias de la plantilla más larga.
+        dtype = dtypes.pop() # precisión de las plantillas.
+        max_numb_pnts, fft_pnts = max_pnts.pop() # número de puntos de la señal más larga y de la transformada de Fourier.
+        factor, band = decimations.pop() # diezmado de las plantillas.
+        all_means = np.zeros([len(stacks)*no_channels,width], dtype = dtype) # matriz de medias de todos los conjuntos (rellena con ceros).
+        all_stds = np.ones([len(stacks)*no_channels,width], dtype = dtype) # matriz de desviaciones de todos los conjuntos (rellena con unos).
+        for set_idx, (means, stds, lengths) in enumerate(stacks): # bucle que copia cada conjunto en sus filas.
+            rows = slice(set_idx*no_channels, (set_idx+1)*no_channels) # filas del conjunto.
+            all_means[rows,0:np.shape(means)[1]] = means # medias del conjunto.
+            all_stds[rows,0:np.shape(stds)[1]] = stds # desviaciones del conjunto.
+        self.prepare(compiled = CompiledTemplates(means = all_means,
+                                                  stds = all_stds,
+                                                  lengths = np.concatenate([lengths for means, stds, lengths in stacks])),
+                     is_arith = is_arith,
+                     max_numb_pnts = max_numb_pnts,
+                     fft_pnts = fft_pnts,
+                     file_ids = file_ids,
+                     decimation = factor,
+                     decimation_band = band,
+                     fft_workers = fft_workers) # se preparan las plantillas de todos los conjuntos, igual que con un solo conjunto.
+        self.rows = np.tile(np.arange(no_channels), len(stacks)) # canal de la señal entrante de cada fila de las plantillas.
+
+    def score_spectra(self, ampls):
+        scores = self.compiled.scores(ampls = ampls[self.rows],
+                                      is_arith = self.is_arith) # proporción de similitud de cada canal con todos los conjuntos a la vez.
+        return np.reshape(scores, [len(self.names),len(self.file_ids)]) # devuelve la matriz de resultados (una fila por conjunto).
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - ranked_matches(names, scores, channel_ids): Requiere del módulo
+# NumPy (np). Ordena de mayor a menor los resultados de la matriz
+# "scores" (una fila por conjunto de plantillas, con los nombres de
+# "names", y una columna por canal, con los números de
+# "channel_ids"). Devuelve una lista con el número de canal, la
+# posición (empezando por 1), el nombre del conjunto y el resultado
+# de cada conjunto en cada canal, y después los del archivo completo
+# (con el canal 0), ordenados por la media de los resultados de
+# todos los canales.
+
+def ranked_matches(names, scores, channel_ids): # requiere del módulo NumPy (np).
+    scores = np.asarray(scores) # matriz de resultados.
+    overall = np.mean(scores, axis = 1) # resultado de cada conjunto en el archivo completo.
+    columns = [(int(channel), scores[:,col])
+               for col, channel in enumerate(channel_ids)] + [(0, overall)] # resultados de cada canal y del archivo completo.
+    return [(channel, rank, names[set_idx], float(column[set_idx]))
+            for channel, column in columns
+            for rank, set_idx in enumerate(np.argsort(-column, kind = "stable"), 1)] # devuelve la lista ordenada.
+
+# - format_matches(matches): Devuelve el string que se escribe en los
+# archivos TXT de resultados de una comparación con la biblioteca: una
+# línea por canal (y una última línea, "overall", para el archivo
+# completo), con el número de canal y los nombres de los conjuntos y
+# sus resultados, de mayor a menor, separados por tabulaciones. El
+# argumento "matches" es la lista que devuelve ranked_matches().
+
+def format_matches(matches):
+    lines = {} # diccionario vacío con los valores de la línea de cada canal.
+    for channel, rank, name, score in matches: # bucle que itera sobre cada resultado, en orden.
+        lines.setdefault(channel, []).extend([name, str(score)]) # se añade el conjunto y su resultado a la línea del canal.
+    return "".join("\t".join([str(channel) if channel != 0 else "overall"] + values) + "\n"
+                   for channel, values in lines.items()) # devuelve el string con una línea por canal.
+
+# - init_library_worker(library_dir, is_arith, fft_workers): Requiere
+# del módulo template_store_ES. Igual que init_worker() en el módulo
+# comparison_ES, pero con todos los conjuntos de plantillas de la
+# biblioteca "library_dir". Los archivos se comparan después con la
+# función score_file() del módulo comparison_ES.
+
+def init_library_worker(library_dir, is_arith, fft_workers = 1): # requiere del módulo template_store_ES.
+    worker_state["comparator"] = TemplateLibrary(library = load_library(library_dir = library_dir),
+                                                 is_arith = is_arith,
+                                                 fft_workers = fft_workers) # se preparan las plantillas.
@@ -0,0 +1,278 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene las métricas de rendimiento del comparador
+# (script auto_comparator_ES.py), para saber en qué se gasta el
+# tiempo y cuánto tardan en estar disponibles los resultados:
+
+# - La duración de cada etapa de la comparación de cada archivo:
+# lectura de las señales ("read", con np.loadtxt() en los archivos
+# TXT o con neo en los SMR y PLX), transformada de Fourier ("fft"),
+# cálculo de la proporción de similitud ("score") y escritura de
+# los resultados ("write"). Se guardan por etapa y por formato del
+# archivo.
+# - La latencia de cada archivo: el tiempo que pasa desde que el
+# archivo llega a la carpeta de señales entrantes hasta que sus
+# resultados están guardados (en el archivo TXT o en la base de
+# datos).
+# - El número de archivos comparados y fallidos, el número de
+# archivos comparados por segundo y el número de archivos que
+# esperan a ser comparados (profundidad de la cola).
+
+# Las duraciones y las latencias se acumulan en histogramas con
+# intervalos fijos (como los de Prometheus), por lo que la memoria
+# que ocupan no depende del número de archivos. Cada cierto tiempo,
+# desde otro hilo, las métricas se escriben en un archivo: en
+# formato JSON si su nombre termina en ".json", o en el formato de
+# texto de Prometheus si no (por ejemplo, "metrics.prom", que se
+# puede leer con el "textfile collector" de node_exporter). El
+# archivo se escribe primero con otro nombre y luego se renombra,
+# para que quien lo lea nunca encuentre un archivo a medio escribir.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - os: Se ha usado para renombrar el archivo de las métricas.
+# - time: Se ha usado para medir las latencias y el número de
+# archivos comparados por segundo.
+# - json: Se ha usado para escribir las métricas en formato JSON.
+# - bisect: Se ha usado para buscar el intervalo de cada medición
+# en los histogramas.
+# - threading: Se ha usado para escribir las métricas
+# periódicamente desde otro hilo.
+
+import os
+import time
+import json
+import bisect
+import threading
+
+###################################################
+###################################################
+###                                             ###
+###              CONSTANTES USADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+STAGE_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0] # límites de los intervalos de las duraciones de las etapas (s).
+LATENCY_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0, 30.0, 60.0, 300.0] # límites de los intervalos de las latencias (s).
+PREFIX = "comparator" # prefijo de los nombres de las métricas en formato Prometheus.
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - Histogram(buckets): Requiere del módulo bisect. Acumula mediciones
+# en los intervalos cuyos límites superiores son los de la lista
+# "buckets" (más un último intervalo sin límite). Sus métodos son:
+
+# - observe(value): incorpora una medición.
+# - to_dict(): devuelve un diccionario con el número de mediciones,
+# su suma, su media, su máximo y el número acumulado de mediciones
+# por debajo de cada límite (como en Prometheus).
+
+class Histogram: # requiere del módulo bisect.
+    def __init__(self, buckets):
+        self.buckets = list(buckets) # límites superiores de los intervalos.
+        self.counts = [0]*(len(self.buckets) + 1) # número de mediciones de cada intervalo.
+        self.count = 0 # número de mediciones.
+        self.sum = 0.0 # suma de las mediciones.
+        self.max = 0.0 # mayor medición.
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1 # se cuenta la medición en su intervalo.
+        self.count = self.count + 1 # aumenta en uno el número de mediciones.
+        self.sum = self.sum + value # se suma la medición.
+        self.max = max(self.max, value) # se actualiza el máximo.
+
+    def to_dict(self):
+        cumulative = {} # diccionario vacío con el número acumulado de mediciones de cada límite.
+        total = 0 # número acumulado de mediciones.
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts): # bucle que itera sobre cada intervalo.
+            total = total + count # se acumulan las mediciones del intervalo.
+            cumulative[str(bound)] = total # mediciones por debajo del límite.
+        return {"count": self.count,
+                "sum_s": self.sum,
+                "mean_s": self.sum/self.count if self.count > 0 else 0.0,
+                "max_s": self.max,
+                "buckets": cumulative} # devuelve el resumen del histograma.
+
+# - Metrics(file_name, interval): Requiere de los módulos os, time,
+# json y threading. Acumula las métricas del comparador y las escribe
+# cada "interval" segundos en el archivo "file_name" (ver la
+# introducción de este módulo). Sus métodos son:
+
+# - observe_stages(timings, file_format): incorpora las duraciones
+# del diccionario "timings" (una etiqueta por etapa, en segundos)
+# de la comparación de un archivo con el formato "file_format".
+# - track(result_number, arrived): registra el momento de llegada
+# "arrived" (en segundos desde 1970, como time.time()) del archivo
+# con ese número de resultado.
+# - complete(result_numbers): indica que ya están guardados los
+# resultados de los archivos de la lista "result_numbers", y
+# registra su latencia y que se han comparado.
+# - count_failure(): registra un archivo que no se ha podido comparar.
+# - set_queue_depth(depth): registra el número de archivos que
+# esperan a ser comparados.
+# - snapshot(): devuelve un diccionario con todas las métricas.
+# - export(): escribe las métricas en el archivo.
+# - close(): deja de escribir las métricas periódicamente y las
+# escribe por última vez.
+
+class Metrics: # requiere de los módulos os, time, json y threading.
+    def __init__(self, file_name, interval = 5.0):
+        self.file_name = file_name # localización del archivo de las métricas.
+        self.is_json = file_name.lower().endswith(".json") # indica si las métricas se escriben en formato JSON.
+        self.interval = interval # tiempo entre dos escrituras del archivo (s).
+        self.lock = threading.Lock() # cerrojo para que solo un hilo use las métricas a la vez.
+        self.stages = {} # histogramas de la duración de cada etapa y formato.
+        self.latency = Histogram(buckets = LATENCY_BUCKETS) # histograma de las latencias.
+        self.arrivals = {} # momento de llegada de los archivos cuyos resultados no se han guardado.
+        self.scored = 0 # número de archivos comparados.
+        self.failed = 0 # número de archivos fallidos.
+        self.queue_depth = 0 # número de archivos que esperan a ser comparados.
+        self.started = time.time() # momento en el que se empezaron a acumular las métricas.
+        self.last_time = self.started # momento de la última escritura.
+        self.last_scored = 0 # número de archivos comparados en la última escritura.
+        self.throughput = 0.0 # archivos comparados por segundo desde la escritura anterior.
+        self.stop = threading.Event() # evento que detiene el hilo que escribe las métricas.
+        self.thread = threading.Thread(target = self.export_periodically,
+                                       daemon = True) # hilo que escribe las métricas periódicamente.
+        self.thread.start() # se inicia el hilo.
+
+    def observe_stages(self, timings, file_format):
+        with self.lock: # solo este hilo usa las métricas.
+            for stage, seconds in timings.items(): # bucle que itera sobre cada etapa.
+                key = (stage, file_format.lower()) # etapa y formato.
+                if key not in self.stages: # se ejecuta si es la primera medición de la etapa con ese formato.
+                    self.stages[key] = Histogram(buckets = STAGE_BUCKETS) # se crea su histograma.
+                self.stages[key].observe(value = seconds) # se incorpora la duración.
+
+    def track(self, result_number, arrived):
+        with self.lock: # solo este hilo usa las métricas.
+            self.arrivals[result_number] = arrived # se registra el momento de llegada.
+
+    def complete(self, result_numbers):
+        now = time.time() # momento en el que están guardados los resultados.
+        with self.lock: # solo este hilo usa las métricas.
+            for result_number in result_numbers: # bucle que itera sobre cada archivo.
+                arrived = self.arrivals.pop(result_number, None) # momento de llegada del archivo.
+                if arrived is not None: # se ejecuta si se registró su llegada.
+                    self.latency.observe(value = max(now - arrived, 0.0)) # se incorpora su latencia.
+                self.scored = self.scored + 1 # aumenta en uno el número de archivos comparados.
+
+    def count_failure(self):
+        with self.lock: # solo este hilo usa las métricas.
+            self.failed = self.failed + 1 # aumenta en uno el número de archivos fallidos.
+
+    def set_queue_depth(self, depth):
+        self.queue_depth = depth # número de archivos que esperan a ser comparados.
+
+    def snapshot(self):
+        now = time.time() # momento actual.
+        with self.lock: # solo este hilo usa las métricas.
+            if now > self.last_time: # se ejecuta si ha pasado tiempo desde la última escritura.
+                self.throughput = (self.scored - self.last_scored)/(now - self.last_time) # archivos comparados por segundo.
+            self.last_time = now # se actualiza el momento de la última escritura.
+            self.last_scored = self.scored # se actualiza el número de archivos de la última escritura.
+            stages = {} # diccionario vacío con los histogramas de cada etapa.
+            for (stage, file_format), histogram in sorted(self.stages.items()): # bucle que itera sobre cada etapa y formato.
+                stages.setdefault(stage, {})[file_format] = histogram.to_dict() # resumen del histograma.
+            return {"updated": now,
+                    "uptime_s": now - self.started,
+                    "files_scored_total": self.scored,
+                    "files_failed_total": self.failed,
+                    "throughput_files_per_s": self.throughput,
+                    "throughput_files_per_s_avg": self.scored/max(now - self.started, 1e-9),
+                    "queue_depth": self.queue_depth,
+                    "stages": stages,
+                    "latency": self.latency.to_dict()} # devuelve las métricas.
+
+    def export(self):
+        data = self.snapshot() # métricas actuales.
+        if self.is_json: # se ejecuta si se escriben en formato JSON.
+            text = json.dumps(data, indent = 2) # texto en formato JSON.
+        else: # se ejecuta si se escriben en formato Prometheus.
+            text = prometheus_text(data = data) # texto en formato Prometheus.
+        temp_name = self.file_name + ".tmp" # nombre provisional del archivo.
+        with open(temp_name, "w") as File: # se crea el archivo provisional.
+            File.write(text) # se escriben las métricas.
+        os.replace(temp_name, self.file_name) # se renombra el archivo (sustituyendo al anterior).
+
+    def export_periodically(self):
+        while not self.stop.wait(self.interval): # bucle que se repite hasta que se cierren las métricas.
+            self.export() # se escriben las métricas.
+
+    def close(self):
+        self.stop.set() # se detiene el hilo que escribe las métricas.
+        self.thread.join() # se espera a que termine.
+        self.export() # se escriben las métricas por última vez.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - histogram_lines(name, labels, histogram): Devuelve las líneas en
+# formato Prometheus del histograma "histogram" (el diccionario que
+# devuelve Histogram.to_dict()), con el nombre "name" y las etiquetas
+# del string "labels" (por ejemplo, 'stage="read",format="txt"').
+
+def histogram_lines(name, labels, histogram):
+    separator = "," if labels != "" else "" # separador entre las etiquetas y el límite.
+    lines = [name + "_bucket{" + labels + separator + 'le="' + bound + '"} ' + str(count)
+             for bound, count in histogram["buckets"].items()] # número acumulado de mediciones de cada límite.
+    suffix = "{" + labels + "}" if labels != "" else "" # etiquetas de la suma y del número de mediciones.
+    lines.append(name + "_sum" + suffix + " " + repr(histogram["sum_s"])) # suma de las mediciones.
+    lines.append(name + "_count" + suffix + " " + str(histogram["count"])) # número de mediciones.
+    return lines # devuelve las líneas.
+
+# - prometheus_text(data): Devuelve el texto en formato Prometheus de
+# las métricas "data" (el diccionario que devuelve Metrics.snapshot()).
+
+def prometheus_text(data):
+    lines = [] # lista vacía con las líneas del texto.
+    for name, kind, help_text, value in [
+            ("files_scored_total", "counter", "Inbound files whose results were saved.", data["files_scored_total"]),
+            ("files_failed_total", "counter", "Inbound files that could not be compared.", data["files_failed_total"]),
+            ("throughput_files_per_second", "gauge", "Files saved per second since the previous export.", data["throughput_files_per_s"]),
+            ("queue_depth", "gauge", "Inbound files waiting to be compared.", data["queue_depth"]),
+            ("uptime_seconds", "gauge", "Seconds since the comparator started.", data["uptime_s"])]: # bucle que itera sobre cada métrica simple.
+        lines.append("# HELP " + PREFIX + "_" + name + " " + help_text) # descripción de la métrica.
+        lines.append("# TYPE " + PREFIX + "_" + name + " " + kind) # tipo de la métrica.
+        lines.append(PREFIX + "_" + name + " " + repr(value)) # valor de la métrica.
+    name = PREFIX + "_stage_seconds" # nombre del histograma de las etapas.
+    lines.append("# HELP " + name + " Duration of each comparison stage.") # descripción del histograma.
+    lines.append("# TYPE " + name + " histogram") # tipo del histograma.
+    for stage, formats in data["stages"].items(): # bucle que itera sobre cada etapa.
+        for file_format, histogram in formats.items(): # bucle que itera sobre cada formato.
+            lines.extend(histogram_lines(name = name,
+                                         labels = 'stage="' + stage + '",format="' + file_format + '"',
+                                         histogram = histogram)) # líneas del histograma.
+    name = PREFIX + "_result_latency_seconds" # nombre del histograma de las latencias.
+    lines.append("# HELP " + name + " Time from file arrival to saved results.") # descripción del histograma.
+    lines.append("# TYPE " + name + " histogram") # tipo del histograma.
+    lines.extend(histogram_lines(name = name,
+                                 labels = "",
+                                 histogram = data["latency"])) # líneas del histograma.
+    return "\n".join(lines) + "\n" # devuelve el texto.
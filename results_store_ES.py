@@ -0,0 +1,238 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene el almacén de resultados que se utiliza
+# desde el script auto_comparator_ES.py. En lugar de escribir un
+# archivo TXT por cada archivo de señales entrante (lo que, tras
+# un día de funcionamiento, deja cientos de miles de archivos
+# pequeños en la carpeta de resultados), los resultados se
+# guardan en una sola base de datos SQLite ("results/results.db").
+
+# La base de datos tiene una tabla ("results") con una fila por
+# canal de cada archivo comparado, que contiene el número de
+# resultado, el nombre del archivo de señales, el número de canal,
+# la proporción de similitud, el tipo de media con la que se ha
+# calculado ("arithmetic" o "weighted"), el momento en el que llegó
+# el archivo y el momento en el que se calculó el resultado. La
+# tabla tiene índices por nombre de archivo y por momento del
+# cálculo, para consultar los resultados rápidamente.
+
+# Los archivos que se comparan por ventanas (argumento "--windows" del
+# script auto_comparator_ES.py) se guardan en otra tabla ("windows"),
+# con una fila por canal de cada ventana, que contiene además el
+# número de la ventana dentro del archivo y el momento de su primer
+# punto (en segundos). Los archivos que se comparan con una
+# biblioteca de plantillas (argumento "--library") se guardan en la
+# tabla "matches", con una fila por conjunto de plantillas en cada
+# canal (y en el archivo completo, con el canal 0), que contiene
+# además el nombre del conjunto y su posición al ordenar los
+# resultados de mayor a menor.
+
+# Los resultados no se escriben en el disco uno a uno, sino que se
+# acumulan en memoria y se escriben por lotes, con una sola
+# operación de escritura (commit) por lote: cuando se han acumulado
+# los resultados de "batch_size" archivos, o cuando han pasado
+# "max_delay" segundos desde que se acumuló el primero de ellos. Una
+# vez escrito cada lote, se avisa (con la función "on_flush") de
+# qué números de resultado ya están guardados, para marcarlos como
+# terminados en el registro de archivos (ver el módulo journal_ES).
+# Si el programa se cierra antes de escribir un lote, esos archivos
+# siguen pendientes en el registro y se vuelven a comparar al
+# ejecutarlo de nuevo, sustituyendo las filas que ya existieran.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - time: Se ha usado para registrar cuándo se calcula cada
+# resultado y cuánto tiempo llevan acumulados en memoria.
+# - sqlite3: Se ha usado para guardar los resultados en el disco.
+# - threading: Se ha usado para escribir los lotes periódicamente
+# desde otro hilo, aunque no lleguen archivos nuevos.
+
+import time
+import sqlite3
+import threading
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - ResultStore(db_name, channel_ids, metric, on_flush, batch_size,
+# max_delay): Abre (o crea, si no existe) el almacén de resultados de
+# la base de datos "db_name". El argumento "channel_ids" es el vector
+# con los números de canal de los resultados de cada archivo, y
+# "metric" el tipo de media con el que se calculan. El argumento
+# opcional "on_flush" es una función que se llama con la lista de
+# números de resultado de cada lote escrito, y "batch_size" y
+# "max_delay" indican cuándo se escribe cada lote (ver la
+# introducción de este módulo). Sus métodos son:
+
+# - add(result_number, source, scores, arrived): acumula los
+# resultados "scores" (uno por canal) del archivo de señales
+# "source". El argumento "arrived" es el momento de llegada del
+# archivo (en segundos desde 1970, como time.time()).
+# - add_windows(result_number, source, series, arrived): igual que
+# add(), para la serie de resultados de una comparación por ventanas
+# (la matriz que devuelve Comparator.score_file_windows() en el módulo
+# comparison_ES: una fila por ventana, con el momento de su primer
+# punto y un resultado por canal).
+# - add_matches(result_number, source, matches, arrived): igual que
+# add(), para los resultados de una comparación con una biblioteca de
+# plantillas (la lista que devuelve ranked_matches() en el módulo
+# library_ES).
+# - flush(): escribe en el disco los resultados acumulados.
+# - close(): escribe los resultados acumulados y cierra la base de
+# datos.
+
+class ResultStore: # requiere de los módulos time, sqlite3 y threading.
+    def __init__(self, db_name, channel_ids, metric, on_flush = None,
+                 batch_size = 64, max_delay = 1.0):
+        self.channel_ids = [int(channel) for channel in channel_ids] # números de canal de los resultados.
+        self.metric = metric # tipo de media de los resultados.
+        self.on_flush = on_flush # función a la que se avisa de cada lote escrito.
+        self.batch_size = batch_size # número de archivos de cada lote.
+        self.max_delay = max_delay # tiempo máximo que los resultados esperan en memoria (s).
+        self.rows = [] # filas acumuladas en memoria.
+        self.window_rows = [] # filas de las ventanas acumuladas en memoria.
+        self.match_rows = [] # filas de las comparaciones con la biblioteca acumuladas en memoria.
+        self.result_numbers = [] # números de resultado de los archivos acumulados.
+        self.first_time = None # momento en el que se acumuló el primer archivo del lote.
+        self.lock = threading.Lock() # cerrojo para que solo un hilo use el almacén a la vez.
+        self.db = sqlite3.connect(db_name,
+                                  check_same_thread = False) # se abre la base de datos.
+        self.db.execute("PRAGMA journal_mode = WAL") # cada lote se añade al final de un archivo, sin reescribir la base de datos.
+        self.db.execute("PRAGMA synchronous = NORMAL") # se espera a guardar en el disco solo lo imprescindible.
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+                           result_number INTEGER NOT NULL,
+                           source TEXT NOT NULL,
+                           channel INTEGER NOT NULL,
+                           score REAL NOT NULL,
+                           metric TEXT NOT NULL,
+                           arrived REAL NOT NULL,
+                           scored REAL NOT NULL,
+                           PRIMARY KEY (result_number, channel))""") # tabla con una fila por canal de cada archivo.
+        self.db.execute("""CREATE INDEX IF NOT EXISTS results_source
+                           ON results (source)""") # índice para buscar los resultados por archivo.
+        self.db.execute("""CREATE INDEX IF NOT EXISTS results_scored
+                           ON results (scored)""") # índice para buscar los resultados por momento del cálculo.
+        self.db.execute("""CREATE TABLE IF NOT EXISTS windows (
+                           result_number INTEGER NOT NULL,
+                           source TEXT NOT NULL,
+                           window INTEGER NOT NULL,
+                           start REAL NOT NULL,
+                           channel INTEGER NOT NULL,
+                           score REAL NOT NULL,
+                           metric TEXT NOT NULL,
+                           arrived REAL NOT NULL,
+                           scored REAL NOT NULL,
+                           PRIMARY KEY (result_number, window, channel))""") # tabla con una fila por canal de cada ventana.
+        self.db.execute("""CREATE INDEX IF NOT EXISTS windows_source
+                           ON windows (source)""") # índice para buscar las ventanas por archivo.
+        self.db.execute("""CREATE TABLE IF NOT EXISTS matches (
+                           result_number INTEGER NOT NULL,
+                           source TEXT NOT NULL,
+                           channel INTEGER NOT NULL,
+                           rank INTEGER NOT NULL,
+                           template TEXT NOT NULL,
+                           score REAL NOT NULL,
+                           metric TEXT NOT NULL,
+                           arrived REAL NOT NULL,
+                           scored REAL NOT NULL,
+                           PRIMARY KEY (result_number, channel, rank))""") # tabla con una fila por conjunto de plantillas en cada canal.
+        self.db.execute("""CREATE INDEX IF NOT EXISTS matches_source
+                           ON matches (source)""") # índice para buscar las comparaciones por archivo.
+        self.db.commit() # se guardan los cambios.
+        self.stop = threading.Event() # evento que detiene el hilo que escribe los lotes.
+        self.thread = threading.Thread(target = self.flush_periodically,
+                                       daemon = True) # hilo que escribe los lotes periódicamente.
+        self.thread.start() # se inicia el hilo.
+
+    def add(self, result_number, source, scores, arrived):
+        scored = time.time() # momento en el que se ha calculado el resultado.
+        with self.lock: # solo este hilo usa el almacén.
+            self.rows.extend((result_number, source, channel,
+                              float(score), self.metric, arrived, scored)
+                             for channel, score in zip(self.channel_ids, scores)) # se acumula una fila por canal.
+            self.result_numbers.append(result_number) # se acumula el número de resultado.
+            if self.first_time is None: # se ejecuta si es el primer archivo del lote.
+                self.first_time = scored # momento en el que empieza el lote.
+            is_full = len(self.result_numbers) >= self.batch_size # indica si el lote está completo.
+        if is_full: # se ejecuta si el lote está completo.
+            self.flush() # se escribe el lote.
+
+    def add_windows(self, result_number, source, series, arrived):
+        scored = time.time() # momento en el que se ha calculado el resultado.
+        with self.lock: # solo este hilo usa el almacén.
+            self.window_rows.extend((result_number, source, window, float(row[0]),
+                                     channel, float(score), self.metric, arrived, scored)
+                                    for window, row in enumerate(series, 1)
+                                    for channel, score in zip(self.channel_ids, row[1:])) # se acumula una fila por canal de cada ventana.
+            self.result_numbers.append(result_number) # se acumula el número de resultado.
+            if self.first_time is None: # se ejecuta si es el primer archivo del lote.
+                self.first_time = scored # momento en el que empieza el lote.
+            is_full = len(self.result_numbers) >= self.batch_size # indica si el lote está completo.
+        if is_full: # se ejecuta si el lote está completo.
+            self.flush() # se escribe el lote.
+
+    def add_matches(self, result_number, source, matches, arrived):
+        scored = time.time() # momento en el que se ha calculado el resultado.
+        with self.lock: # solo este hilo usa el almacén.
+            self.match_rows.extend((result_number, source, channel, rank,
+                                    name, score, self.metric, arrived, scored)
+                                   for channel, rank, name, score in matches) # se acumula una fila por conjunto en cada canal.
+            self.result_numbers.append(result_number) # se acumula el número de resultado.
+            if self.first_time is None: # se ejecuta si es el primer archivo del lote.
+                self.first_time = scored # momento en el que empieza el lote.
+            is_full = len(self.result_numbers) >= self.batch_size # indica si el lote está completo.
+        if is_full: # se ejecuta si el lote está completo.
+            self.flush() # se escribe el lote.
+
+    def flush(self):
+        with self.lock: # solo este hilo usa el almacén.
+            if len(self.result_numbers) == 0: # se ejecuta si no hay nada acumulado.
+                return # no hay nada que escribir.
+            with self.db: # se guardan los cambios al terminar (una sola escritura por lote).
+                self.db.executemany("""INSERT OR REPLACE INTO results
+                                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                    self.rows) # se escriben todas las filas del lote.
+                self.db.executemany("""INSERT OR REPLACE INTO windows
+                                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                                    self.window_rows) # se escriben todas las filas de las ventanas del lote.
+                self.db.executemany("""INSERT OR REPLACE INTO matches
+                                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                                    self.match_rows) # se escriben todas las filas de las comparaciones con la biblioteca del lote.
+            result_numbers = self.result_numbers # números de resultado del lote escrito.
+            self.rows = [] # se vacían las filas acumuladas.
+            self.window_rows = [] # se vacían las filas de las ventanas acumuladas.
+            self.match_rows = [] # se vacían las filas de las comparaciones con la biblioteca acumuladas.
+            self.result_numbers = [] # se vacían los números de resultado acumulados.
+            self.first_time = None # no hay ningún lote empezado.
+        if self.on_flush is not None: # se ejecuta si hay que avisar de los lotes escritos.
+            self.on_flush(result_numbers) # se avisa de los números de resultado escritos.
+
+    def flush_periodically(self):
+        while not self.stop.wait(self.max_delay/4): # bucle que se repite hasta que se cierre el almacén.
+            first_time = self.first_time # momento en el que empezó el lote actual.
+            if first_time is not None and time.time() - first_time >= self.max_delay: # se ejecuta si el lote lleva demasiado tiempo en memoria.
+                self.flush() # se escribe el lote.
+
+    def close(self):
+        self.stop.set() # se detiene el hilo que escribe los lotes.
+        self.thread.join() # se espera a que termine.
+        self.flush() # se escriben los resultados acumulados.
+        with self.lock: # solo este hilo usa el almacén.
+            self.db.close() # se cierra la base de datos.
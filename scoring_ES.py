@@ -0,0 +1,180 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene el cálculo de la similitud entre
+# el dominio de frecuencia de las señales entrantes y el
+# de las señales promedio representadas en las plantillas.
+# Se utiliza desde el script auto_comparator_ES.py.
+
+# Para cada frecuencia, la similitud es el cociente entre
+# el valor de la distribución normal de la plantilla en
+# la amplitud de la señal entrante y el máximo de esa
+# distribución (que se alcanza en la media). Ese cociente
+# no necesita construir la distribución normal, ya que
+# los factores de normalización se cancelan:
+
+# pdf(x)/pdf(media) = exp(-0,5*((x-media)/desviación)^2)
+
+# De esta forma, en lugar de recorrer las frecuencias una
+# por una creando dos distribuciones con scipy.stats para
+# cada una, se calculan todas las proporciones de todos
+# los canales a la vez con operaciones matriciales de NumPy.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - numpy (np): Se ha usado para hacer cálculo matricial.
+
+import numpy as np
+
+_norm_pdf_C = np.sqrt(2*np.pi) # constante de normalización de la distribución normal (la misma que usa scipy.stats).
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - CompiledTemplates(means, stds, lengths): Requiere del módulo NumPy
+# (np). Prepara una sola vez las plantillas que devuelve
+# stack_templates() para compararlas con muchas señales. Guarda las
+# matrices de medias y desviaciones estándar contiguas en memoria, el
+# valor máximo de la distribución normal de cada frecuencia
+# (pdf(media), el divisor de la proporción de similitud), y los
+# canales agrupados por longitud de plantilla. De cada grupo se guardan
+# sus filas (sin el relleno), la suma de las amplitudes de cada
+# plantilla (el divisor de la media ponderada) y el número de
+# frecuencias. Así, al comparar cada archivo solo se hacen las
+# operaciones que dependen de la señal entrante. Su método es:
+
+# - scores(ampls, is_arith): devuelve lo mismo que gauss_scores() para
+# la matriz de amplitudes "ampls".
+
+# Las operaciones se hacen en el mismo orden que antes (se divide
+# entre la constante de la distribución normal y la desviación
+# estándar, en lugar de multiplicar por sus inversos), por lo que los
+# resultados son idénticos hasta el último decimal.
+
+class CompiledTemplates: # requiere del módulo NumPy (np).
+    def __init__(self, means, stds, lengths):
+        self.means = np.ascontiguousarray(means) # matriz de medias (contigua en memoria).
+        self.stds = np.ascontiguousarray(stds) # matriz de desviaciones (contigua en memoria).
+        self.lengths = np.asarray(lengths) # número de frecuencias de cada plantilla.
+        self.dtype = self.means.dtype # precisión de las plantillas (float64 o float32).
+        self.norm_pdf_C = self.dtype.type(_norm_pdf_C) # constante con la misma precisión que las plantillas.
+        self.peaks = (1.0/self.norm_pdf_C)/self.stds # máximo de la distribución normal de cada frecuencia (pdf(media)).
+        self.groups = [] # lista vacía para los grupos de canales con plantillas de igual longitud.
+        unique_lengths = np.unique(self.lengths) # longitudes distintas de las plantillas.
+        for length in unique_lengths: # bucle que itera sobre cada grupo de canales.
+            length = int(length) # número de frecuencias del grupo.
+            if len(unique_lengths) == 1: # se ejecuta si todas las plantillas tienen la misma longitud.
+                rows = slice(None) # todas las filas (sin copiar las matrices).
+            else: # se ejecuta si hay plantillas de distintas longitudes.
+                rows = np.flatnonzero(self.lengths == length) # canales del grupo.
+            group_means = np.ascontiguousarray(self.means[rows,0:length]) # medias del grupo sin el relleno.
+            self.groups.append((rows,
+                                length,
+                                group_means,
+                                np.ascontiguousarray(self.stds[rows,0:length]),
+                                np.ascontiguousarray(self.peaks[rows,0:length]),
+                                np.sum(group_means, axis = 1)[:,None])) # filas, longitud, medias, desviaciones, máximos y suma de las amplitudes de cada plantilla.
+
+    def scores(self, ampls, is_arith): # requiere del módulo NumPy (np).
+        scores = np.zeros(len(self.lengths), dtype = self.dtype) # vector vacío para los resultados de cada canal.
+        for rows, length, means, stds, peaks, templ_mean_sum in self.groups: # bucle que itera sobre cada grupo de canales.
+            inputs = ampls[rows,0:length] # amplitudes de la señal entrante para las frecuencias del grupo.
+            z = (inputs - means)/stds # distancia a la media en número de desviaciones estándar.
+            gauss = ((np.exp(-z**2/2.0)/self.norm_pdf_C)/stds)/peaks # proporción de similitud de cada frecuencia (pdf(x)/pdf(media)).
+            if is_arith in ["Y","YES"]: # se ejecuta si se quiere calcular la media aritmética de las proporciones de similitud.
+                scores[rows] = np.mean(gauss, axis = 1) # media aritmética de cada canal.
+            elif is_arith in ["N","NO"]: # se ejecuta si se calcula la media ponderada de las proporciones.
+                scores[rows] = np.sum(gauss*(inputs/templ_mean_sum),
+                                      axis = 1) # media ponderada de cada canal.
+        return scores # devuelve el vector de resultados.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - stack_templates(template, file_ids): Requiere del módulo NumPy (np).
+# Devuelve las plantillas de los canales de "file_ids" en dos matrices
+# (medias y desviaciones estándar) con una fila por canal, en el orden
+# de "file_ids". Como las plantillas de cada canal pueden tener un
+# número distinto de frecuencias (cuando se han generado con la suma
+# acumulada), las filas están rellenas hasta la longitud de la
+# plantilla más larga y se devuelve también un vector con la longitud
+# real de cada plantilla. El argumento "template" es el diccionario
+# de plantillas que devuelve load_templates() (módulo template_store_ES)
+# y "file_ids" el vector con los números de los canales. Las
+# desviaciones estándar iguales a cero se sustituyen por 0,1, igual
+# que se hacía frecuencia por frecuencia en el comparador.
+
+def stack_templates(template, file_ids): # requiere del módulo NumPy (np).
+    channel_ids = list(template["channel_ids"]) # números de canal de cada fila de las plantillas.
+    rows = [channel_ids.index(int(file_idx))
+            for file_idx in file_ids] # fila de la plantilla de cada canal, en orden.
+    lengths = np.asarray(template["lengths"])[rows] # número de frecuencias de cada plantilla.
+    width = int(np.max(lengths)) # número de frecuencias de la plantilla más larga.
+    means = np.asarray(template["means"])[rows,0:width] # matriz de medias (copia de las filas).
+    stds = np.asarray(template["stds"])[rows,0:width] # matriz de desviaciones (copia de las filas).
+    stds[stds == 0] = 1e-1 # la desviación estándar igual a cero pasa a ser 0,1.
+    return means, stds, lengths # devuelve las matrices y las longitudes.
+
+# - gauss_scores(ampls, means, stds, lengths, is_arith): Requiere del
+# módulo NumPy (np). Calcula la proporción de similitud de cada canal.
+# El argumento "ampls" es una matriz con las amplitudes del dominio
+# de frecuencia de la señal entrante, con una fila por canal en el
+# mismo orden que las plantillas, y al menos tantas columnas como
+# frecuencias tenga la plantilla más larga. Los argumentos "means",
+# "stds" y "lengths" son los que devuelve stack_templates(). El
+# argumento "is_arith" tiene el mismo significado que en comparator():
+# si es "Y" o "YES" se calcula la media aritmética de las proporciones,
+# y si es "N" o "NO", la media ponderada por la amplitud de la señal
+# entrante sobre la suma de las amplitudes de la plantilla. Devuelve
+# un vector con un resultado por canal.
+
+# El cociente se calcula con las mismas operaciones que hace
+# scipy.stats.norm().pdf() (dividiendo entre la constante de la
+# distribución normal y la desviación estándar), y las sumas se hacen
+# sobre la longitud exacta de cada plantilla, agrupando los canales
+# que tienen la misma longitud. Así, los resultados son idénticos
+# a los del cálculo frecuencia por frecuencia con scipy.stats.
+# Todas las operaciones se hacen con la precisión de las plantillas
+# (float64, o float32 si se generaron en precisión simple). Como
+# las plantillas se preparan (CompiledTemplates) en cada llamada, para
+# comparar muchas señales con las mismas plantillas es mejor usar
+# compile_templates() una sola vez.
+
+def gauss_scores(ampls, means, stds, lengths, is_arith): # requiere del módulo NumPy (np).
+    return CompiledTemplates(means = means,
+                             stds = stds,
+                             lengths = lengths).scores(ampls = ampls,
+                                                       is_arith = is_arith) # devuelve el vector de resultados.
+
+# - compile_templates(template, file_ids): Requiere del módulo NumPy
+# (np). Devuelve el objeto CompiledTemplates de las plantillas de los
+# canales de "file_ids" (los argumentos son los mismos que los de
+# stack_templates()).
+
+def compile_templates(template, file_ids): # requiere del módulo NumPy (np).
+    means, stds, lengths = stack_templates(template = template,
+                                           file_ids = file_ids) # se reúnen las plantillas en matrices.
+    return CompiledTemplates(means = means,
+                             stds = stds,
+                             lengths = lengths) # devuelve las plantillas preparadas.
@@ -0,0 +1,352 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene la lectura de los archivos de señales,
+# común a los dos scripts del algoritmo (template_gen_ES.py y
+# auto_comparator_ES.py).
+
+# Para calcular el dominio de frecuencia de todas las señales
+# de un archivo con una sola llamada a la transformada de
+# Fourier, las señales de cada archivo se colocan en una matriz
+# con una fila por señal (o canal) y tantas columnas como puntos
+# se vayan a usar en la transformada. Las señales más cortas
+# quedan rellenas con ceros, igual que hace la transformada de
+# Fourier cuando se le indica un número de puntos mayor que el
+# de la señal, y se devuelve también la longitud real de cada
+# una para poder normalizar sus amplitudes.
+
+# En los archivos TXT, solo se interpretan las filas que se usan
+# en la transformada de Fourier (las "n" primeras). El número total
+# de filas, necesario para normalizar las amplitudes, se obtiene
+# contando los saltos de línea del archivo, que es mucho más rápido
+# que convertir cada valor de texto a número.
+
+# Además de los formatos TXT, SMR y PLX, las señales se pueden
+# enviar en formato binario de NumPy (NPY): una matriz de números
+# de punto flotante (float32 o float64) con la misma disposición
+# que los archivos TXT (una fila por punto, la primera columna con
+# el vector de tiempo y una columna por canal). La cabecera del
+# archivo indica su tipo y su forma, y los valores se leen
+# directamente con un mapa de memoria, sin convertir texto.
+
+# En los archivos SMR y PLX, las señales tampoco se leen enteras:
+# se usa la lectura "lazy" de neo, que solo lee la descripción de
+# cada señal analógica, y después se cargan únicamente los canales
+# y los puntos que se van a usar (los "n" primeros), que se copian
+# directamente en la matriz de la transformada de Fourier. Así no
+# se cargan en memoria los demás datos del archivo (otros canales,
+# potenciales de acción, eventos, etc.).
+
+# Para comparar grabaciones largas por ventanas (ver el método
+# score_windows() de la clase Comparator en el módulo comparison_ES),
+# las señales también se pueden leer por bloques de puntos
+# consecutivos (función signal_chunks()), de modo que nunca hay en
+# memoria más que un bloque del archivo.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - itertools: Se ha usado para leer los archivos TXT por bloques
+# de filas.
+# - numpy (np): Se ha usado para leer los archivos TXT y NPY
+# y hacer cálculo matricial.
+# - neo: Se ha utilizado para leer archivos que contienen
+# señales típicamente fisiológicas en formatos comunes
+# como SMR o PLX.
+
+import itertools
+import numpy as np
+import neo
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - neo_reader(file_format, file_name): Requiere del módulo neo.
+# Esta función sirve para extraer los valores que componen una
+# señal que se encuentra en archivos usados para almacenar señales
+# electrofisiológicas.
+# Por ahora, esta función solo permite leer señales desde archivos
+# SMR o PLX. Su argumento file_format es un string que debe
+# corresponderse con alguno de los formatos con los que opera
+# la función (SMR, PLX). Sirve para indicar las funciones
+# apropiadas para extraer los datos de los archivos en cuestión.
+# El argumento file_name se refiere a la localización del archivo
+# del que se pretenden extraer los datos. Si el argumento lazy es
+# True, no se leen los valores de las señales, sino solo su
+# descripción (número de puntos, tasa de muestreo, etc.), y los
+# valores se pueden cargar después con el método load() de cada señal.
+
+def neo_reader(file_format, file_name, lazy = False): # requiere del módulo neo.
+    file_format = file_format.upper() # cambia a mayúsculas el formato.
+    if file_format not in ["SMR","PLX"]: # se ejecuta si el formato no es adecuado.
+        print("WARNING (from neo_reader() function): " +
+              "File formats that can be processed by " +
+              "neo_reader() function are: SMR, PLX. " +
+              "Please, use just one of those file " +
+              "formats.\n") # mensaje de error.
+        quit() # se cierra el programa.
+    elif file_format == "SMR": # se ejecuta si el formato es SMR.
+        reader = neo.io.Spike2IO(filename = file_name) # se lee el archivo.
+        data = reader.read(lazy = lazy)[0] # se almacenan los datos en una variable.
+    elif file_format == "PLX": # se ejecuta si el formato es PLX.
+        reader = neo.io.PlexonIO(filename = file_name) # se lee el archivo.
+        data = reader.read(lazy = lazy) # se almacenan los datos en una variable.
+    return data # devuelve los datos.
+
+# - analog_signals(file_format, file_name, lazy): Requiere del módulo
+# neo. Devuelve una lista con las señales analógicas de un archivo SMR
+# o PLX, en el orden en el que aparecen en cada segmento (y en cada
+# bloque en los PLX). Los argumentos son los mismos que los de la
+# función neo_reader().
+
+def analog_signals(file_format, file_name, lazy = False): # requiere del módulo neo.
+    neo_data = neo_reader(file_format = file_format,
+                          file_name = file_name,
+                          lazy = lazy) # se leen los datos del archivo.
+    if file_format.lower() == "smr": # se ejecuta si el formato del archivo es SMR.
+        neo_data = [neo_data] # se trata el bloque de datos como una lista de bloques, igual que en los PLX.
+    return [an_sig
+            for block in neo_data
+            for seg in block.segments
+            for an_sig in seg.analogsignals] # devuelve la lista de señales analógicas.
+
+# - txt_info(file_name): Devuelve la descripción de un archivo de
+# señales TXT sin leer todos sus valores: el número de filas (puntos
+# de las señales), el último valor del vector de tiempo, la tasa de
+# muestreo y el número de señales (columnas menos la del tiempo). Para
+# ello, solo se leen las dos primeras filas y la última, y se cuentan
+# los saltos de línea del archivo.
+
+def txt_info(file_name):
+    with open(file_name, "rb") as File: # se abre el archivo en modo binario.
+        first_row = np.array(File.readline().split(b"\t"), dtype = float) # primera fila del archivo.
+        second_row = np.array(File.readline().split(b"\t"), dtype = float) # segunda fila del archivo.
+        File.seek(0) # se vuelve al principio del archivo.
+        no_newlines = 0 # número de saltos de línea del archivo.
+        for chunk in iter(lambda: File.read(1 << 20), b""): # bucle que lee el archivo por bloques de 1 MB.
+            no_newlines = no_newlines + chunk.count(b"\n") # se cuentan los saltos de línea del bloque.
+        size = File.tell() # tamaño del archivo en bytes.
+        File.seek(max(0, size - 65536)) # se sitúa el archivo en sus últimos 64 kB.
+        tail = File.read() # final del archivo.
+    stripped = tail.rstrip() # final del archivo sin los saltos de línea (ni espacios) finales.
+    time_len = no_newlines - tail[len(stripped):].count(b"\n") + 1 # número de filas con datos.
+    last_time = float(stripped.split(b"\n")[-1].split(b"\t")[0]) # último valor del vector de tiempo.
+    sampling_rate = 1/(second_row[0]-first_row[0]) # tasa de muestreo.
+    return time_len, last_time, sampling_rate, len(first_row)-1 # devuelve la descripción del archivo.
+
+# - npy_info(file_name): Requiere del módulo NumPy (np). Devuelve la
+# misma descripción que txt_info() para un archivo de señales NPY,
+# leyendo su cabecera y solo la primera, la segunda y la última fila
+# del vector de tiempo.
+
+def npy_info(file_name): # requiere del módulo NumPy (np).
+    data = np.load(file_name, mmap_mode = "r") # se abre la matriz del archivo con un mapa de memoria.
+    time_len = np.shape(data)[0] # número de filas con datos.
+    last_time = float(data[-1,0]) # último valor del vector de tiempo.
+    sampling_rate = 1/(float(data[1,0])-float(data[0,0])) # tasa de muestreo.
+    return time_len, last_time, sampling_rate, np.shape(data)[1]-1 # devuelve la descripción del archivo.
+
+# - signal_info(file_format, file_name): Requiere del módulo neo.
+# Devuelve la descripción de la señal más larga de un archivo de
+# señales (TXT, NPY, SMR o PLX) sin leer sus valores: su número de puntos,
+# el último valor de su vector de tiempo (en segundos) y su tasa de
+# muestreo (en Hz), además del número total de señales del archivo.
+# En los archivos SMR y PLX, esta información se obtiene de las
+# cabeceras del archivo con la lectura "lazy" de neo. Si el formato no
+# es uno de esos cuatro, da un error ValueError.
+
+def signal_info(file_format, file_name): # requiere del módulo neo.
+    file_format = file_format.lower() # cambia a minúsculas el formato.
+    if file_format == "txt": # se ejecuta si el formato del archivo es TXT.
+        return txt_info(file_name = file_name) # devuelve la descripción del archivo TXT.
+    if file_format == "npy": # se ejecuta si el formato del archivo es NPY.
+        return npy_info(file_name = file_name) # devuelve la descripción del archivo NPY.
+    if file_format not in ["smr","plx"]: # se ejecuta si el formato no es uno de los reconocidos.
+        raise ValueError("unsupported format " + repr(file_format)) # error.
+    time_len = 0 # número de puntos de la señal más larga.
+    no_signals = 0 # número de señales del archivo.
+    for an_sig in analog_signals(file_format = file_format,
+                                 file_name = file_name,
+                                 lazy = True): # bucle que itera sobre la descripción de cada señal analógica.
+        no_signals = no_signals + an_sig.shape[1] # se suman las señales de la señal analógica.
+        if an_sig.shape[0] > time_len: # se ejecuta si la señal es más larga que las anteriores.
+            time_len = an_sig.shape[0] # número de puntos de la señal.
+            sampling_rate = float(an_sig.sampling_rate.rescale("Hz").magnitude) # tasa de muestreo.
+            last_time = (float(an_sig.t_start.rescale("s").magnitude) +
+                         (time_len-1)/sampling_rate) # último valor del vector de tiempo.
+    return time_len, last_time, sampling_rate, no_signals # devuelve la descripción del archivo.
+
+# - neo_blocks(file_format, file_name, n, max_signals): Requiere de
+# los módulos NumPy (np) y neo. Carga las señales analógicas de un
+# archivo SMR o PLX a partir de su descripción ("lazy"), leyendo solo
+# los "n" primeros puntos de cada una y, si se indica "max_signals",
+# solo las "max_signals" primeras señales del archivo. Devuelve una
+# lista con una matriz por señal analógica (una columna por señal) y
+# el número de puntos original de sus señales.
+
+def neo_blocks(file_format, file_name, n, max_signals = None): # requiere de los módulos NumPy (np) y neo.
+    blocks = [] # lista vacía con las matrices de las señales.
+    no_signals = 0 # número de señales cargadas.
+    for proxy in analog_signals(file_format = file_format,
+                                file_name = file_name,
+                                lazy = True): # bucle que itera sobre la descripción de cada señal analógica.
+        time_len, width = proxy.shape # número de puntos y de señales.
+        if max_signals is not None: # se ejecuta si se ha indicado cuántas señales se necesitan.
+            width = min(width, max_signals - no_signals) # número de señales que faltan por cargar.
+            if width <= 0: # se ejecuta si ya se han cargado todas las señales necesarias.
+                break # se termina el bucle.
+        time_slice = None # intervalo de tiempo que se carga (None es la señal entera).
+        if time_len > n: # se ejecuta si la señal tiene más puntos de los que se usan.
+            time_slice = (proxy.t_start,
+                          proxy.t_start + n/proxy.sampling_rate) # intervalo de tiempo de los 'n' primeros puntos.
+        channel_indexes = None # señales que se cargan (None son todas).
+        if width < proxy.shape[1]: # se ejecuta si no se necesitan todas las señales.
+            channel_indexes = list(range(width)) # índices de las primeras señales.
+        an_sig = proxy.load(time_slice = time_slice,
+                            strict_slicing = False,
+                            channel_indexes = channel_indexes) # se cargan solo esos puntos y señales.
+        blocks.append((an_sig.magnitude, time_len)) # se añade la matriz de valores y el número de puntos original.
+        no_signals = no_signals + width # se suman las señales cargadas.
+    return blocks # devuelve la lista de matrices.
+
+# - signal_matrix(file_format, file_name, n, max_signals, dtype): Requiere de los módulos
+# NumPy (np) y neo. Lee un archivo de señales (TXT, NPY, SMR o PLX) y
+# devuelve una matriz con una fila por señal y "n" columnas, junto
+# con un vector con el número de puntos original de cada señal. En
+# los archivos TXT y NPY, la primera columna es el vector de tiempo, y
+# cada una de las siguientes es la señal de un canal. En los archivos
+# SMR y PLX, las señales aparecen por orden dentro de cada señal
+# analógica de cada segmento (y de cada bloque en los PLX). Si una
+# señal tiene más de "n" puntos, solo se copian los "n" primeros,
+# igual que hace la transformada de Fourier con el argumento "n" (y
+# en los archivos TXT, SMR y PLX, solo se leen esas filas). Si se
+# indica "max_signals", la matriz solo tiene las "max_signals"
+# primeras señales, con todos los formatos (en los archivos SMR y
+# PLX, además, solo se cargan esas, ver neo_blocks()). El argumento
+# "dtype" es el tipo de número de la matriz (np.float64 por defecto,
+# o np.float32 para trabajar en precisión simple). Si el formato no es
+# uno de esos cuatro, da un error ValueError.
+
+def signal_matrix(file_format, file_name, n, max_signals = None, dtype = np.float64): # requiere de los módulos NumPy (np) y neo.
+    file_format = file_format.lower() # cambia a minúsculas el formato.
+    last_col = None # última columna de las señales que se copian (None es hasta el final).
+    if max_signals is not None: # se ejecuta si se ha indicado cuántas señales se necesitan.
+        last_col = max_signals + 1 # la primera columna es el vector de tiempo.
+    if file_format == "txt": # se ejecuta si el formato del archivo es TXT.
+        time_len = txt_info(file_name = file_name)[0] # número de filas del archivo.
+        data = np.loadtxt(file_name,
+                          delimiter = "\t",
+                          max_rows = n,
+                          ndmin = 2) # se leen solo las 'n' primeras filas usando una función de NumPy.
+        blocks = [(data[:,1:last_col], time_len)] # matriz con los datos de los canales que se usan (una columna por canal) y su número de puntos.
+    elif file_format == "npy": # se ejecuta si el formato del archivo es NPY.
+        data = np.load(file_name, mmap_mode = "r") # se abre la matriz del archivo con un mapa de memoria.
+        blocks = [(data[:,1:last_col], np.shape(data)[0])] # matriz con los datos de los canales que se usan y su número de puntos.
+    elif file_format in ["smr","plx"]: # se ejecuta si el formato del archivo es SMR o PLX.
+        blocks = neo_blocks(file_format = file_format,
+                            file_name = file_name,
+                            n = n,
+                            max_signals = max_signals) # matrices con las señales de cada canal (una columna por señal).
+    else: # se ejecuta si el formato no es uno de los reconocidos.
+        raise ValueError("unsupported format " + repr(file_format)) # error.
+    no_signals = sum(np.shape(block)[1] for block, block_len in blocks) # número total de señales del archivo.
+    matrix = np.zeros([no_signals,n], dtype = dtype) # matriz vacía con una fila por señal.
+    lengths = np.zeros(no_signals, dtype = int) # vector vacío con la longitud de cada señal.
+    row_idx = 0 # índice de fila de la matriz.
+    for block, block_len in blocks: # bucle que itera sobre cada matriz de señales.
+        block_width = np.shape(block)[1] # número de señales.
+        cut = min(block_len, n) # número de puntos que se copian.
+        matrix[row_idx:row_idx+block_width,0:cut] = np.transpose(block[0:cut,:]) # se copian las señales en las filas de la matriz.
+        lengths[row_idx:row_idx+block_width] = block_len # se registra la longitud original de las señales.
+        row_idx = row_idx + block_width # el índice de fila avanza tantas filas como señales se han copiado.
+    return matrix, lengths # devuelve la matriz de señales y sus longitudes.
+
+# - signal_chunks(file_format, file_name, chunk_size, max_signals,
+# dtype): Requiere de los módulos itertools, NumPy (np) y neo. Lee un
+# archivo de señales (TXT, NPY, SMR o PLX) por bloques de
+# "chunk_size" puntos consecutivos, y devuelve (con yield) para cada
+# bloque el vector de tiempo de sus puntos (en segundos) y una matriz
+# con una fila por señal, igual que signal_matrix() pero sin rellenar
+# con ceros (el último bloque puede tener menos puntos). Si se indica
+# "max_signals", solo se leen las "max_signals" primeras señales del
+# archivo. En los archivos SMR y PLX, las señales más cortas que la
+# más larga se rellenan con ceros al final, y el vector de tiempo es
+# el de la señal más larga. El argumento "dtype" es el mismo que el
+# de signal_matrix(). Si el formato no es uno de esos cuatro, da un
+# error ValueError.
+
+def signal_chunks(file_format, file_name, chunk_size, max_signals = None, dtype = np.float64): # requiere de los módulos itertools, NumPy (np) y neo.
+    file_format = file_format.lower() # cambia a minúsculas el formato.
+    last_col = None # última columna de las señales que se leen (None es hasta el final).
+    if max_signals is not None: # se ejecuta si se ha indicado cuántas señales se necesitan.
+        last_col = max_signals + 1 # la primera columna es el vector de tiempo.
+    if file_format == "txt": # se ejecuta si el formato del archivo es TXT.
+        with open(file_name, "r") as File: # se abre el archivo.
+            while True: # bucle que se repite hasta que se termina el archivo.
+                lines = list(itertools.islice(File, chunk_size)) # siguientes 'chunk_size' filas del archivo.
+                if len(lines) == 0: # se ejecuta si ya no quedan filas.
+                    break # se termina el bucle.
+                data = np.loadtxt(lines,
+                                  delimiter = "\t",
+                                  ndmin = 2) # se leen los valores de las filas.
+                if np.shape(data)[0] == 0: # se ejecuta si las filas estaban vacías.
+                    continue # se pasa al siguiente bloque.
+                yield data[:,0], np.array(np.transpose(data[:,1:last_col]),
+                                          dtype = dtype) # se devuelve el bloque (una fila por señal).
+    elif file_format == "npy": # se ejecuta si el formato del archivo es NPY.
+        data = np.load(file_name, mmap_mode = "r") # se abre la matriz del archivo con un mapa de memoria.
+        for start in range(0, np.shape(data)[0], chunk_size): # bucle que itera sobre el primer punto de cada bloque.
+            block = data[start:start+chunk_size,:] # puntos del bloque (solo se leen del disco estos).
+            yield np.array(block[:,0], dtype = float), np.array(np.transpose(block[:,1:last_col]),
+                                                                dtype = dtype) # se devuelve el bloque (una fila por señal).
+    elif file_format in ["smr","plx"]: # se ejecuta si el formato del archivo es SMR o PLX.
+        proxies = [] # lista vacía con la descripción de cada señal analógica y el número de señales que se leen.
+        no_signals = 0 # número de señales que se leen.
+        for proxy in analog_signals(file_format = file_format,
+                                    file_name = file_name,
+                                    lazy = True): # bucle que itera sobre la descripción de cada señal analógica.
+            width = proxy.shape[1] # número de señales.
+            if max_signals is not None: # se ejecuta si se ha indicado cuántas señales se necesitan.
+                width = min(width, max_signals - no_signals) # número de señales que faltan por leer.
+                if width <= 0: # se ejecuta si ya se tienen todas las señales necesarias.
+                    break # se termina el bucle.
+            proxies.append((proxy, width)) # se añade la señal analógica.
+            no_signals = no_signals + width # se suman sus señales.
+        longest = max((proxy for proxy, width in proxies),
+                      key = lambda proxy: proxy.shape[0]) # señal analógica más larga.
+        sampling_rate = float(longest.sampling_rate.rescale("Hz").magnitude) # tasa de muestreo.
+        t_start = float(longest.t_start.rescale("s").magnitude) # momento del primer punto (s).
+        for start in range(0, longest.shape[0], chunk_size): # bucle que itera sobre el primer punto de cada bloque.
+            count = min(chunk_size, longest.shape[0] - start) # número de puntos del bloque.
+            matrix = np.zeros([no_signals,count], dtype = dtype) # matriz vacía con una fila por señal.
+            row_idx = 0 # índice de fila de la matriz.
+            for proxy, width in proxies: # bucle que itera sobre cada señal analógica.
+                if start < proxy.shape[0]: # se ejecuta si la señal todavía tiene puntos en este bloque.
+                    channel_indexes = None # señales que se cargan (None son todas).
+                    if width < proxy.shape[1]: # se ejecuta si no se necesitan todas las señales.
+                        channel_indexes = list(range(width)) # índices de las primeras señales.
+                    an_sig = proxy.load(time_slice = (proxy.t_start + start/proxy.sampling_rate,
+                                                      proxy.t_start + (start+count)/proxy.sampling_rate),
+                                        strict_slicing = False,
+                                        channel_indexes = channel_indexes) # se cargan solo los puntos del bloque.
+                    values = an_sig.magnitude[0:count,:] # valores de las señales en el bloque.
+                    matrix[row_idx:row_idx+width,0:len(values)] = np.transpose(values) # se copian las señales en las filas de la matriz.
+                row_idx = row_idx + width # el índice de fila avanza tantas filas como señales tiene la señal analógica.
+            yield t_start + np.arange(start, start+count)/sampling_rate, matrix # se devuelve el bloque.
+    else: # se ejecuta si el formato no es uno de los reconocidos.
+        raise ValueError("unsupported format " + repr(file_format)) # error.
@@ -0,0 +1,478 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene el cálculo del dominio de frecuencia
+# de las señales, común a los dos scripts del algoritmo
+# (template_gen_ES.py y auto_comparator_ES.py).
+
+# Las señales electrofisiológicas son señales reales, por lo
+# que sus coeficientes de Fourier son simétricos: el coeficiente
+# de la frecuencia 'j' es el conjugado del de la frecuencia
+# 'n-j', y ambos tienen la misma amplitud. Por ello, basta con
+# calcular la mitad del espectro con la transformada de Fourier
+# para señales reales (rfft), que tarda y ocupa aproximadamente
+# la mitad que la transformada completa (fft). Los dos scripts
+# solo usan las primeras frecuencias del dominio de frecuencia,
+# así que no se pierde información.
+
+# Cuando las plantillas solo tienen las frecuencias que están por
+# debajo de una frecuencia límite (ver el script template_gen_ES.py),
+# casi todo el espectro que se calcula se descarta. Por eso, las
+# señales se pueden diezmar antes de la transformada de Fourier (ver
+# decimation_stages() y decimate()): se filtran con un filtro paso
+# bajo, para que las frecuencias que se eliminan no se solapen
+# (aliasing) con las que se conservan, y se queda uno de cada 'q'
+# puntos. La transformada de Fourier se calcula entonces con 'q' veces
+# menos puntos, y las amplitudes de las frecuencias por debajo de la
+# frecuencia límite son las mismas que con todos los puntos, salvo el
+# error del filtro: con una atenuación de DECIMATION_ATTEN dB, el
+# rizado de la banda que se conserva hace que las amplitudes difieran
+# como mucho en DECIMATION_TOL veces la mayor amplitud (ver
+# check_decimation(), que lo comprueba al ejecutar este módulo).
+
+# El filtrado se hace por fases (filtro polifásico, con
+# scipy.signal.upfirdn()), calculando solo los puntos que se
+# conservan, y en varias etapas, una por cada factor primo de 'q', de
+# mayor a menor. En cada etapa solo hay que evitar que se solapen las
+# frecuencias que acabarán en la plantilla (no todas las que quedan
+# por debajo de la nueva frecuencia de Nyquist), de modo que las
+# primeras etapas, con una banda de transición muy ancha, necesitan
+# filtros muy cortos, y solo la última necesita un filtro largo, que
+# se aplica ya sobre pocos puntos.
+
+# Aunque las señales no se diezmen, cuando las plantillas solo tienen
+# unas pocas frecuencias, calcular la transformada de Fourier completa
+# para quedarse con las primeras 'k' frecuencias puede costar más que
+# calcular solo esas con la definición de la transformada discreta de
+# Fourier (DFT): el coeficiente de la frecuencia 'j' es la suma de los
+# valores de la señal multiplicados por cos(2*pi*j*t/n) y por
+# -sin(2*pi*j*t/n). Con una matriz de cosenos y senos de "n" filas y
+# 2*k columnas (calculada una sola vez), los coeficientes de todas las
+# señales se obtienen con un solo producto de matrices (que NumPy
+# calcula con BLAS), con un coste proporcional a n*k, frente al de la
+# transformada rápida, proporcional a n*log(n) (y mucho mayor si "n"
+# tiene factores primos grandes, ver fft_cost()). La clase SpectrumPlan
+# elige el método más barato para cada "n" y "k", y los coeficientes
+# son los mismos que los de la transformada rápida (salvo por el error
+# de redondeo, ver check_plan(), que lo comprueba al ejecutar este
+# módulo).
+
+# No se usa la transformada chirp-z (ni su variante "zoom"): para las
+# frecuencias de la propia transformada de "n" puntos, necesita varias
+# transformadas rápidas de al menos n+k puntos, y con "n" de 1000 a
+# 65537 puntos y "k" de 6 a 1200 frecuencias ha sido siempre más lenta
+# que la transformada completa o que la DFT. El algoritmo de Goertzel
+# calcula lo mismo que la DFT, pero punto a punto, con un bucle de
+# Python que sería mucho más lento que el producto de matrices.
+
+# El coste de la transformada rápida depende mucho de los factores
+# primos del número de puntos: con factores 2, 3 y 5 es mínimo, y si
+# el número de puntos es primo (o tiene factores primos grandes),
+# puede ser varias veces mayor. Como las señales se rellenan con ceros
+# de todas formas, las plantillas se generan con el menor número de
+# puntos que no es menor que el de la señal más larga y solo tiene
+# esos factores (ver fast_length()). Con más puntos, las frecuencias
+# de la transformada están más juntas (su separación es la tasa de
+# muestreo dividida entre el número de puntos), pero las amplitudes se
+# siguen normalizando con el número de puntos original de cada señal,
+# así que no cambian de escala.
+
+# La transformada rápida de varias señales a la vez (una por fila) se
+# puede repartir entre varios hilos (argumento "workers" de
+# scipy.fft), cada uno con una parte de las filas. La clase
+# SpectrumPlan guarda el número de hilos junto con el resto de la
+# preparación de la transformada, y scipy.fft guarda en memoria la
+# preparación de la transformada de cada número de puntos (los
+# factores y las raíces de la unidad), de modo que solo se calcula la
+# primera vez y se reutiliza con todas las señales.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - numpy (np): Se ha usado para aplicar la transformada
+# de Fourier y hacer cálculo matricial.
+# - scipy.fft: Se ha usado para aplicar la transformada de
+# Fourier en precisión simple (float32), que NumPy calcula más
+# despacio que en precisión doble, y con varios hilos. También se ha
+# usado para estimar su coste y para elegir el número de puntos de la
+# transformada.
+# - scipy.signal: Se ha usado para diseñar los filtros paso bajo y
+# diezmar las señales con un filtro polifásico.
+
+import numpy as np
+import scipy.fft
+import scipy.signal
+
+###################################################
+###################################################
+###                                             ###
+###              CONSTANTES USADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+DECIMATION_ATTEN = 100 # atenuación (en dB) de los filtros paso bajo en la banda que se elimina (y rizado de la que se conserva).
+DECIMATION_TOL = 1e-4 # diferencia máxima entre las amplitudes con y sin diezmar las señales, relativa a la mayor amplitud.
+DFT_COST_RATIO = 0.8 # coste de cada multiplicación y suma de la DFT, en unidades de coste de la transformada rápida (medido con NumPy y BLAS).
+DFT_MAX_BYTES = 2**25 # tamaño máximo de la matriz de cosenos y senos de la DFT (32 MB).
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - SpectrumPlan(n, k, dtype, method, workers): Requiere de los módulos NumPy
+# (np) y scipy.fft. Prepara el cálculo de los coeficientes de Fourier
+# de las primeras "k" frecuencias de señales con una transformada de
+# "n" puntos, con la precisión "dtype" (np.float64 o np.float32). Si
+# no se indica "method", elige el más barato: "dft" (producto por una
+# matriz de cosenos y senos, que se calcula al crear el objeto) si
+# DFT_COST_RATIO*n*2*k es menor que fft_cost(n) y la matriz no ocupa
+# más de DFT_MAX_BYTES, o "fft" (la transformada rápida) si no. El
+# argumento "workers" es el número de hilos entre los que se reparten
+# las filas de la transformada rápida (con el mismo significado que en
+# scipy.fft: si es negativo, se cuenta desde el número de
+# procesadores); con un solo hilo, la transformada de precisión doble
+# se calcula con NumPy, como sin el objeto. Se crea
+# una sola vez para todas las señales que se comparan con las mismas
+# plantillas (ver la clase Comparator en el módulo comparison_ES) y se
+# pasa a amplitude_spectrum(). Su método es:
+
+# - coefficients(signals): devuelve los coeficientes de Fourier
+# (complejos) de las primeras "k" frecuencias de las señales de
+# "signals" (un vector, o una matriz con una señal por fila), igual
+# que las primeras "k" columnas de la transformada rápida con "n"
+# puntos (las señales se rellenan con ceros o se recortan hasta "n"
+# puntos).
+
+# Si "method" no es "fft" ni "dft", o se pide "dft" con más
+# frecuencias que las del espectro de un solo lado, da un error
+# ValueError.
+
+class SpectrumPlan: # requiere de los módulos NumPy (np) y scipy.fft.
+    def __init__(self, n, k, dtype = np.float64, method = None, workers = 1):
+        self.n = int(n) # número de puntos de la transformada.
+        self.k = int(k) # número de frecuencias que se calculan.
+        self.dtype = np.dtype(dtype) # precisión de las señales.
+        self.workers = int(workers) # número de hilos de la transformada rápida.
+        basis_bytes = self.n*2*self.k*self.dtype.itemsize # tamaño de la matriz de la DFT.
+        if method is None: # se ejecuta si no se ha indicado el método.
+            method = "fft" # por defecto, la transformada rápida.
+            if (self.k <= self.n//2 + 1 and basis_bytes <= DFT_MAX_BYTES and
+                DFT_COST_RATIO*self.n*2*self.k < fft_cost(n = self.n)): # se ejecuta si la DFT es más barata.
+                method = "dft" # se usa la DFT.
+        if method not in ["fft", "dft"]: # se ejecuta si el método no es uno de los reconocidos.
+            raise ValueError("method must be one of: fft, dft") # error.
+        if method == "dft" and self.k > self.n//2 + 1: # se ejecuta si se piden frecuencias que no se calculan con la DFT.
+            raise ValueError("dft method computes at most n//2+1 frequencies") # error.
+        self.method = method # método con el que se calculan los coeficientes.
+        self.basis = None # matriz de cosenos y senos (solo con la DFT).
+        if method == "dft": # se ejecuta si se usa la DFT.
+            phase = np.outer(np.arange(self.n, dtype = np.int64),
+                             np.arange(self.k, dtype = np.int64)) % self.n # índice de cada término, reducido a un periodo (para no perder precisión en el ángulo).
+            angles = (2*np.pi/self.n)*phase # ángulo de cada término.
+            self.basis = np.concatenate((np.cos(angles), -np.sin(angles)),
+                                        axis = 1).astype(self.dtype) # matriz con los cosenos (parte real) y los senos (parte imaginaria).
+
+    def coefficients(self, signals):
+        signals = np.asarray(signals) # señales.
+        if self.method == "fft": # se ejecuta si se usa la transformada rápida.
+            if signals.dtype == np.float32 or self.workers != 1: # se ejecuta si las señales están en precisión simple o se usan varios hilos.
+                return scipy.fft.rfft(signals, n = self.n,
+                                      workers = self.workers)[...,0:self.k] # devuelve los coeficientes (complex64 en precisión simple).
+            return np.fft.rfft(signals, n = self.n)[...,0:self.k] # devuelve los coeficientes.
+        no_pnts = min(np.shape(signals)[-1], self.n) # número de puntos de las señales que se usan.
+        products = np.matmul(signals[...,0:no_pnts], self.basis[0:no_pnts,:]) # partes reales e imaginarias de los coeficientes.
+        return products[...,0:self.k] + 1j*products[...,self.k:] # devuelve los coeficientes.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - prime_factors(number): Devuelve la lista de los factores primos
+# del número entero "number", de menor a mayor.
+
+def prime_factors(number):
+    factors = [] # lista vacía con los factores primos.
+    prime = 2 # primer factor primo que se prueba.
+    while prime*prime <= number: # bucle que se repite mientras pueda quedar un factor menor que la raíz.
+        while number%prime == 0: # bucle que se repite mientras el número sea divisible.
+            factors.append(prime) # se añade el factor primo.
+            number = number//prime # se divide el número.
+        prime = prime + 1 # siguiente número que se prueba.
+    if number > 1: # se ejecuta si queda un factor primo mayor que la raíz.
+        factors.append(number) # se añade el factor primo.
+    return factors # devuelve los factores primos.
+
+# - fft_cost(n): Requiere del módulo scipy.fft. Devuelve una
+# estimación del coste de la transformada rápida de Fourier de "n"
+# puntos, en las mismas unidades que las multiplicaciones y sumas de
+# la DFT. Con cada factor primo 'p' de "n" se hace una pasada que
+# cuesta unas n*p operaciones; si "n" tiene factores primos grandes,
+# la transformada se calcula con el algoritmo de Bluestein, con tres
+# transformadas de al menos 2*n-1 puntos (con factores 2, 3 y 5), y
+# se toma el menor de los dos costes.
+
+def fft_cost(n): # requiere del módulo scipy.fft.
+    direct = n*sum(prime_factors(number = n)) # coste con una pasada por factor primo.
+    padded = scipy.fft.next_fast_len(2*n - 1, real = True) # número de puntos de las transformadas de Bluestein.
+    bluestein = 3*padded*sum(prime_factors(number = padded)) # coste con el algoritmo de Bluestein.
+    return min(direct, bluestein) # devuelve el menor de los dos costes.
+
+# - fast_length(n, factor): Requiere del módulo scipy.fft. Devuelve el
+# menor número de puntos, no menor que "n", con el que la transformada
+# rápida de Fourier es eficiente (solo tiene factores primos 2, 3 y
+# 5). Si las señales se diezman por "factor", es ese número de puntos
+# después de diezmarlas multiplicado por "factor", de modo que la
+# transformada de las señales diezmadas (ver decimated_length()) es
+# la eficiente, y no hay que rellenarlas con ceros hasta un múltiplo
+# de "factor".
+
+def fast_length(n, factor = 1): # requiere del módulo scipy.fft.
+    factor = int(factor) # factor por el que se diezman las señales.
+    return factor*scipy.fft.next_fast_len(-(-int(n)//factor), real = True) # devuelve el número de puntos.
+
+# - decimated_length(n, decimation): Devuelve el número de puntos de
+# la transformada de Fourier de señales de "n" puntos diezmadas con
+# las etapas "decimation" (ver decimation_stages()), o "n" si no se
+# diezman.
+
+def decimated_length(n, decimation = None):
+    if decimation is not None: # se ejecuta si se diezman las señales.
+        for factor, taps in decimation: # bucle que itera sobre cada etapa.
+            n = -(-n//factor) # número de puntos después de la etapa.
+    return n # devuelve el número de puntos.
+
+# - decimation_stages(factor, band): Requiere de los módulos NumPy
+# (np) y scipy.signal. Diseña los filtros para diezmar las señales
+# por "factor" (un número entero), conservando sin solapamientos las
+# frecuencias por debajo de "band" (la frecuencia límite dividida
+# entre la tasa de muestreo). Devuelve una lista con el factor y los
+# coeficientes del filtro (de tipo Kaiser, con una atenuación de
+# DECIMATION_ATTEN dB) de cada etapa, o None si "factor" es 1 (no se
+# diezman las señales). Si la frecuencia límite no queda por debajo de
+# la mitad de la nueva frecuencia de Nyquist, da un error ValueError.
+
+def decimation_stages(factor, band): # requiere de los módulos NumPy (np) y scipy.signal.
+    factor = int(factor) # factor por el que se diezman las señales.
+    if factor <= 1: # se ejecuta si no se diezman las señales.
+        return None # no hay etapas.
+    if factor*band*2 >= 1: # se ejecuta si la frecuencia límite está demasiado cerca de la nueva frecuencia de Nyquist.
+        raise ValueError("band " + str(band) + " can't be kept when decimating by " +
+                         str(factor)) # error.
+    stages = [] # lista vacía con las etapas.
+    rate = 1.0 # tasa de muestreo de la entrada de la etapa (relativa a la original).
+    for prime in sorted(prime_factors(number = factor), reverse = True): # bucle que itera sobre cada factor primo, de mayor a menor.
+        out_rate = rate/prime # tasa de muestreo de la salida de la etapa.
+        width = out_rate - 2*band # banda de transición: desde la frecuencia límite hasta la primera que se solaparía con ella.
+        no_taps, beta = scipy.signal.kaiserord(DECIMATION_ATTEN, width/(rate/2)) # número de coeficientes y parámetro de la ventana de Kaiser.
+        taps = scipy.signal.firwin(no_taps | 1, out_rate/2,
+                                   window = ("kaiser", beta),
+                                   fs = rate) # filtro paso bajo (con un número impar de coeficientes, para que no desplace la señal).
+        stages.append((prime, taps)) # se añade la etapa.
+        rate = out_rate # la salida es la entrada de la siguiente etapa.
+    return stages # devuelve las etapas.
+
+# - decimate(signals, stages): Requiere de los módulos NumPy (np) y
+# scipy.signal. Diezma las señales de "signals" (un vector, o una
+# matriz con una señal por fila) con las etapas "stages" (las que
+# devuelve decimation_stages()), con la misma precisión que las
+# señales, y devuelve las señales diezmadas. En cada etapa se
+# conserva la convolución completa con el filtro, incluidos los
+# puntos que el filtro extiende antes del principio y después del
+# final de la señal: así, el dominio de frecuencia de las señales
+# diezmadas (una vez se pliegan sobre el número de puntos de la
+# transformada de Fourier, ver amplitude_spectrum()) es el mismo que
+# el de las señales originales en las frecuencias que se conservan,
+# sin el error que se cometería al recortar los bordes. Como no se
+# recortan, da igual que las filas vengan rellenas con ceros.
+
+def decimate(signals, stages): # requiere de los módulos NumPy (np) y scipy.signal.
+    dtype = np.asarray(signals).dtype # precisión de las señales.
+    for factor, taps in stages: # bucle que itera sobre cada etapa.
+        signals = scipy.signal.upfirdn(taps.astype(dtype), signals,
+                                       up = 1, down = factor, axis = -1) # se filtran las señales y se queda uno de cada 'factor' puntos.
+    return signals # devuelve las señales diezmadas.
+
+# - amplitude_spectrum(signals, n, k, lengths, out, decimation, plan):
+# Requiere del módulo NumPy (np). Calcula las amplitudes del dominio de frecuencia
+# de una señal, con la misma normalización que se usaba en los dos
+# scripts: los coeficientes de Fourier se dividen entre el número de
+# puntos de la señal, y las amplitudes de todas las frecuencias salvo
+# la de 0 Hz se multiplican por dos. El argumento "signals" es un
+# vector con los valores de la señal, o una matriz con una señal por
+# fila, en cuyo caso se calcula el dominio de frecuencia de todas las
+# filas con una sola llamada a la transformada de Fourier. El
+# argumento "n" es el número de puntos con el que se calcula la
+# transformada de Fourier (la señal se rellena con ceros hasta esa
+# longitud). El argumento "k" es el número de frecuencias que se
+# quieren obtener, empezando desde 0 Hz. Si no se indica, se devuelve
+# el espectro de un solo lado (n/2+1 frecuencias). Si se piden más
+# frecuencias que las de un solo lado, las restantes se obtienen por
+# simetría, y nunca se devuelven más de "n" frecuencias.
+# El argumento "lengths" es el número de puntos original de cada
+# señal, que se usa para normalizar los coeficientes cuando las
+# señales ya vienen rellenas con ceros (ver signal_matrix() en el
+# módulo signal_io_ES). Si no se indica, se usa la longitud de
+# "signals". Por último, el argumento "out" es una matriz donde se
+# escriben directamente las amplitudes (por ejemplo, una parte de la
+# matriz de amplitudes de las plantillas), sin crear copias
+# intermedias. Si no se indica, se crea una matriz nueva.
+# Si "signals" es de tipo float32, la transformada de Fourier (con
+# scipy.fft) y las amplitudes se calculan en precisión simple
+# (float32), con la mitad de memoria; si no, en precisión doble
+# (float64). Si se indican las etapas "decimation" (las que devuelve
+# decimation_stages()), las señales se diezman antes de la
+# transformada de Fourier (ver decimate()), que se calcula con "n"
+# dividido entre el factor total de las etapas (redondeando hacia
+# arriba) puntos. Los puntos de las señales diezmadas que pasan de ese
+# número se suman a los del principio (se pliegan), lo que equivale a
+# evaluar su dominio de frecuencia completo en las frecuencias de la
+# transformada, y la normalización se hace con el número de puntos
+# original dividido entre el factor, de modo que las amplitudes son
+# las mismas que sin diezmar (si el factor no divide a "n", son las
+# de una transformada de Fourier de factor*ceil(n/factor) puntos, es
+# decir, con las señales rellenas con unos pocos ceros más). Por
+# último, si se indica "plan" (un objeto SpectrumPlan creado con el
+# número de puntos de la transformada, después de diezmar las señales
+# si se diezman, y al menos "k" frecuencias), los coeficientes se
+# calculan con su método (la DFT, o la transformada rápida con sus
+# hilos); si el objeto no corresponde a "n" y "k", da un error
+# ValueError.
+
+def amplitude_spectrum(signals, n, k = None, lengths = None, out = None, decimation = None, plan = None): # requiere del módulo NumPy (np).
+    if decimation is not None: # se ejecuta si se diezman las señales.
+        signals = np.asarray(signals) # señales que se diezman.
+        if lengths is None: # se ejecuta si no se ha indicado la longitud de las señales.
+            lengths = np.full(np.shape(signals)[:-1], np.shape(signals)[-1]) # todas las señales tienen la longitud de la matriz.
+        factor = int(np.prod([stage[0] for stage in decimation])) # factor total de las etapas.
+        lengths = np.asarray(lengths)/factor # número de puntos (equivalente) de las señales diezmadas.
+        signals = decimate(signals = signals,
+                           stages = decimation) # se diezman las señales.
+        n = decimated_length(n = n,
+                             decimation = decimation) # número de puntos de la transformada de Fourier.
+        extra = -np.shape(signals)[-1] % n # puntos que faltan para un múltiplo de 'n'.
+        signals = np.concatenate((signals, np.zeros(np.shape(signals)[:-1] + (extra,), dtype = signals.dtype)), axis = -1) # se rellenan las señales con ceros.
+        signals = np.sum(np.reshape(signals, np.shape(signals)[:-1] + (-1, n)), axis = -2) # se pliegan las señales sobre 'n' puntos.
+    if plan is not None and (plan.n != n or k is None or int(k) > plan.k): # se ejecuta si el objeto no corresponde a la transformada.
+        raise ValueError("spectrum plan for n=" + str(plan.n) + ", k=" + str(plan.k) +
+                         " can't compute n=" + str(n) + ", k=" + str(k)) # error.
+    if plan is not None: # se ejecuta si se ha preparado la transformada.
+        fCoefs = plan.coefficients(signals = signals) # se calculan los coeficientes de Fourier de las primeras frecuencias.
+    elif np.asarray(signals).dtype == np.float32: # se ejecuta si las señales están en precisión simple.
+        fCoefs = scipy.fft.rfft(signals, n = n) # se calculan los coeficientes de Fourier de un solo lado (complex64).
+    else: # se ejecuta si las señales están en precisión doble.
+        fCoefs = np.fft.rfft(signals, n = n) # se calculan los coeficientes de Fourier de un solo lado.
+    if lengths is None: # se ejecuta si no se ha indicado la longitud de las señales.
+        fCoefs /= np.shape(signals)[-1] # se dividen los coeficientes entre el número de puntos de la señal.
+    else: # se ejecuta si se ha indicado la longitud de cada señal.
+        fCoefs /= np.reshape(lengths, np.shape(lengths) + (1,)).astype(fCoefs.real.dtype) # se divide cada fila entre el número de puntos de su señal.
+    half = np.shape(fCoefs)[-1] # número de frecuencias del espectro de un solo lado.
+    if k is None: # se ejecuta si no se ha indicado el número de frecuencias.
+        k = half # se devuelve el espectro de un solo lado.
+    k = min(int(k), n) # no puede haber más frecuencias que puntos de la transformada.
+    if out is None: # se ejecuta si no se ha indicado dónde escribir las amplitudes.
+        out = np.zeros(np.shape(fCoefs)[:-1] + (k,),
+                       dtype = fCoefs.real.dtype) # matriz vacía para las amplitudes (con la misma precisión que la transformada).
+    first = min(k, half) # número de frecuencias que se obtienen del espectro de un solo lado.
+    np.absolute(fCoefs[...,0:first], out = out[...,0:first]) # se calcula la amplitud de las frecuencias a partir de los coeficientes.
+    if k > half: # se ejecuta si se han pedido más frecuencias que las del espectro de un solo lado.
+        out[...,half:k] = out[...,n - np.arange(half, k)] # las frecuencias restantes se obtienen por simetría.
+    out[...,1:k] *= 2 # se normaliza el valor de la amplitud.
+    return out # devuelve las amplitudes de las primeras 'k' frecuencias.
+
+# - check_decimation(): Requiere del módulo NumPy (np). Comprueba que
+# las amplitudes de las frecuencias que se conservan son las mismas
+# con y sin diezmar las señales (ver amplitude_spectrum()), salvo una
+# diferencia de como mucho DECIMATION_TOL veces la mayor amplitud,
+# con ruido blanco (que tiene amplitud en todas las frecuencias, de
+# modo que cuentan el solapamiento y el rizado de todas ellas), una
+# tasa de muestreo de 1000 Hz, una frecuencia límite de 40 Hz y todos
+# los factores con los que se puede conservar (de 2 a 10). Si no es
+# así, da un error AssertionError; si no, devuelve la mayor diferencia.
+
+def check_decimation(): # requiere del módulo NumPy (np).
+    rng = np.random.default_rng(0) # generador de números aleatorios (con semilla fija, para que la comprobación sea reproducible).
+    sampling_rate = 1000.0 # tasa de muestreo de las señales.
+    limit = 40.0 # frecuencia límite.
+    worst = 0.0 # mayor diferencia relativa.
+    for no_pnts in [1012, 5000]: # bucle que itera sobre cada número de puntos de las señales.
+        signals = rng.standard_normal((4, no_pnts)) # señales de ruido blanco.
+        lengths = np.full(4, no_pnts) # número de puntos de cada señal.
+        for factor in range(2, 11): # bucle que itera sobre cada factor.
+            fft_pnts = fast_length(n = no_pnts,
+                                   factor = factor) # número de puntos de la transformada de Fourier.
+            no_freqs = int(np.sum(np.arange(fft_pnts//factor)*sampling_rate/fft_pnts < limit)) # número de frecuencias por debajo de la frecuencia límite.
+            full = amplitude_spectrum(signals = signals,
+                                      n = fft_pnts,
+                                      k = no_freqs,
+                                      lengths = lengths) # amplitudes sin diezmar las señales.
+            decimated = amplitude_spectrum(signals = signals,
+                                           n = fft_pnts,
+                                           k = no_freqs,
+                                           lengths = lengths,
+                                           decimation = decimation_stages(factor = factor,
+                                                                          band = limit/sampling_rate)) # amplitudes diezmando las señales.
+            error = np.max(np.abs(decimated - full))/np.max(full) # diferencia relativa a la mayor amplitud.
+            assert error <= DECIMATION_TOL, ("decimating " + str(no_pnts) + " points by " + str(factor) +
+                                             ": error " + str(error) + " > " + str(DECIMATION_TOL)) # error si la diferencia es mayor que la permitida.
+            worst = max(worst, error) # mayor diferencia relativa.
+    return worst # devuelve la mayor diferencia relativa.
+
+# - check_plan(): Requiere de los módulos NumPy (np) y scipy.fft.
+# Comprueba que los coeficientes de SpectrumPlan(n, k, method =
+# "dft") y de SpectrumPlan(n, k, method = "fft", workers = 2) son los
+# de la transformada rápida de NumPy (en precisión doble) con "n"
+# puntos, rfft(señales, n)[..., 0:k], con señales más cortas, igual de
+# largas y más largas que "n" (que se rellenan con ceros o se
+# recortan), varios "n" (con factores 2, 3 y 5, y primos) y "k" (una
+# frecuencia, 40, o todas las del espectro de un solo lado), y con
+# las precisiones float64 y float32 (con coeficientes complex128 y
+# complex64). La diferencia tiene que ser como mucho 1e-12 (float64)
+# o 1e-5 (float32) veces el mayor coeficiente. Si no es así, da un
+# error AssertionError; si no, devuelve la mayor diferencia de cada
+# precisión.
+
+def check_plan(): # requiere de los módulos NumPy (np) y scipy.fft.
+    rng = np.random.default_rng(0) # generador de números aleatorios (con semilla fija, para que la comprobación sea reproducible).
+    worst = {} # diccionario vacío con la mayor diferencia de cada precisión.
+    for dtype, tol, complex_type in [(np.float64, 1e-12, np.complex128),
+                                     (np.float32, 1e-5, np.complex64)]: # bucle que itera sobre cada precisión.
+        worst[np.dtype(dtype).name] = 0.0 # mayor diferencia relativa.
+        for n in [1000, 1009, 4096]: # bucle que itera sobre cada número de puntos de la transformada.
+            for k in [1, 40, n//2 + 1]: # bucle que itera sobre cada número de frecuencias.
+                plans = [SpectrumPlan(n = n, k = k, dtype = dtype, method = "dft"),
+                         SpectrumPlan(n = n, k = k, dtype = dtype, method = "fft", workers = 2)] # objetos con cada método.
+                for no_pnts in [n - 17, n, n + 13]: # bucle que itera sobre cada número de puntos de las señales.
+                    signals = rng.standard_normal((3, no_pnts)).astype(dtype) # señales de ruido blanco.
+                    expected = np.fft.rfft(signals.astype(np.float64), n = n)[...,0:k] # coeficientes de la transformada rápida.
+                    for plan in plans: # bucle que itera sobre cada método.
+                        fCoefs = plan.coefficients(signals = signals) # coeficientes del objeto.
+                        assert fCoefs.dtype == complex_type, ("spectrum plan " + plan.method + " returns " +
+                                                              str(fCoefs.dtype) + " for " + np.dtype(dtype).name) # error si la precisión no es la esperada.
+                        error = np.max(np.abs(fCoefs - expected))/np.max(np.abs(expected)) # diferencia relativa al mayor coeficiente.
+                        assert error <= tol, ("spectrum plan " + plan.method + " n=" + str(n) + ", k=" + str(k) + " " +
+                                              np.dtype(dtype).name + ": error " + str(error) + " > " + str(tol)) # error si la diferencia es mayor que la permitida.
+                        worst[np.dtype(dtype).name] = max(worst[np.dtype(dtype).name], float(error)) # mayor diferencia relativa.
+    return worst # devuelve la mayor diferencia de cada precisión.
+
+if __name__ == "__main__": # se ejecuta solo si se lanza este módulo (no si se importa).
+    print("decimation: max error " + str(check_decimation()) + " of the peak amplitude") # se comprueba el diezmado.
+    print("spectrum plan: max error " + str(check_plan()) + " of the largest coefficient") # se comprueba el cálculo de los coeficientes.
@@ -0,0 +1,210 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene la comparación de señales que llegan en
+# tiempo real, por bloques de puntos, en lugar de en archivos
+# completos. Se utiliza desde el script stream_comparator_ES.py (que
+# recibe los bloques por un socket Unix) y desde el script
+# stream_producer_ES.py (que los envía).
+
+# Los puntos de cada canal se van guardando en un buffer circular
+# (clase RingBuffer) del tamaño de una ventana, es decir, del número
+# de puntos de la transformada de Fourier de las plantillas. Cada vez
+# que llegan "hop" puntos nuevos y el buffer está lleno, se compara
+# la ventana con las plantillas (clase StreamScorer), igual que en la
+# comparación por ventanas de los archivos (ver el método
+# score_windows() de la clase Comparator en el módulo comparison_ES).
+# Así, la memoria que se usa no depende de cuánto dure la señal, y
+# cada resultado se obtiene en cuanto llega el último punto de su
+# ventana.
+
+# Los bloques se envían como mensajes binarios: una cabecera con el
+# número de canales y el número de puntos del bloque (dos enteros
+# sin signo de 32 bits), seguida de los valores (números de punto
+# flotante de 64 bits), con una fila por punto y una columna por
+# canal (la misma disposición que los archivos de señales TXT, sin
+# el vector de tiempo). Todos los números van en orden de bytes
+# "little-endian".
+
+# Los resultados se devuelven como líneas de texto. Al conectarse,
+# se envía una línea con el número de puntos de cada ventana y la
+# distancia entre ventanas, y después, una línea por ventana con el
+# índice de su primer punto (contando desde el primer punto recibido)
+# y la proporción de similitud de cada canal, separados por
+# tabulaciones.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - struct: Se ha usado para leer y escribir la cabecera de los
+# bloques.
+# - numpy (np): Se ha usado para guardar los puntos en el buffer
+# circular y convertir los bloques.
+
+import struct
+import numpy as np
+
+###################################################
+###################################################
+###                                             ###
+###              CONSTANTES USADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+FRAME_HEADER = struct.Struct("<II") # cabecera de cada bloque (número de canales y número de puntos).
+FRAME_DTYPE = np.dtype("<f8") # tipo de número de los valores de los bloques.
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - RingBuffer(no_channels, size, dtype): Requiere del módulo NumPy
+# (np). Buffer circular con una fila por canal y "size" puntos, que
+# guarda los últimos "size" puntos recibidos de cada canal sin mover
+# los anteriores. Sus métodos son:
+
+# - push(block): añade los puntos de la matriz "block" (una fila por
+# canal y como mucho "size" columnas), sustituyendo a los más
+# antiguos.
+# - window(): devuelve una copia de los puntos del buffer, del más
+# antiguo al más reciente.
+
+# El atributo "count" es el número total de puntos recibidos.
+
+class RingBuffer: # requiere del módulo NumPy (np).
+    def __init__(self, no_channels, size, dtype = np.float64):
+        self.data = np.zeros([no_channels,size], dtype = dtype) # matriz vacía para los puntos de cada canal.
+        self.size = size # número de puntos del buffer.
+        self.pos = 0 # columna en la que se escribe el siguiente punto.
+        self.count = 0 # número total de puntos recibidos.
+
+    def push(self, block):
+        no_pnts = np.shape(block)[1] # número de puntos del bloque.
+        first = min(no_pnts, self.size - self.pos) # puntos que caben hasta el final de la matriz.
+        self.data[:,self.pos:self.pos+first] = block[:,0:first] # se copian los primeros puntos.
+        self.data[:,0:no_pnts-first] = block[:,first:no_pnts] # los restantes se copian al principio de la matriz.
+        self.pos = (self.pos + no_pnts) % self.size # columna del siguiente punto.
+        self.count = self.count + no_pnts # se suman los puntos recibidos.
+
+    def window(self):
+        return np.concatenate((self.data[:,self.pos:],
+                               self.data[:,0:self.pos]), axis = 1) # devuelve los puntos en orden.
+
+# - StreamScorer(comparator, no_channels, hop): Requiere del módulo
+# NumPy (np). Compara con las plantillas del objeto Comparator
+# "comparator" (módulo comparison_ES) las señales de "no_channels"
+# canales que llegan por bloques. Las ventanas tienen tantos puntos
+# como la transformada de Fourier de las plantillas, y empiezan cada
+# "hop" puntos (la mitad de la ventana si no se indica). Si "hop" no
+# está entre 1 y el número de puntos de la ventana, da un error
+# ValueError. Su método es:
+
+# - feed(block): añade los puntos de la matriz "block" (una fila por
+# canal, con cualquier número de puntos) y devuelve una lista con el
+# índice del primer punto y el vector de resultados de cada ventana
+# que se ha completado con ellos (vacía si no se ha completado
+# ninguna).
+
+class StreamScorer: # requiere del módulo NumPy (np).
+    def __init__(self, comparator, no_channels, hop = None):
+        window = comparator.max_numb_pnts # número de puntos de cada ventana.
+        if hop is None: # se ejecuta si no se ha indicado la distancia entre ventanas.
+            hop = max(window//2, 1) # las ventanas se solapan a la mitad.
+        if hop < 1 or hop > window: # se ejecuta si la distancia entre ventanas no es válida.
+            raise ValueError("hop must be between 1 and " + str(window) + " points") # error.
+        self.comparator = comparator # plantillas con las que se comparan las ventanas.
+        self.no_channels = no_channels # número de canales de los bloques.
+        self.window = window # número de puntos de cada ventana.
+        self.hop = hop # distancia entre ventanas.
+        self.buffer = RingBuffer(no_channels = no_channels,
+                                 size = window,
+                                 dtype = comparator.dtype) # buffer circular con los últimos puntos de cada canal.
+        self.next_end = window # número de puntos recibidos con el que se completa la siguiente ventana.
+
+    def feed(self, block):
+        block = np.asarray(block, dtype = self.comparator.dtype) # bloque con la misma precisión que las plantillas.
+        no_pnts = np.shape(block)[1] # número de puntos del bloque.
+        results = [] # lista vacía para los resultados de las ventanas completadas.
+        done = 0 # puntos del bloque ya añadidos al buffer.
+        while done < no_pnts: # bucle que se repite hasta añadir todos los puntos del bloque.
+            step = min(no_pnts - done, self.next_end - self.buffer.count) # puntos que faltan para completar la siguiente ventana.
+            self.buffer.push(block[:,done:done+step]) # se añaden al buffer.
+            done = done + step # puntos añadidos.
+            if self.buffer.count == self.next_end: # se ejecuta si se ha completado una ventana.
+                results.append((self.next_end - self.window,
+                                self.comparator.score(signals = self.buffer.window()))) # se compara la ventana con las plantillas.
+                self.next_end = self.next_end + self.hop # la siguiente ventana se completa 'hop' puntos después.
+        return results # devuelve los resultados de las ventanas completadas.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - read_exactly(File, no_bytes): Lee exactamente "no_bytes" bytes del
+# archivo (o socket abierto como archivo) "File". Devuelve None si la
+# conexión se cierra antes de leer el primer byte, y da un error
+# EOFError si se cierra a mitad.
+
+def read_exactly(File, no_bytes):
+    data = File.read(no_bytes) # se leen los bytes.
+    if len(data) == 0 and no_bytes > 0: # se ejecuta si se ha cerrado la conexión.
+        return None # no hay más datos.
+    while len(data) < no_bytes: # bucle que se repite hasta tener todos los bytes.
+        more = File.read(no_bytes - len(data)) # se leen los bytes que faltan.
+        if len(more) == 0: # se ejecuta si se ha cerrado la conexión a mitad.
+            raise EOFError("connection closed in the middle of a frame") # error.
+        data = data + more # se añaden los bytes leídos.
+    return data # devuelve los bytes.
+
+# - read_frame(File): Requiere de los módulos struct y NumPy (np). Lee
+# un bloque del archivo (o socket abierto como archivo) "File" y
+# devuelve una matriz con una fila por canal y una columna por punto.
+# Devuelve None si la conexión se ha cerrado.
+
+def read_frame(File): # requiere de los módulos struct y NumPy (np).
+    header = read_exactly(File = File,
+                          no_bytes = FRAME_HEADER.size) # cabecera del bloque.
+    if header is None: # se ejecuta si se ha cerrado la conexión.
+        return None # no hay más bloques.
+    no_channels, no_pnts = FRAME_HEADER.unpack(header) # número de canales y de puntos.
+    data = read_exactly(File = File,
+                        no_bytes = no_channels*no_pnts*FRAME_DTYPE.itemsize) # valores del bloque.
+    if data is None: # se ejecuta si se ha cerrado la conexión después de la cabecera.
+        raise EOFError("connection closed in the middle of a frame") # error.
+    values = np.frombuffer(data, dtype = FRAME_DTYPE) # vector con los valores.
+    return np.transpose(np.reshape(values, [no_pnts,no_channels])) # devuelve la matriz (una fila por canal).
+
+# - frame_bytes(block): Requiere de los módulos struct y NumPy (np).
+# Devuelve los bytes del bloque que contiene los puntos de la matriz
+# "block" (una fila por canal y una columna por punto).
+
+def frame_bytes(block): # requiere de los módulos struct y NumPy (np).
+    no_channels, no_pnts = np.shape(block) # número de canales y de puntos.
+    values = np.ascontiguousarray(np.transpose(block), dtype = FRAME_DTYPE) # una fila por punto y una columna por canal.
+    return FRAME_HEADER.pack(no_channels, no_pnts) + values.tobytes() # devuelve la cabecera y los valores.
+
+# - format_window(first_pnt, scores): Devuelve la línea de texto con
+# el índice del primer punto de una ventana y sus resultados "scores"
+# (uno por canal), separados por tabulaciones.
+
+def format_window(first_pnt, scores):
+    return "\t".join([str(first_pnt)] + [str(score) for score in scores]) + "\n" # devuelve la línea de la ventana.
@@ -0,0 +1,221 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este programa compara con las plantillas señales que llegan en
+# tiempo real, por bloques de puntos, en lugar de en archivos
+# completos. Así, la latencia no depende de cuánto tarde el programa
+# de adquisición en escribir cada archivo en la carpeta de señales
+# entrantes (ver auto_comparator_ES.py), sino solo de cuánto tarda
+# en llegar el último punto de cada ventana.
+
+# El programa abre un socket Unix ("comparator.sock" por defecto, o
+# el que se indique con el argumento "--socket"), al que se pueden
+# conectar uno o varios programas de adquisición a la vez. Cada
+# conexión envía bloques de puntos de varios canales (ver el formato
+# en el módulo stream_ES), que se van guardando en un buffer circular
+# por canal. En cuanto se completa cada ventana (del mismo número de
+# puntos que la transformada de Fourier de las plantillas), se
+# compara con las plantillas, y el resultado se devuelve por la
+# misma conexión. Las ventanas empiezan cada "--window-hop" puntos
+# (por defecto, la mitad de la ventana).
+
+# Para probarlo sin un equipo de adquisición, el script
+# stream_producer_ES.py envía las señales de un archivo (TXT, NPY,
+# SMR o PLX) por bloques y mide la latencia de cada resultado.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - sys: Se ha usado para crear argumentos desde el
+# prompt cuando se ejecuta el programa.
+# - os: Se ha usado para borrar el archivo del socket.
+# - atexit y signal: Se han usado para borrar el archivo del socket
+# cuando se cierra el programa.
+# - socketserver: Se ha usado para atender varias conexiones a la vez
+# por el socket Unix (un hilo por conexión).
+# - comparison_ES: Módulo propio que contiene la comparación de
+# las señales con las plantillas (clase Comparator).
+# - template_store_ES: Módulo propio que contiene la lectura
+# del archivo de las plantillas.
+# - stream_ES: Módulo propio que contiene el buffer circular, la
+# comparación por ventanas de los bloques y su formato.
+
+import sys
+import os
+import atexit
+import signal
+import socketserver
+from comparison_ES import Comparator
+from template_store_ES import load_templates
+from stream_ES import StreamScorer, read_frame, format_window
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - StreamHandler: Atiende cada conexión al socket (en un hilo
+# propio). Crea un objeto StreamScorer (módulo stream_ES) con las
+# plantillas del servidor al recibir el primer bloque, y devuelve una
+# línea de resultados por cada ventana que se completa. Si un bloque
+# tiene un número de canales distinto al del primero, o la conexión
+# se cierra a mitad de un bloque, muestra un mensaje de error y
+# cierra la conexión.
+
+class StreamHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        comp = self.server.comparator # plantillas del servidor.
+        hop = self.server.hop # distancia entre ventanas.
+        if hop is None: # se ejecuta si no se ha indicado la distancia entre ventanas.
+            hop = max(comp.max_numb_pnts//2, 1) # las ventanas se solapan a la mitad.
+        self.wfile.write((str(comp.max_numb_pnts) + "\t" +
+                          str(hop) + "\n").encode()) # se informa del tamaño de la ventana y de la distancia entre ventanas.
+        scorer = None # comparación de las ventanas (se crea con el primer bloque).
+        print("New signal stream connected.") # mensaje de información.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            while True: # bucle que se repite hasta que se cierra la conexión.
+                block = read_frame(File = self.rfile) # siguiente bloque.
+                if block is None: # se ejecuta si se ha cerrado la conexión.
+                    break # se termina el bucle.
+                if scorer is None: # se ejecuta si es el primer bloque.
+                    scorer = StreamScorer(comparator = comp,
+                                          no_channels = len(block),
+                                          hop = hop) # se crea el buffer circular de la conexión.
+                elif len(block) != scorer.no_channels: # se ejecuta si el número de canales ha cambiado.
+                    raise ValueError("frame with " + str(len(block)) +
+                                     " channels in a stream of " +
+                                     str(scorer.no_channels)) # error.
+                lines = [format_window(first_pnt = first_pnt,
+                                       scores = scores)
+                         for first_pnt, scores in scorer.feed(block = block)] # resultados de las ventanas completadas.
+                if len(lines) > 0: # se ejecuta si se ha completado alguna ventana.
+                    self.wfile.write("".join(lines).encode()) # se envían los resultados.
+        except (ValueError, EOFError, OSError) as error: # se ejecuta si el bloque no es válido o la conexión se ha cortado.
+            print("ERROR: signal stream closed (" + repr(error) + ").") # mensaje de error.
+            return # se cierra la conexión.
+        print("Signal stream disconnected.") # mensaje de información.
+
+# - StreamServer(socket_name, comparator, hop): Servidor del socket
+# Unix "socket_name", que atiende cada conexión en un hilo
+# (StreamHandler) con las plantillas del objeto Comparator
+# "comparator" y la distancia entre ventanas "hop".
+
+class StreamServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True # las conexiones no impiden cerrar el programa.
+
+    def __init__(self, socket_name, comparator, hop = None):
+        self.comparator = comparator # plantillas con las que se comparan las ventanas.
+        self.hop = hop # distancia entre ventanas.
+        socketserver.UnixStreamServer.__init__(self, socket_name, StreamHandler) # se abre el socket.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - remove_socket(socket_name): Requiere del módulo os. Borra el
+# archivo del socket "socket_name" si existe.
+
+def remove_socket(socket_name): # requiere del módulo os.
+    if os.path.exists(socket_name): # se ejecuta si existe el archivo.
+        os.remove(socket_name) # se borra el archivo.
+
+# - main(): Es el programa en sí: lee los argumentos del prompt, pide
+# el tipo de media con input(), abre las plantillas y atiende las
+# conexiones al socket hasta que se cierra el programa.
+
+def main():
+    print("\nLaunching " + sys.argv[0] + ".") # mensaje de información.
+
+    # Con el argumento "--socket" se indica el archivo del socket (por
+    # ejemplo: "--socket /tmp/comparator.sock"), con "--window-hop",
+    # cada cuántos puntos empieza una ventana nueva, y con
+    # "--fft-workers", entre cuántos hilos se reparten los canales de
+    # cada transformada de Fourier (1 por defecto).
+
+    socket_name = "comparator.sock" # archivo del socket.
+    if "--socket" in sys.argv: # se ejecuta si se ha indicado el archivo del socket.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            socket_name = sys.argv[sys.argv.index("--socket")+1] # archivo indicado.
+        except: # se ejecuta si no se ha indicado nada después de "--socket".
+            print("ERROR: --socket argument requires a " +
+            "socket file name.") # mensaje de error.
+            quit() # se cierra el programa.
+    window_hop = None # distancia entre ventanas (None es la mitad de la ventana).
+    if "--window-hop" in sys.argv: # se ejecuta si se ha indicado la distancia entre ventanas.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            window_hop = int(sys.argv[sys.argv.index("--window-hop")+1]) # distancia indicada.
+        except: # se ejecuta si no se ha indicado un número entero después de "--window-hop".
+            print("ERROR: --window-hop argument requires an " +
+            "integer number of points.") # mensaje de error.
+            quit() # se cierra el programa.
+    fft_workers = 1 # número de hilos de la transformada de Fourier.
+    if "--fft-workers" in sys.argv: # se ejecuta si se ha indicado el número de hilos.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            fft_workers = int(sys.argv[sys.argv.index("--fft-workers")+1]) # número de hilos indicado.
+        except: # se ejecuta si no se ha indicado un número entero después de "--fft-workers".
+            print("ERROR: --fft-workers argument requires an " +
+            "integer number of FFT threads.") # mensaje de error.
+            quit() # se cierra el programa.
+
+    # El tipo de media se elige igual que en auto_comparator_ES.py.
+
+    mean_calc = input("Do you want to compute the arithmetic " +
+                      "mean for the frequency amplitudes in " +
+                      "order to stablish a comparison between " +
+                      "signals? (If not, the weighted average " +
+                      "will be computed.) [Y, n] ").upper() # variable que determina si se hará la media aritmética o ponderada.
+    if mean_calc not in ["Y", "YES", "N", "NO"]: # se ejecuta si la variable recién introducida no es alguna reconocida por el programa.
+        print("No valid answer was entered. Shutting program " +
+              "down.") # mensaje de error.
+        quit() # se cierra el programa.
+
+    comp = Comparator(template = load_templates(templ_dir = "templates"),
+                      is_arith = mean_calc,
+                      fft_workers = fft_workers) # se preparan las plantillas.
+    print("Reading templates... Done.") # mensaje de información.
+    if window_hop is not None and not 1 <= window_hop <= comp.max_numb_pnts: # se ejecuta si la distancia entre ventanas no es válida.
+        print("ERROR: --window-hop argument must be between 1 " +
+              "and " + str(comp.max_numb_pnts) + " points (the " +
+              "template window).") # mensaje de error.
+        quit() # se cierra el programa.
+
+    # Si el archivo del socket ya existe (porque el programa no se
+    # cerró bien la última vez), se borra, y se vuelve a borrar al
+    # cerrar el programa (con Ctrl+C o con la señal SIGTERM).
+
+    remove_socket(socket_name) # se borra el archivo del socket anterior.
+    server = StreamServer(socket_name = socket_name,
+                          comparator = comp,
+                          hop = window_hop) # se abre el socket.
+    atexit.register(remove_socket, socket_name) # al cerrar el programa, se borra el archivo del socket.
+    signal.signal(signal.SIGTERM,
+                  lambda signum, frame: sys.exit(0)) # la señal SIGTERM cierra el programa de forma ordenada.
+
+    print("System ready to receive signal streams on " +
+          socket_name + ".\n") # mensaje de información.
+    try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+        server.serve_forever() # se atienden las conexiones.
+    except KeyboardInterrupt: # se ejecuta si se cierra el programa con Ctrl+C.
+        pass # se cierra el programa.
+    finally: # se ejecuta siempre al cerrar el programa.
+        server.server_close() # se cierra el socket.
+
+if __name__ == "__main__": # se ejecuta solo si se lanza este script (no si se importa).
+    main() # se ejecuta el programa.
@@ -0,0 +1,164 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este programa sustituye al equipo de adquisición para probar el
+# script stream_comparator_ES.py. Lee un archivo de señales (TXT,
+# NPY, SMR o PLX) por bloques de puntos, los envía por el socket
+# Unix del comparador y recibe los resultados de cada ventana. Para
+# cada resultado, mide la latencia: el tiempo desde que se envió el
+# bloque con el último punto de la ventana hasta que llegó su
+# resultado. Al terminar, muestra un resumen de las latencias.
+
+# Se ejecuta así:
+
+# python stream_producer_ES.py archivo.txt [--socket comparator.sock]
+#                              [--chunk 50] [--realtime] [--quiet]
+
+# El argumento "--chunk" es el número de puntos de cada bloque (50
+# por defecto). Con "--realtime", los bloques se envían al ritmo que
+# marca el vector de tiempo del archivo, como lo haría el equipo de
+# adquisición; si no, se envían lo más rápido posible. Con "--quiet",
+# no se muestra el resultado de cada ventana, solo el resumen.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - sys: Se ha usado para crear argumentos desde el
+# prompt cuando se ejecuta el programa.
+# - os: Se ha usado para obtener el formato del archivo.
+# - time: Se ha usado para medir la latencia y para enviar los
+# bloques en tiempo real.
+# - socket: Se ha usado para conectarse al comparador.
+# - threading: Se ha usado para recibir los resultados mientras se
+# envían los bloques.
+# - bisect: Se ha usado para encontrar el bloque con el último punto
+# de cada ventana.
+# - numpy (np): Se ha usado para calcular el resumen de las
+# latencias.
+# - signal_io_ES: Módulo propio que contiene la lectura de los
+# archivos de señales por bloques.
+# - stream_ES: Módulo propio que contiene el formato de los bloques.
+
+import sys
+import os
+import time
+import socket
+import threading
+import bisect
+import numpy as np
+from signal_io_ES import signal_chunks
+from stream_ES import frame_bytes
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - receive_results(File, sent_ends, sent_times, latencies, quiet):
+# Requiere de los módulos time y bisect. Lee las líneas de resultados
+# del comparador (del socket abierto como archivo "File") hasta que
+# se cierra la conexión, y añade a la lista "latencies" la latencia
+# de cada ventana (en segundos). Las listas "sent_ends" y "sent_times"
+# son el índice del último punto de cada bloque enviado y el momento
+# en el que se envió. Si "quiet" es False, muestra cada línea.
+
+def receive_results(File, sent_ends, sent_times, latencies, quiet): # requiere de los módulos time y bisect.
+    window = int(File.readline().split(b"\t")[0]) # número de puntos de cada ventana.
+    for line in File: # bucle que itera sobre cada línea de resultados.
+        arrived = time.perf_counter() # momento en el que ha llegado el resultado.
+        last_pnt = int(line.split(b"\t")[0]) + window - 1 # índice del último punto de la ventana.
+        chunk_idx = bisect.bisect_left(sent_ends, last_pnt) # bloque que contenía ese punto.
+        latencies.append(arrived - sent_times[chunk_idx]) # latencia del resultado.
+        if not quiet: # se ejecuta si se quieren ver los resultados.
+            print(line.decode().rstrip("\n") +
+                  "\t(" + str(round(1000*latencies[-1], 2)) + " ms)") # resultado de la ventana y su latencia.
+
+# - main(): Es el programa en sí: lee los argumentos del prompt, se
+# conecta al comparador, envía el archivo por bloques y muestra el
+# resumen de las latencias.
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--"): # se ejecuta si no se ha indicado el archivo.
+        print("ERROR: a signal file (TXT, NPY, SMR or PLX) " +
+              "is required as first argument.") # mensaje de error.
+        quit() # se cierra el programa.
+    file_name = sys.argv[1] # archivo de señales.
+    socket_name = "comparator.sock" # archivo del socket.
+    if "--socket" in sys.argv: # se ejecuta si se ha indicado el archivo del socket.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            socket_name = sys.argv[sys.argv.index("--socket")+1] # archivo indicado.
+        except: # se ejecuta si no se ha indicado nada después de "--socket".
+            print("ERROR: --socket argument requires a " +
+            "socket file name.") # mensaje de error.
+            quit() # se cierra el programa.
+    chunk_size = 50 # número de puntos de cada bloque.
+    if "--chunk" in sys.argv: # se ejecuta si se ha indicado el número de puntos de cada bloque.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            chunk_size = int(sys.argv[sys.argv.index("--chunk")+1]) # número indicado.
+        except: # se ejecuta si no se ha indicado un número entero después de "--chunk".
+            print("ERROR: --chunk argument requires an " +
+            "integer number of points.") # mensaje de error.
+            quit() # se cierra el programa.
+    realtime = "--realtime" in sys.argv # indica si los bloques se envían en tiempo real.
+    quiet = "--quiet" in sys.argv # indica si no se muestran los resultados.
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) # socket Unix.
+    try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+        sock.connect(socket_name) # se conecta al comparador.
+    except OSError: # se ejecuta si el comparador no está escuchando.
+        print("ERROR: no comparator is listening on " +
+              socket_name + ".") # mensaje de error.
+        quit() # se cierra el programa.
+
+    sent_ends = [] # índice del último punto de cada bloque enviado.
+    sent_times = [] # momento en el que se envió cada bloque.
+    latencies = [] # latencia de cada resultado.
+    receiver = threading.Thread(target = receive_results,
+                                args = (sock.makefile("rb"), sent_ends,
+                                        sent_times, latencies, quiet)) # hilo que recibe los resultados.
+    receiver.start() # se empiezan a recibir los resultados.
+
+    first_time = None # primer valor del vector de tiempo del archivo.
+    start = time.perf_counter() # momento en el que se empieza a enviar.
+    sent = 0 # número de puntos enviados.
+    for times, block in signal_chunks(file_format = os.path.splitext(file_name)[1][1:],
+                                      file_name = file_name,
+                                      chunk_size = chunk_size): # bucle que itera sobre cada bloque del archivo.
+        if realtime: # se ejecuta si los bloques se envían en tiempo real.
+            if first_time is None: # se ejecuta si es el primer bloque.
+                first_time = times[0] # momento del primer punto del archivo.
+            delay = (times[-1] - first_time) - (time.perf_counter() - start) # tiempo que falta hasta que se haya "registrado" el último punto del bloque.
+            if delay > 0: # se ejecuta si el bloque todavía no se habría registrado.
+                time.sleep(delay) # se espera.
+        data = frame_bytes(block = block) # bytes del bloque.
+        sent = sent + len(times) # puntos enviados.
+        sent_ends.append(sent - 1) # índice del último punto del bloque.
+        sent_times.append(time.perf_counter()) # momento en el que se envía.
+        sock.sendall(data) # se envía el bloque.
+    sock.shutdown(socket.SHUT_WR) # se avisa al comparador de que no hay más bloques.
+    receiver.join() # se espera a recibir todos los resultados.
+    sock.close() # se cierra la conexión.
+
+    print("\n" + str(sent) + " points sent in " + str(len(sent_ends)) +
+          " chunks, " + str(len(latencies)) + " windows scored.") # mensaje de información.
+    if len(latencies) > 0: # se ejecuta si se ha recibido algún resultado.
+        latencies = 1000*np.array(latencies) # latencias en milisegundos.
+        print("Latency (ms): median " + str(round(float(np.median(latencies)), 2)) +
+              ", p95 " + str(round(float(np.percentile(latencies, 95)), 2)) +
+              ", max " + str(round(float(np.max(latencies)), 2)) + ".") # resumen de las latencias.
+
+if __name__ == "__main__": # se ejecuta solo si se lanza este script (no si se importa).
+    main() # se ejecuta el programa.
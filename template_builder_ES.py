@@ -0,0 +1,623 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene la generación de las plantillas a partir de
+# una lista de archivos de señales, sin leer argumentos del prompt,
+# sin pedir datos con input() y sin tocar ninguna carpeta. El script
+# template_gen_ES.py pide los datos al usuario y llama a estas
+# funciones, pero también se pueden usar desde otros programas (por
+# ejemplo, un servicio que genere plantillas sin tener que lanzar un
+# intérprete de Python nuevo cada vez):
+
+# from template_builder_ES import build_templates
+# bundle = build_templates(file_names = ["samples/s1.txt", ...],
+#                          mode = "first_frequencies",
+#                          limit_freq = 40)
+
+# Las plantillas se devuelven en un diccionario con las mismas
+# etiquetas que el archivo de las plantillas (ver el módulo
+# template_store_ES), que se puede escribir en el disco con
+# save_templates() o pasar directamente a un objeto Comparator (ver
+# el módulo comparison_ES).
+
+# Hay dos formas de elegir las frecuencias de las plantillas (ver el
+# script template_gen_ES.py): "first_frequencies", con las que están
+# por debajo de una frecuencia límite ("limit_freq", en Hz), y
+# "cumulative_sum", con las que suman una proporción ("prop", entre 0
+# y 1) de la suma de las amplitudes de cada canal.
+
+# Con "first_frequencies", las frecuencias por encima de la frecuencia
+# límite no se usan, así que, con el argumento "decimate", las señales
+# se diezman antes de la transformada de Fourier (ver el módulo
+# spectrum_ES) hasta una tasa de muestreo cercana a DECIMATION_MARGIN
+# veces la frecuencia límite. La transformada de Fourier se calcula
+# con muchos menos puntos, y las plantillas guardan el factor por el
+# que se han diezmado las señales, para que el comparador haga lo
+# mismo con las señales entrantes.
+
+# La transformada de Fourier no se calcula con el número de puntos de
+# la señal más larga, sino con el menor número de puntos, no menor
+# que ese, con el que la transformada rápida es eficiente (ver
+# fast_length() en el módulo spectrum_ES): si la señal más larga
+# tiene un número primo de puntos, o con factores primos grandes, la
+# transformada puede tardar varias veces más. Las plantillas guardan
+# ese número de puntos y la separación entre sus frecuencias (ver el
+# módulo template_store_ES), y el comparador calcula la transformada
+# de las señales entrantes con el mismo número de puntos. Con el
+# argumento "exact_length", la transformada se calcula con el número
+# de puntos de la señal más larga, como en las plantillas anteriores.
+
+# Las plantillas guardan las medias y M2 de todas las frecuencias
+# calculadas y el nombre de los archivos acumulados (ver el módulo
+# template_store_ES). Con ellas, update_templates() añade archivos de
+# señales nuevos a unas plantillas ya generadas, o quita los de alguno,
+# leyendo solo esos archivos:
+
+# from template_store_ES import load_templates
+# bundle = update_templates(bundle = load_templates("templates"),
+#                           add_files = ["samples/s31.txt"],
+#                           remove_files = ["samples/s7.txt"])
+
+# Al ejecutar este módulo, check_update() comprueba que las plantillas
+# actualizadas son las mismas que si se generaran desde el principio
+# con los archivos que quedan, y check_float32() comprueba el error de
+# las plantillas en precisión simple (float32) con respecto a las de
+# precisión doble.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - os: Se ha usado para obtener el formato y el nombre de los
+# archivos.
+# - time: Se ha usado para medir la duración de cada etapa.
+# - json: Se ha usado para leer los parámetros de las plantillas.
+# - tempfile: Se ha usado para crear la carpeta temporal de las
+# comprobaciones.
+# - numpy (np): Se ha usado para hacer cálculo matricial.
+# - signal_io_ES: Módulo propio que contiene la lectura de la
+# descripción de los archivos de señales.
+# - template_stats_ES: Módulo propio que contiene el cálculo de las
+# medias y desviaciones estándar de las plantillas.
+# - spectrum_ES: Módulo propio que contiene el diseño de los filtros
+# con los que se diezman las señales y la elección del método con el
+# que se calculan las amplitudes.
+# - template_store_ES: Módulo propio que contiene el diccionario de
+# las plantillas y su lectura y escritura.
+# - comparison_ES: Módulo propio que contiene la comparación de las
+# señales con las plantillas (en las comprobaciones).
+
+import os
+import time
+import json
+import tempfile
+import numpy as np
+from signal_io_ES import signal_info
+from spectrum_ES import decimation_stages, decimated_length, fast_length, SpectrumPlan
+from template_stats_ES import build_stats, restore_stats, file_amplitudes, sample_files
+from template_store_ES import make_bundle, save_templates, load_templates
+from comparison_ES import Comparator
+
+###################################################
+###################################################
+###                                             ###
+###              CONSTANTES USADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+FORMATS = ["txt", "npy", "smr", "plx"] # formatos de archivos de señales reconocidos.
+MODES = ["first_frequencies", "cumulative_sum"] # formas de elegir las frecuencias de las plantillas.
+DECIMATION_MARGIN = 2.5 # tasa de muestreo mínima de las señales diezmadas, en múltiplos de la frecuencia límite.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - hertzs(time_len, last_time): requiere del módulo NumPy (np). Esta
+# función necesita de dos argumentos que describen un vector que
+# representa puntos en el tiempo: su longitud (time_len) y su último
+# valor (last_time). A partir de este vector, se crea un vector de
+# frecuencias. Este vector de frecuencias
+# es útil para representar el dominio de frecuencia de una señal
+# a partir de su dominio de tiempo.
+
+# Los vectores de frecuencias se han generado usando la función
+# linspace() del módulo NumPy (np). Para crear un vector con esta
+# función se indica, primero, el valor inicial, luego el
+# valor final del vector y por último el número de puntos que
+# va a contener. El vector producido es un vector lineal y
+# la diferencia entre dos puntos consecutivos es siempre la misma.
+
+# Si el vector de tiempo tiene un número de puntos par,
+# el vector de frecuencia correspondiente se elabora con la función
+# linspace() a partir del cociente entre la longitud del vector de
+# tiempo y el último valor del mismo, como punto final en el vector
+# de frecuencias, y considerando un número de puntos igual a la
+# longitud del vector de tiempo más uno. En cambio, si el vector de
+# tiempo tiene un número de puntos impar, el vector de frecuencia se
+# elabora a partir del cociente entre la longitud del vector de
+# tiempo y el último valor del mismo, como punto final en el vector
+# de frecuencias, menos uno, y el número de puntos será igual a la
+# longitud del vector de tiempo.
+
+def hertzs(time_len, last_time): # requiere del módulo NumPy (np).
+    if time_len%2 == 0: # se ejecuta si la longitud es un número par.
+        hz = np.linspace(0,
+                        time_len/last_time,
+                        time_len + 1) # vector de frecuencias.
+        return hz # devuelve el vector de frecuencias.
+    else: # se ejecuta si la longitud es un número impar.
+        hz = np.linspace(0,
+                         (time_len/last_time)-1,
+                         time_len) # vector de frecuencias.
+        return hz # devuelve el vector de frecuencias.
+
+# - files_format(file_names): Requiere del módulo os. Devuelve el
+# formato (en minúsculas) de los archivos de la lista "file_names".
+# Si no todos tienen el mismo formato, o si no es uno de los
+# reconocidos (FORMATS), da un error ValueError.
+
+def files_format(file_names): # requiere del módulo os.
+    formats = set(os.path.splitext(file_name)[1][1:].lower()
+                  for file_name in file_names) # formatos de los archivos.
+    if len(formats) != 1: # se ejecuta si no todos los archivos tienen el mismo formato.
+        raise ValueError("multiple file formats detected: " +
+                         ", ".join(sorted(formats))) # error.
+    file_format = formats.pop() # formato de todos los archivos.
+    if file_format not in FORMATS: # se ejecuta si el formato no es uno de los reconocidos.
+        raise ValueError("file format '" + file_format +
+                         "' can't be processed") # error.
+    return file_format # devuelve el formato.
+
+# - probe_files(file_format, file_names): Requiere del módulo
+# signal_io_ES. Lee la descripción (no los valores) de los archivos de
+# señales de la lista "file_names", y devuelve el número de puntos de
+# la señal más larga, el último valor de su vector de tiempo, su tasa
+# de muestreo y el número de canales del primero de los archivos (ver
+# el script template_gen_ES.py).
+
+def probe_files(file_format, file_names): # requiere del módulo signal_io_ES.
+    max_pnts = 0 # variable que contendrá cuál es el mayor número de puntos.
+    max_last_time = 0 # variable que contendrá el último valor del vector de tiempo de la señal con más puntos.
+    sampling_rate = 0 # variable que contendrá la tasa de muestreo de la señal con más puntos.
+    no_channels = 0 # variable que contendrá cuál es el número de canales.
+    for file_idx, file_name in enumerate(file_names): # bucle que itera sobre cada archivo.
+        time_len, last_time, file_rate, file_channels = signal_info(file_format = file_format,
+                                                                    file_name = file_name) # se lee la descripción de la señal más larga del archivo.
+        if time_len > max_pnts: # se ejecuta si la longitud de la señal es mayor que la variable max_pnts.
+            max_pnts = time_len # max_pnts se sobreescribe con esa longitud.
+            max_last_time = last_time # se guarda el último valor del vector de tiempo.
+            sampling_rate = file_rate # se registra su tasa de muestreo.
+        if file_idx == 0: # se ejecuta si el bucle está iterando sobre el primer archivo.
+            no_channels = file_channels # número de señales en el archivo (número de canales).
+    return max_pnts, max_last_time, sampling_rate, no_channels # devuelve la descripción de los archivos.
+
+# - template_width(mode, max_pnts, max_last_time, limit_freq):
+# Requiere del módulo NumPy (np). Devuelve el número de frecuencias
+# que se calculan para hacer las plantillas: las que están por debajo
+# de "limit_freq" si "mode" es "first_frequencies", o las de la
+# primera mitad del dominio de frecuencia si es "cumulative_sum".
+
+def template_width(mode, max_pnts, max_last_time, limit_freq = None): # requiere del módulo NumPy (np).
+    if mode == "first_frequencies": # se ejecuta si se usan las 'n' primeras frecuencias.
+        hz = hertzs(time_len = max_pnts,
+                    last_time = max_last_time) # se genera el vector de frecuencias a partir del vector de tiempo.
+        return np.sum(hz < limit_freq) # devuelve el número de frecuencias por debajo de la frecuencia límite.
+    if max_pnts%2 == 0: # se ejecuta si el número de puntos de la señal es par.
+        return int(max_pnts/2) # devuelve la mitad del número máximo de puntos de las señales.
+    return int(max_pnts/2)+1 # devuelve la mitad del número máximo de puntos de las señales más uno.
+
+# - decimation_factor(sampling_rate, limit_freq): Devuelve el mayor
+# factor por el que se pueden diezmar las señales con la tasa de
+# muestreo "sampling_rate" para que la nueva tasa de muestreo sea al
+# menos DECIMATION_MARGIN veces la frecuencia límite "limit_freq" (de
+# modo que las frecuencias de las plantillas quedan por debajo del 80%
+# de la nueva frecuencia de Nyquist, donde el filtro de cada etapa no
+# las atenúa). Si no se pueden diezmar, devuelve 1.
+
+def decimation_factor(sampling_rate, limit_freq):
+    if not limit_freq > 0 or not sampling_rate > 0: # se ejecuta si no hay frecuencia límite o tasa de muestreo.
+        return 1 # no se diezman las señales.
+    return max(int(sampling_rate // (DECIMATION_MARGIN*limit_freq)), 1) # devuelve el factor.
+
+# - transform_points(max_pnts, max_last_time, sampling_rate,
+# decimation, exact_length): Requiere del módulo spectrum_ES. Devuelve
+# el número de puntos de la transformada de Fourier de las plantillas
+# (el que devuelve fast_length() del módulo spectrum_ES para la señal
+# más larga, de "max_pnts" puntos, o, si "exact_length" es True, ese
+# mismo número redondeado a un múltiplo de "decimation"), el número
+# de puntos de la transformada de las señales diezmadas por
+# "decimation" (el mismo si es 1) y el último valor del vector de
+# tiempo de la señal más larga rellena con ceros (y diezmada) hasta
+# ese número de puntos, con el que se eligen las frecuencias de las
+# plantillas (ver template_width()).
+
+def transform_points(max_pnts, max_last_time, sampling_rate, decimation = 1, exact_length = False): # requiere del módulo spectrum_ES.
+    if exact_length: # se ejecuta si la transformada tiene los puntos de la señal más larga.
+        fft_pnts = decimation*(-(-max_pnts//decimation)) # número de puntos de la transformada de Fourier (múltiplo del factor).
+    else: # se ejecuta si se elige un número de puntos eficiente.
+        fft_pnts = fast_length(n = max_pnts,
+                               factor = decimation) # número de puntos de la transformada de Fourier.
+    dec_pnts = fft_pnts//decimation # número de puntos de la transformada de las señales diezmadas (o sin diezmar).
+    fft_last_time = max_last_time # último valor del vector de tiempo de la señal con más puntos.
+    if dec_pnts != max_pnts: # se ejecuta si la transformada no tiene los puntos de la señal más larga.
+        fft_last_time = (max_last_time - (max_pnts - 1)/sampling_rate +
+                         (dec_pnts - 1)*decimation/sampling_rate) # último valor del vector de tiempo de la señal rellena con ceros (y diezmada).
+    return fft_pnts, dec_pnts, fft_last_time # devuelve los números de puntos y el último valor del vector de tiempo.
+
+# - template_lengths(mean_matrix, mode, no_cols, prop): Requiere del
+# módulo NumPy (np). Devuelve el número de frecuencias de la plantilla
+# de cada canal (una fila de "mean_matrix" por canal). Si "mode" es
+# "cumulative_sum", es el número de frecuencias con el que se alcanza
+# la proporción "prop" de la suma de las amplitudes de la fila; si es
+# "first_frequencies", todas las plantillas tienen "no_cols"
+# frecuencias.
+
+def template_lengths(mean_matrix, mode, no_cols, prop = None): # requiere del módulo NumPy (np).
+    templ_lengths = np.zeros(len(mean_matrix), dtype = int) # vector vacío con el número de frecuencias de la plantilla de cada canal.
+    for row_idx, row in enumerate(mean_matrix): # bucle que itera sobre cada fila de la matriz de las medias de las frecuencias.
+        if mode == "cumulative_sum": # se ejecuta si se quiere crear las plantillas considerando la suma acumulada de las amplitudes.
+            one_p = np.sum(row) # suma total de todas las amplitudes de las frecuencias de una señal promedio.
+            wanted_cumsum = one_p * prop # proporción de la suma calculada a partir de la proporción introducida.
+            idx = np.sum(np.cumsum(row) < wanted_cumsum) + 1 # índice del valor a partir del que se alcanza la proporción de la suma acumulada.
+            templ_lengths[row_idx] = idx # número de frecuencias de la plantilla del canal.
+        else: # se ejecuta si se quiere crear las plantillas usando los datos de las 'n' primeras frecuencias.
+            templ_lengths[row_idx] = no_cols # número de frecuencias de la plantilla del canal.
+    return templ_lengths # devuelve el número de frecuencias de cada plantilla.
+
+# - build_templates(file_names, mode, limit_freq, prop, workers, dtype,
+# info, decimate, exact_length, fft_workers, timings): Requiere de los módulos NumPy (np), os, time,
+# signal_io_ES, spectrum_ES, template_stats_ES y template_store_ES. Genera las plantillas a
+# partir de los archivos de señales de la lista "file_names" (todos
+# con el mismo formato), y devuelve el diccionario de plantillas (ver
+# make_bundle() en el módulo template_store_ES). El argumento "mode"
+# es "first_frequencies" (en cuyo caso hay que indicar "limit_freq")
+# o "cumulative_sum" (en cuyo caso hay que indicar "prop"). Los
+# argumentos "workers" y "dtype" son el número de procesos que leen
+# los archivos y la precisión de las plantillas (ver build_stats() en
+# el módulo template_stats_ES). El argumento opcional "info" es lo que
+# devuelve probe_files(), si ya se ha leído la descripción de los
+# archivos. Si "decimate" es True (solo con "first_frequencies"), las
+# señales se diezman antes de la transformada de Fourier (ver
+# decimation_factor()). La transformada de Fourier se calcula con el
+# número de puntos que devuelve transform_points() (según
+# "exact_length"), y con "fft_workers" hilos en cada proceso (ver la
+# clase SpectrumPlan en el módulo spectrum_ES). Si algún argumento no
+# es válido, da un error ValueError. Las plantillas incluyen las
+# medias y M2 de todas las frecuencias y el nombre de los archivos,
+# para poder actualizarlas después con update_templates(). Si se
+# indica el diccionario "timings", se guarda en él la duración de la
+# lectura de la descripción de los archivos ("probe", si no se indica
+# "info") y del cálculo final de las plantillas ("reduce"), sumada a
+# la de la lectura, la transformada de Fourier y la actualización de
+# las medias y M2 de los archivos (ver build_stats() en el módulo
+# template_stats_ES, que solo las mide con un proceso).
+
+def build_templates(file_names, mode, limit_freq = None, prop = None,
+                    workers = 1, dtype = np.float64, info = None, decimate = False,
+                    exact_length = False, fft_workers = 1, timings = None): # requiere de los módulos NumPy (np), os, time, signal_io_ES, spectrum_ES, template_stats_ES y template_store_ES.
+    if len(file_names) == 0: # se ejecuta si no hay archivos.
+        raise ValueError("no signal files given") # error.
+    if mode not in MODES: # se ejecuta si la forma de elegir las frecuencias no es una de las reconocidas.
+        raise ValueError("mode must be one of: " + ", ".join(MODES)) # error.
+    if mode == "first_frequencies" and limit_freq is None: # se ejecuta si falta la frecuencia límite.
+        raise ValueError("first_frequencies mode requires limit_freq") # error.
+    if mode == "cumulative_sum" and (prop is None or prop < 0 or prop > 1): # se ejecuta si la proporción no es válida.
+        raise ValueError("cumulative_sum mode requires a prop between 0 and 1") # error.
+    if decimate and mode != "first_frequencies": # se ejecuta si se quieren diezmar las señales sin frecuencia límite.
+        raise ValueError("decimation requires first_frequencies mode") # error.
+    file_format = files_format(file_names = file_names) # formato de los archivos.
+    if info is None: # se ejecuta si no se ha leído la descripción de los archivos.
+        start = time.perf_counter() # momento de inicio.
+        info = probe_files(file_format = file_format,
+                           file_names = file_names) # se lee la descripción de los archivos.
+        if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+            timings["probe"] = time.perf_counter() - start # duración de la lectura de la descripción.
+    max_pnts, max_last_time, sampling_rate, no_channels = info # descripción de los archivos.
+    decimation = 1 # factor por el que se diezman las señales.
+    band = 0.0 # frecuencia límite relativa que se conserva al diezmarlas.
+    if decimate: # se ejecuta si se diezman las señales.
+        decimation = decimation_factor(sampling_rate = sampling_rate,
+                                       limit_freq = limit_freq) # factor por el que se diezman las señales.
+    if decimation > 1: # se ejecuta si se pueden diezmar las señales.
+        band = limit_freq/sampling_rate # frecuencia límite relativa.
+    fft_pnts, dec_pnts, fft_last_time = transform_points(max_pnts = max_pnts,
+                                                         max_last_time = max_last_time,
+                                                         sampling_rate = sampling_rate,
+                                                         decimation = decimation,
+                                                         exact_length = exact_length) # número de puntos de la transformada de Fourier.
+    no_cols = template_width(mode = mode,
+                             max_pnts = dec_pnts,
+                             max_last_time = fft_last_time,
+                             limit_freq = limit_freq) # número de frecuencias que se calculan.
+    stats = build_stats(file_format = file_format,
+                        file_names = list(file_names),
+                        n = max_pnts,
+                        k = no_cols,
+                        no_channels = no_channels,
+                        workers = workers,
+                        dtype = dtype,
+                        decimation = decimation_stages(factor = decimation,
+                                                       band = band),
+                        fft_pnts = fft_pnts,
+                        fft_workers = fft_workers,
+                        timings = timings) # se calculan las medias y desviaciones estándar de las plantillas.
+    start = time.perf_counter() # momento de inicio del cálculo final.
+    mean_matrix = stats.mean # matriz de las medias de las amplitudes (dominio de frecuencia promedio por canal).
+    if mode == "first_frequencies": # se ejecuta si se usan las 'n' primeras frecuencias.
+        params = {"mode": mode,
+                  "limit_freq": limit_freq} # parámetros de las plantillas.
+    else: # se ejecuta si se usa la suma acumulada de las amplitudes.
+        params = {"mode": mode,
+                  "proportion": prop} # parámetros de las plantillas.
+    params["file_format"] = file_format # formato de los archivos de señales.
+    params["no_files"] = len(file_names) # número de archivos usados para hacer las plantillas.
+    params["dtype"] = np.dtype(dtype).name # precisión con la que se han calculado las plantillas.
+    if decimation > 1: # se ejecuta si se han diezmado las señales.
+        params["effective_rate"] = sampling_rate/decimation # tasa de muestreo de las señales diezmadas.
+    bundle = make_bundle(means = mean_matrix,
+                         stds = stats.std(),
+                         lengths = template_lengths(mean_matrix = mean_matrix,
+                                                    mode = mode,
+                                                    no_cols = no_cols,
+                                                    prop = prop),
+                         channel_ids = np.arange(1, no_channels + 1),
+                         max_pnts = max_pnts,
+                         no_channels = no_channels,
+                         sampling_rate = sampling_rate,
+                         params = params,
+                         stats = stats,
+                         sources = [os.path.basename(file_name)
+                                    for file_name in file_names],
+                         decimation = decimation,
+                         decimation_band = band,
+                         fft_pnts = fft_pnts) # plantillas.
+    if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+        timings["reduce"] = timings.get("reduce", 0.0) + time.perf_counter() - start # duración del cálculo final de las plantillas.
+    return bundle # devuelve las plantillas.
+
+# - update_templates(bundle, add_files, remove_files, workers,
+# fft_workers):
+# Requiere de los módulos NumPy (np), os, json, signal_io_ES,
+# spectrum_ES, template_stats_ES y template_store_ES. Devuelve el
+# diccionario de
+# plantillas "bundle" (el que devuelve build_templates() o
+# load_templates()) actualizado: sin las amplitudes de los archivos de
+# señales de la lista "remove_files" y con las de los de "add_files",
+# como si se hubieran generado con todos los archivos acumulados. Solo
+# se leen los archivos de las dos listas (los nuevos, repartidos entre
+# "workers" procesos, ver build_stats() en el módulo
+# template_stats_ES), de modo que el tiempo de cálculo no depende del
+# número de archivos ya acumulados. Los parámetros (forma de elegir
+# las frecuencias, precisión, diezmado, número de puntos de la
+# transformada de Fourier, etc.) son los de las plantillas, y
+# "fft_workers" es el número de hilos de la transformada rápida.
+
+# Los archivos se identifican por su nombre (sin la carpeta), y los
+# que se quitan tienen que ser los mismos que se acumularon (si han
+# cambiado, las medias y desviaciones resultantes no serían las de
+# los archivos que quedan). La transformada de Fourier se sigue
+# calculando con el mismo número de puntos que las plantillas: los archivos
+# nuevos no pueden tener más puntos (ni otro número de canales u otra
+# tasa de muestreo), y si se quita el archivo más largo, las
+# plantillas no se acortan. En esos casos hay que volver a generar las
+# plantillas desde el principio con build_templates().
+
+# Si las plantillas no tienen las medias y M2 acumuladas (archivos de
+# la versión 1), si un archivo nuevo ya estaba acumulado o uno que se
+# quita no lo estaba, si los archivos no son compatibles con las
+# plantillas, o si se quitan todos los archivos, da un error
+# ValueError.
+
+def update_templates(bundle, add_files = (), remove_files = (), workers = 1, fft_workers = 1): # requiere de los módulos NumPy (np), os, json, signal_io_ES, spectrum_ES, template_stats_ES y template_store_ES.
+    if "count" not in bundle: # se ejecuta si las plantillas no tienen las medias y M2 acumuladas.
+        raise ValueError("templates have no stored statistics; " +
+                         "rebuild them from all signal files") # error.
+    add_files = list(add_files) # archivos que se añaden.
+    remove_files = list(remove_files) # archivos que se quitan.
+    if len(add_files) + len(remove_files) == 0: # se ejecuta si no hay archivos.
+        raise ValueError("no signal files given") # error.
+    params = json.loads(bundle["params"]) # parámetros de las plantillas.
+    file_format = files_format(file_names = add_files + remove_files) # formato de los archivos.
+    if file_format != params["file_format"]: # se ejecuta si el formato no es el de las plantillas.
+        raise ValueError("templates were built from " + params["file_format"] +
+                         " files, not " + file_format) # error.
+    sources = [str(source) for source in bundle["sources"]] # archivos acumulados.
+    remove_names = [os.path.basename(file_name) for file_name in remove_files] # nombre de los archivos que se quitan.
+    add_names = [os.path.basename(file_name) for file_name in add_files] # nombre de los archivos que se añaden.
+    for name in remove_names: # bucle que itera sobre los archivos que se quitan.
+        if name not in sources or remove_names.count(name) > 1: # se ejecuta si el archivo no está acumulado (o se quita dos veces).
+            raise ValueError(name + " is not in the templates") # error.
+    kept = [source for source in sources if source not in remove_names] # archivos que quedan.
+    for name in add_names: # bucle que itera sobre los archivos que se añaden.
+        if name in kept or add_names.count(name) > 1: # se ejecuta si el archivo ya está acumulado (o se añade dos veces).
+            raise ValueError(name + " is already in the templates") # error.
+    max_pnts = int(bundle["max_pnts"]) # número de puntos de la señal más larga.
+    fft_pnts = int(bundle["fft_pnts"]) # número de puntos de la transformada de Fourier.
+    no_channels = int(bundle["no_channels"]) # número de canales.
+    sampling_rate = float(bundle["sampling_rate"]) # tasa de muestreo de las plantillas.
+    for file_name in add_files + remove_files: # bucle que comprueba cada archivo.
+        time_len, last_time, file_rate, file_channels = signal_info(file_format = file_format,
+                                                                    file_name = file_name) # se lee la descripción del archivo.
+        if time_len > max_pnts or file_channels != no_channels or not np.isclose(file_rate, sampling_rate): # se ejecuta si el archivo no es compatible con las plantillas.
+            raise ValueError(os.path.basename(file_name) + " (" + str(time_len) +
+                             " points, " + str(file_channels) + " channels, " +
+                             str(file_rate) + " Hz) doesn't fit templates of " +
+                             str(max_pnts) + " points, " + str(no_channels) +
+                             " channels, " + str(sampling_rate) + " Hz; " +
+                             "rebuild them from all signal files") # error.
+    stats = restore_stats(count = bundle["count"],
+                          mean = bundle["stats_mean"],
+                          m2 = bundle["stats_m2"]) # acumulador de las plantillas.
+    no_cols = np.shape(stats.mean)[1] # número de frecuencias que se calculan.
+    decimation = decimation_stages(factor = bundle["decimation"],
+                                   band = bundle["decimation_band"]) # etapas con las que se diezmaron las señales.
+    ampls = np.zeros([no_channels,no_cols], dtype = stats.mean.dtype) # matriz vacía que contendrá las amplitudes de cada archivo.
+    plan = SpectrumPlan(n = decimated_length(n = fft_pnts,
+                                             decimation = decimation),
+                        k = no_cols,
+                        dtype = stats.mean.dtype,
+                        workers = fft_workers) # método con el que se calculan las amplitudes.
+    for file_name in remove_files: # bucle que itera sobre los archivos que se quitan.
+        file_amplitudes(file_format = file_format,
+                        file_name = file_name,
+                        n = max_pnts,
+                        k = no_cols,
+                        no_channels = no_channels,
+                        dtype = stats.mean.dtype,
+                        out = ampls,
+                        decimation = decimation,
+                        plan = plan,
+                        fft_pnts = fft_pnts) # se calculan las amplitudes del archivo.
+        stats.remove(ampls = ampls) # se quitan del acumulador.
+    if len(add_files) > 0: # se ejecuta si se añaden archivos.
+        stats.merge(other = build_stats(file_format = file_format,
+                                        file_names = add_files,
+                                        n = max_pnts,
+                                        k = no_cols,
+                                        no_channels = no_channels,
+                                        workers = workers,
+                                        dtype = stats.mean.dtype,
+                                        decimation = decimation,
+                                        fft_pnts = fft_pnts,
+                                        fft_workers = fft_workers)) # se combinan las medias y M2 de los archivos nuevos con las de las plantillas.
+    if stats.count == 0: # se ejecuta si no queda ningún archivo.
+        raise ValueError("templates can't be left without signal files") # error.
+    params["no_files"] = stats.count # número de archivos usados para hacer las plantillas.
+    return make_bundle(means = stats.mean,
+                       stds = stats.std(),
+                       lengths = template_lengths(mean_matrix = stats.mean,
+                                                  mode = params["mode"],
+                                                  no_cols = no_cols,
+                                                  prop = params.get("proportion")),
+                       channel_ids = bundle["channel_ids"],
+                       max_pnts = max_pnts,
+                       no_channels = no_channels,
+                       sampling_rate = sampling_rate,
+                       params = params,
+                       stats = stats,
+                       sources = kept + add_names,
+                       decimation = bundle["decimation"],
+                       decimation_band = bundle["decimation_band"],
+                       fft_pnts = fft_pnts) # devuelve las plantillas actualizadas.
+
+# - check_update(): Requiere de los módulos NumPy (np), os, json y
+# tempfile, y de los módulos propios que usan build_templates() y
+# update_templates(). Con archivos de sample_files() (ver el módulo
+# template_stats_ES) en una carpeta temporal, con y sin diezmar las
+# señales, genera unas plantillas con parte de los archivos, las
+# escribe y las vuelve a leer (como hace el script template_gen_ES.py
+# con "--update"), comprueba que el acumulador guardado es el mismo
+# (número de archivos, medias y M2), y comprueba que, al añadir el
+# resto de archivos con update_templates() (con 2 procesos), y al
+# quitar después algunos, las plantillas son las mismas que las que
+# se generan desde el principio con los archivos que quedan. Si no es
+# así, da un error AssertionError. Como build_templates() crea
+# procesos, solo se puede llamar desde el bloque que se ejecuta al
+# lanzar un script (no al importarlo).
+
+def check_update(): # requiere de los módulos NumPy (np), os, json y tempfile.
+    with tempfile.TemporaryDirectory() as dir_name: # se crea la carpeta temporal (se borra al terminar).
+        file_names = sample_files(dir_name = dir_name,
+                                  no_files = 8) # archivos de señales (el primero es el más largo).
+        templ_dir = os.path.join(dir_name, "templates") # carpeta de las plantillas.
+        os.makedirs(templ_dir) # se crea la carpeta.
+        for decimate in [False, True]: # bucle que itera sobre las plantillas sin y con diezmado.
+            first = build_templates(file_names = file_names[0:5],
+                                    mode = "first_frequencies",
+                                    limit_freq = 40,
+                                    decimate = decimate) # plantillas con parte de los archivos.
+            save_templates(templ_dir = templ_dir,
+                           bundle = first) # se escriben las plantillas.
+            stored = load_templates(templ_dir = templ_dir) # se vuelven a leer.
+            restored = restore_stats(count = stored["count"],
+                                     mean = stored["stats_mean"],
+                                     m2 = stored["stats_m2"]) # acumulador guardado.
+            assert restored.count == first["count"] == 5, "stored count differs" # error si el número de archivos no es el mismo.
+            assert np.array_equal(restored.mean, first["stats_mean"]), "stored mean differs" # error si las medias no son las mismas.
+            assert np.array_equal(restored.m2, first["stats_m2"]), "stored m2 differs" # error si M2 no es la misma.
+            updated = update_templates(bundle = stored,
+                                       add_files = file_names[5:],
+                                       workers = 2) # se añaden los demás archivos.
+            for bundle, kept in [(updated, file_names),
+                                 (update_templates(bundle = updated,
+                                                   remove_files = file_names[2:4]),
+                                  file_names[0:2] + file_names[4:])]: # bucle que itera sobre las plantillas actualizadas y los archivos que deberían tener.
+                rebuilt = build_templates(file_names = kept,
+                                          mode = "first_frequencies",
+                                          limit_freq = 40,
+                                          decimate = decimate) # plantillas generadas desde el principio.
+                assert sorted(bundle["sources"]) == sorted(rebuilt["sources"]), "updated sources differ" # error si los archivos no son los mismos.
+                assert bundle["count"] == rebuilt["count"], "updated count differs" # error si el número de archivos no es el mismo.
+                assert json.loads(bundle["params"]) == json.loads(rebuilt["params"]), "updated params differ" # error si los parámetros no son los mismos.
+                assert np.array_equal(bundle["lengths"], rebuilt["lengths"]), "updated lengths differ" # error si las longitudes no son las mismas.
+                for key in ["means", "stds", "stats_mean", "stats_m2"]: # bucle que itera sobre cada matriz.
+                    assert np.allclose(bundle[key], rebuilt[key], rtol = 1e-10, atol = 1e-12), "updated " + key + " differs" # error si la matriz no es la misma.
+
+# - check_float32(): Requiere de los módulos NumPy (np), os y
+# tempfile, y de los módulos propios que usan build_templates() y la
+# clase Comparator. Con archivos de sample_files() (ver el módulo
+# template_stats_ES) en una carpeta temporal, con y sin diezmar las
+# señales, genera las mismas plantillas en precisión simple (float32)
+# y doble (float64), y compara con las dos los mismos archivos, con la
+# media aritmética y con la ponderada. Comprueba que las plantillas
+# tienen las mismas longitudes, que la diferencia de las medias es
+# como mucho 1e-6 veces la mayor media, la de las desviaciones, 5e-6
+# veces la mayor desviación, y la de los resultados del comparador,
+# 5e-6 (sobre 1). La transformada de Fourier en precisión simple
+# tiene un error relativo del orden de épsilon (6e-8) por log2(n), que
+# la media de Welford no aumenta; las desviaciones se calculan
+# restando valores parecidos, y su error relativo crece en las
+# frecuencias con desviaciones muy pequeñas (por eso se compara con la
+# mayor desviación); y la proporción de similitud de cada frecuencia,
+# exp(-z^2/2), cambia como mucho 0,61 veces lo que cambia z. Si no es
+# así, da un error AssertionError; si no, devuelve la mayor diferencia
+# de las medias, de las desviaciones y de los resultados. Como
+# build_templates() crea procesos, solo se puede llamar desde el bloque
+# que se ejecuta al lanzar un script (no al importarlo).
+
+def check_float32(): # requiere de los módulos NumPy (np), os y tempfile.
+    worst = {"means": 0.0, "stds": 0.0, "scores": 0.0} # mayores diferencias.
+    with tempfile.TemporaryDirectory() as dir_name: # se crea la carpeta temporal (se borra al terminar).
+        file_names = sample_files(dir_name = dir_name,
+                                  no_files = 12) # archivos de señales (el primero es el más largo).
+        for decimate in [False, True]: # bucle que itera sobre las plantillas sin y con diezmado.
+            bundles = [build_templates(file_names = file_names[0:8],
+                                       mode = "first_frequencies",
+                                       limit_freq = 40,
+                                       dtype = dtype,
+                                       decimate = decimate)
+                       for dtype in [np.float64, np.float32]] # plantillas en precisión doble y simple.
+            double, single = bundles # plantillas en precisión doble y simple.
+            assert single["means"].dtype == np.float32, "float32 templates are " + str(single["means"].dtype) # error si las plantillas no están en precisión simple.
+            assert np.array_equal(single["lengths"], double["lengths"]), "float32 template lengths differ" # error si las longitudes no son las mismas.
+            errors = {"means": np.max(np.abs(single["means"] - double["means"]))/np.max(double["means"]),
+                      "stds": np.max(np.abs(single["stds"] - double["stds"]))/np.max(double["stds"])} # diferencias relativas a la mayor media y a la mayor desviación.
+            errors["scores"] = max(np.max(np.abs(Comparator(template = single, is_arith = is_arith).score_file(what_file = file_name) -
+                                                 Comparator(template = double, is_arith = is_arith).score_file(what_file = file_name)))
+                                   for is_arith in ["Y", "N"]
+                                   for file_name in file_names) # diferencia de los resultados del comparador.
+            for key, tol in [("means", 1e-6), ("stds", 5e-6), ("scores", 5e-6)]: # bucle que itera sobre cada diferencia.
+                assert errors[key] <= tol, ("float32 " + key + " error " + str(errors[key]) +
+                                            " > " + str(tol)) # error si la diferencia es mayor que la permitida.
+                worst[key] = max(worst[key], float(errors[key])) # mayor diferencia.
+    return worst # devuelve las mayores diferencias.
+
+if __name__ == "__main__": # se ejecuta solo si se lanza este módulo (no si se importa).
+    check_update() # se comprueba la actualización de las plantillas.
+    print("update: ok") # mensaje de información.
+    print("float32: max error " + str(check_float32())) # se comprueba la precisión simple.
@@ -0,0 +1,376 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene el cálculo de la media y la desviación
+# estándar de las amplitudes del dominio de frecuencia con las
+# que se generan las plantillas (script template_gen_ES.py).
+
+# En lugar de guardar las amplitudes de todos los archivos en
+# una matriz tridimensional (canales x archivos x frecuencias)
+# y calcular al final la media y la desviación estándar, se
+# actualizan la media y la suma de los cuadrados de las
+# diferencias con respecto a la media (M2) cada vez que se lee
+# un archivo, siguiendo el algoritmo de Welford:
+
+# n = n + 1
+# delta = x - media
+# media = media + delta/n
+# M2 = M2 + delta*(x - media)
+
+# Al final, la desviación estándar es la raíz cuadrada de M2/n
+# (la misma que calcula np.std()). Así, la memoria que se usa
+# solo depende del número de canales y de frecuencias, y no del
+# número de archivos con los que se hacen las plantillas.
+
+# Además, los archivos se pueden repartir entre varios procesos
+# que se ejecutan en paralelo. Cada proceso acumula la media y M2
+# de su parte de los archivos, y al final se combinan los
+# resultados parciales (A y B) con las fórmulas de Chan et al.:
+
+# n = nA + nB
+# delta = mediaB - mediaA
+# media = mediaA + delta*nB/n
+# M2 = M2A + M2B + delta^2*nA*nB/n
+
+# El algoritmo de Welford también se puede deshacer, para quitar
+# las amplitudes de un archivo (x) que ya se habían acumulado:
+
+# n = n - 1
+# media' = media - (x - media)/n
+# M2 = M2 - (x - media')*(x - media)
+
+# Como la media y M2 (con el número de archivos) bastan para seguir
+# acumulando, se guardan junto con las plantillas (ver el módulo
+# template_store_ES), y así se pueden añadir o quitar archivos sin
+# volver a leer los demás (ver update_templates() en el módulo
+# template_builder_ES).
+
+# Al ejecutar este módulo, check_stats() comprueba que quitar un
+# archivo deshace su actualización y que el resultado con varios
+# procesos es el mismo que con uno solo (ver también check_update() en
+# el módulo template_builder_ES).
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - os: Se ha usado para obtener la localización de los archivos de
+# señales de las comprobaciones.
+# - time: Se ha usado para medir la duración de cada etapa.
+# - tempfile: Se ha usado para crear la carpeta temporal de las
+# comprobaciones.
+# - concurrent.futures: Se ha usado para repartir los archivos de
+# señales entre varios procesos.
+# - numpy (np): Se ha usado para hacer cálculo matricial.
+# - spectrum_ES y signal_io_ES: Módulos propios con el cálculo del
+# dominio de frecuencia y la lectura de los archivos de señales.
+
+import os
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from spectrum_ES import amplitude_spectrum, decimated_length, SpectrumPlan
+from signal_io_ES import signal_matrix
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - RunningStats(no_channels, no_freqs, dtype): Requiere del módulo
+# NumPy (np). Acumula la media y M2 de las amplitudes de cada
+# frecuencia de cada canal. Sus argumentos son el número de canales,
+# el número de frecuencias de las plantillas y el tipo de número de
+# las matrices (np.float64 por defecto, o np.float32). Sus atributos son
+# "count" (número de archivos acumulados), "mean" (matriz de medias,
+# con una fila por canal) y "m2" (matriz con la suma de los cuadrados
+# de las diferencias con respecto a la media). Sus métodos son:
+
+# - update(ampls): incorpora las amplitudes de un archivo. El
+# argumento "ampls" es una matriz con una fila por canal y una
+# columna por frecuencia.
+# - merge(other): incorpora los resultados de otro acumulador
+# (por ejemplo, el de otro proceso).
+# - remove(ampls): quita las amplitudes de un archivo que ya se
+# habían incorporado con update() o merge().
+# - std(): devuelve la matriz de desviaciones estándar.
+
+class RunningStats: # requiere del módulo NumPy (np).
+    def __init__(self, no_channels, no_freqs, dtype = np.float64):
+        self.count = 0 # número de archivos acumulados.
+        self.mean = np.zeros([no_channels,no_freqs], dtype = dtype) # matriz de medias.
+        self.m2 = np.zeros([no_channels,no_freqs], dtype = dtype) # matriz de sumas de cuadrados de las diferencias con la media.
+
+    def update(self, ampls):
+        self.count = self.count + 1 # aumenta en uno el número de archivos.
+        delta = ampls - self.mean # diferencia con la media anterior.
+        self.mean += delta/self.count # se actualiza la media.
+        self.m2 += delta*(ampls - self.mean) # se actualiza M2 con la diferencia con la media nueva.
+
+    def merge(self, other):
+        count = self.count + other.count # número total de archivos.
+        if other.count == 0: # se ejecuta si el otro acumulador está vacío.
+            return # no hay nada que incorporar.
+        delta = other.mean - self.mean # diferencia entre las medias de los dos acumuladores.
+        self.m2 += other.m2 + delta**2*(self.count*other.count/count) # se combinan las M2.
+        self.mean += delta*(other.count/count) # se combinan las medias.
+        self.count = count # se actualiza el número de archivos.
+
+    def remove(self, ampls):
+        if self.count <= 1: # se ejecuta si solo queda ese archivo.
+            self.count = 0 # ya no hay archivos acumulados.
+            self.mean[:] = 0 # se vacía la matriz de medias.
+            self.m2[:] = 0 # se vacía la matriz de M2.
+            return # no hay nada más que quitar.
+        self.count = self.count - 1 # disminuye en uno el número de archivos.
+        delta = ampls - self.mean # diferencia con la media anterior.
+        self.mean -= delta/self.count # se deshace la actualización de la media.
+        self.m2 -= delta*(ampls - self.mean) # se deshace la actualización de M2 con la diferencia con la media nueva.
+        np.maximum(self.m2, 0, out = self.m2) # M2 no puede ser negativa (por los errores de redondeo).
+
+    def std(self):
+        return np.sqrt(self.m2/self.count) # devuelve la desviación estándar (la misma que np.std()).
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - restore_stats(count, mean, m2): Requiere del módulo NumPy (np).
+# Devuelve un acumulador RunningStats con el número de archivos
+# "count" y copias de las matrices "mean" y "m2" (por ejemplo, las
+# guardadas en el archivo de las plantillas, que pueden estar abiertas
+# con un mapa de memoria de solo lectura).
+
+def restore_stats(count, mean, m2): # requiere del módulo NumPy (np).
+    stats = RunningStats(no_channels = np.shape(mean)[0],
+                         no_freqs = np.shape(mean)[1],
+                         dtype = mean.dtype) # se crea el acumulador vacío.
+    stats.count = int(count) # número de archivos acumulados.
+    stats.mean[:] = mean # se copia la matriz de medias.
+    stats.m2[:] = m2 # se copia la matriz de M2.
+    return stats # devuelve el acumulador.
+
+# - file_amplitudes(file_format, file_name, n, k, no_channels, dtype,
+# out, decimation, plan, fft_pnts, timings): Requiere de los módulos NumPy
+# (np), time, spectrum_ES y signal_io_ES. Lee hasta "n" puntos de cada señal
+# del archivo "file_name" y escribe en la matriz "out" (una fila por
+# canal y "k" columnas) las amplitudes de las primeras "k" frecuencias
+# de sus "no_channels" primeros canales, con una transformada de
+# Fourier de "fft_pnts" puntos ("n" si no se indica), de las señales
+# diezmadas con las etapas "decimation" si se indican (ver
+# amplitude_spectrum() en el módulo spectrum_ES), con el método del
+# objeto SpectrumPlan "plan" si se indica. Devuelve la matriz. Si se
+# indica el diccionario "timings", se suma en él la duración de la
+# lectura ("read") y de la transformada de Fourier ("fft").
+
+def file_amplitudes(file_format, file_name, n, k, no_channels,
+                    dtype = np.float64, out = None, decimation = None, plan = None,
+                    fft_pnts = None, timings = None): # requiere de los módulos NumPy (np), time, spectrum_ES y signal_io_ES.
+    start = time.perf_counter() # momento de inicio.
+    if fft_pnts is None: # se ejecuta si no se ha indicado el número de puntos de la transformada.
+        fft_pnts = n # la transformada tiene los puntos que se leen.
+    if out is None: # se ejecuta si no se ha indicado la matriz de amplitudes.
+        out = np.zeros([no_channels,k], dtype = dtype) # matriz vacía que contendrá las amplitudes.
+    signals, lengths = signal_matrix(file_format = file_format,
+                                     file_name = file_name,
+                                     n = n,
+                                     max_signals = no_channels,
+                                     dtype = dtype) # se leen las señales del archivo en una matriz (una fila por canal).
+    read_end = time.perf_counter() # momento en el que termina la lectura.
+    amplitude_spectrum(signals = signals[0:no_channels,:],
+                       n = fft_pnts,
+                       k = k,
+                       lengths = lengths[0:no_channels],
+                       out = out,
+                       decimation = decimation,
+                       plan = plan) # se calculan las amplitudes de las frecuencias de todos los canales.
+    if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+        timings["read"] = timings.get("read", 0.0) + read_end - start # duración de la lectura.
+        timings["fft"] = timings.get("fft", 0.0) + time.perf_counter() - read_end # duración de la transformada de Fourier.
+    return out # devuelve la matriz de amplitudes.
+
+# - accumulate_files(file_format, file_names, n, k, no_channels, dtype,
+# decimation, fft_pnts, fft_workers, timings):
+# Requiere de los módulos NumPy (np), time, spectrum_ES y signal_io_ES.
+# Lee uno a uno los archivos de señales de la lista "file_names"
+# (todos con el formato "file_format"), calcula las amplitudes de las
+# primeras "k" frecuencias de sus "no_channels" primeros canales
+# (leyendo hasta "n" puntos de cada señal) con una transformada de
+# Fourier de "fft_pnts" puntos ("n" si no se indica), y devuelve un acumulador
+# RunningStats con su media y M2. Las señales, la transformada de
+# Fourier y las medias y M2 se calculan con el tipo de número "dtype".
+# Si se indican las etapas "decimation", las señales se diezman antes
+# de la transformada de Fourier (ver file_amplitudes()). Las
+# amplitudes de todos los archivos se calculan con el método más
+# barato para "fft_pnts" y "k", y la transformada rápida con
+# "fft_workers" hilos (ver la clase SpectrumPlan en el módulo
+# spectrum_ES). Si se indica el diccionario "timings", se suma en él
+# la duración de la lectura ("read"), de la transformada de Fourier
+# ("fft") y de la actualización de las medias y M2 ("reduce") de
+# todos los archivos.
+
+def accumulate_files(file_format, file_names, n, k, no_channels, dtype = np.float64, decimation = None,
+                     fft_pnts = None, fft_workers = 1, timings = None): # requiere de los módulos NumPy (np), time, spectrum_ES y signal_io_ES.
+    stats = RunningStats(no_channels = no_channels,
+                         no_freqs = k,
+                         dtype = dtype) # se crea el acumulador de medias y desviaciones estándar.
+    ampls = np.zeros([no_channels,k], dtype = dtype) # matriz vacía que contendrá las amplitudes de cada archivo.
+    if fft_pnts is None: # se ejecuta si no se ha indicado el número de puntos de la transformada.
+        fft_pnts = n # la transformada tiene los puntos que se leen.
+    plan = SpectrumPlan(n = decimated_length(n = fft_pnts,
+                                             decimation = decimation),
+                        k = k,
+                        dtype = dtype,
+                        workers = fft_workers) # método con el que se calculan las amplitudes.
+    for file_name in file_names: # bucle que itera sobre los archivos de señales.
+        file_amplitudes(file_format = file_format,
+                        file_name = file_name,
+                        n = n,
+                        k = k,
+                        no_channels = no_channels,
+                        dtype = dtype,
+                        out = ampls,
+                        decimation = decimation,
+                        plan = plan,
+                        fft_pnts = fft_pnts,
+                        timings = timings) # se calculan las amplitudes de las frecuencias de todos los canales.
+        start = time.perf_counter() # momento de inicio de la actualización.
+        stats.update(ampls = ampls) # se actualizan las medias y desviaciones estándar con las amplitudes del archivo.
+        if timings is not None: # se ejecuta si se quiere la duración de cada etapa.
+            timings["reduce"] = timings.get("reduce", 0.0) + time.perf_counter() - start # duración de la actualización.
+    return stats # devuelve el acumulador.
+
+# - build_stats(file_format, file_names, n, k, no_channels, workers, dtype,
+# decimation, fft_pnts, fft_workers, timings):
+# Hace lo mismo que accumulate_files(), pero repartiendo los archivos
+# entre "workers" procesos. Los archivos se dividen en grupos
+# consecutivos (unos cuatro grupos por proceso, para que los procesos
+# que terminen antes sigan trabajando), cada proceso devuelve el
+# acumulador de su grupo, y los acumuladores se combinan en el orden
+# de los grupos. Si "workers" es 1, los archivos se leen en este
+# mismo proceso. Cada proceso usa "fft_workers" hilos en la
+# transformada rápida. Los procesos se crean de la forma por defecto del
+# sistema operativo: como el script template_gen_ES.py solo se ejecuta
+# cuando se lanza (no cuando se importa), también funciona en los
+# sistemas donde cada proceso vuelve a importar los módulos (por
+# ejemplo, en Windows). El diccionario "timings" (ver
+# accumulate_files()) solo se rellena si los archivos se leen en este
+# mismo proceso.
+
+def build_stats(file_format, file_names, n, k, no_channels, workers = 1, dtype = np.float64, decimation = None,
+                fft_pnts = None, fft_workers = 1, timings = None): # requiere del módulo concurrent.futures.
+    if workers <= 1 or len(file_names) <= 1: # se ejecuta si se va a usar un solo proceso.
+        return accumulate_files(file_format = file_format,
+                                file_names = file_names,
+                                n = n,
+                                k = k,
+                                no_channels = no_channels,
+                                dtype = dtype,
+                                decimation = decimation,
+                                fft_pnts = fft_pnts,
+                                fft_workers = fft_workers,
+                                timings = timings) # devuelve el acumulador de todos los archivos.
+    no_groups = min(len(file_names), workers*4) # número de grupos de archivos.
+    bounds = np.linspace(0,len(file_names),no_groups+1).astype(int) # límites de cada grupo de archivos.
+    groups = [file_names[bounds[i]:bounds[i+1]]
+              for i in range(no_groups)] # grupos consecutivos de archivos.
+    stats = RunningStats(no_channels = no_channels,
+                         no_freqs = k,
+                         dtype = dtype) # se crea el acumulador final.
+    with ProcessPoolExecutor(max_workers = workers) as pool: # se crean los procesos.
+        partials = pool.map(accumulate_files,
+                            [file_format]*no_groups,
+                            groups,
+                            [n]*no_groups,
+                            [k]*no_groups,
+                            [no_channels]*no_groups,
+                            [dtype]*no_groups,
+                            [decimation]*no_groups,
+                            [fft_pnts]*no_groups,
+                            [fft_workers]*no_groups) # cada proceso acumula uno de los grupos de archivos.
+        for partial in partials: # bucle que itera sobre los acumuladores de cada grupo, en orden.
+            stats.merge(other = partial) # se combina el acumulador del grupo con el final.
+    return stats # devuelve el acumulador de todos los archivos.
+
+# - sample_files(dir_name, no_files, seed): Requiere de los módulos
+# NumPy (np) y os. Escribe en la carpeta "dir_name" "no_files"
+# archivos de señales TXT de ruido blanco (4 canales, 500 Hz), el
+# primero de 1000 puntos y los demás de entre 800 y 1000, para las
+# comprobaciones, y devuelve la lista de sus localizaciones. El
+# argumento "seed" es la semilla de los números aleatorios.
+
+def sample_files(dir_name, no_files, seed = 0): # requiere de los módulos NumPy (np) y os.
+    rng = np.random.default_rng(seed) # generador de números aleatorios.
+    file_names = [] # lista vacía con las localizaciones de los archivos.
+    for file_idx in range(no_files): # bucle que itera sobre cada archivo.
+        no_pnts = 1000 if file_idx == 0 else int(rng.integers(800, 1001)) # número de puntos del archivo (el primero es el más largo).
+        data = np.column_stack((np.arange(no_pnts)/500.0,
+                                rng.standard_normal((no_pnts, 4)))) # vector de tiempo y señales.
+        file_name = os.path.join(dir_name, "s" + str(file_idx) + ".txt") # localización del archivo.
+        np.savetxt(file_name, data, delimiter = "\t") # se escribe el archivo.
+        file_names.append(file_name) # se añade a la lista.
+    return file_names # devuelve la lista de archivos.
+
+# - check_stats(): Requiere de los módulos NumPy (np), os y tempfile.
+# Comprueba que, con la precisión float64, remove() deshace update()
+# (el acumulador vuelve a tener el número de archivos, las medias y
+# M2 anteriores), también hasta vaciarlo, y que build_stats() con 2
+# procesos da las mismas medias y M2 que con uno solo, con archivos de
+# sample_files() en una carpeta temporal. Si no es así, da un error
+# AssertionError. Como build_stats() crea procesos, solo se puede
+# llamar desde el bloque que se ejecuta al lanzar un script (no al
+# importarlo).
+
+def check_stats(): # requiere de los módulos NumPy (np), os y tempfile.
+    rng = np.random.default_rng(0) # generador de números aleatorios.
+    stats = RunningStats(no_channels = 4,
+                         no_freqs = 50) # acumulador vacío.
+    files = [rng.gamma(2.0, 1.0, (4, 50)) for file_idx in range(6)] # amplitudes de cada archivo (positivas, como las reales).
+    for ampls in files: # bucle que itera sobre cada archivo.
+        before = (stats.count, stats.mean.copy(), stats.m2.copy()) # estado anterior del acumulador.
+        stats.update(ampls = ampls) # se incorpora el archivo.
+        stats.remove(ampls = ampls) # y se quita.
+        assert stats.count == before[0], "remove() doesn't restore count" # error si el número de archivos no es el anterior.
+        assert np.allclose(stats.mean, before[1], rtol = 1e-10, atol = 1e-12), "remove() doesn't restore mean" # error si las medias no son las anteriores.
+        assert np.allclose(stats.m2, before[2], rtol = 1e-10, atol = 1e-10), "remove() doesn't restore m2" # error si M2 no es la anterior.
+        stats.update(ampls = ampls) # se vuelve a incorporar el archivo.
+    assert np.allclose(stats.mean, np.mean(files, axis = 0)), "mean differs from np.mean()" # error si las medias no son las de NumPy.
+    assert np.allclose(stats.std(), np.std(files, axis = 0)), "std() differs from np.std()" # error si las desviaciones no son las de NumPy.
+    for ampls in files[::-1]: # bucle que quita los archivos, del último al primero.
+        stats.remove(ampls = ampls) # se quita el archivo.
+    assert stats.count == 0 and not np.any(stats.mean) and not np.any(stats.m2), "remove() doesn't empty the stats" # error si el acumulador no queda vacío.
+    with tempfile.TemporaryDirectory() as dir_name: # se crea la carpeta temporal (se borra al terminar).
+        file_names = sample_files(dir_name = dir_name,
+                                  no_files = 9) # archivos de señales.
+        results = [build_stats(file_format = "txt",
+                               file_names = file_names,
+                               n = 1000,
+                               k = 80,
+                               no_channels = 4,
+                               workers = workers)
+                   for workers in [1, 2]] # acumuladores con uno y con dos procesos.
+    serial, parallel = results # acumuladores con uno y con dos procesos.
+    assert serial.count == parallel.count == len(file_names), "build_stats() count differs" # error si el número de archivos no es el mismo.
+    assert np.allclose(serial.mean, parallel.mean, rtol = 1e-10, atol = 1e-12), "build_stats() mean differs with workers" # error si las medias no son las mismas.
+    assert np.allclose(serial.m2, parallel.m2, rtol = 1e-10, atol = 1e-12), "build_stats() m2 differs with workers" # error si M2 no es la misma.
+
+if __name__ == "__main__": # se ejecuta solo si se lanza este módulo (no si se importa).
+    check_stats() # se comprueba el acumulador.
+    print("stats: ok") # mensaje de información.
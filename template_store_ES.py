@@ -0,0 +1,343 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene la escritura y la lectura de las
+# plantillas, comunes a los dos scripts del algoritmo
+# (template_gen_ES.py las escribe y auto_comparator_ES.py
+# las lee).
+
+# Todas las plantillas se guardan en un solo archivo binario de
+# NumPy ("templates/templates.npz"), sin comprimir, que contiene:
+
+# - "means": matriz con las medias de las amplitudes de cada
+# frecuencia, con una fila por canal (rellena con ceros a partir
+# del número de frecuencias de la plantilla de cada canal).
+# - "stds": matriz con las desviaciones estándar, con la misma forma
+# que "means" (rellena con unos).
+# - "lengths": número de frecuencias de la plantilla de cada canal.
+# - "channel_ids": número de canal de cada fila.
+# - "max_pnts": número de puntos de la señal más larga con la que se
+# generaron las plantillas (las señales entrantes se leen hasta ese
+# número de puntos).
+# - "fft_pnts": número de puntos con el que se calculó la
+# transformada de Fourier de las señales (rellenas con ceros), y
+# "freq_step": separación entre sus frecuencias (la tasa de muestreo
+# dividida entre "fft_pnts", en Hz). La columna 'j' de las
+# plantillas es la frecuencia j*"freq_step". El comparador calcula la
+# transformada de las señales entrantes con el mismo número de
+# puntos, para que sus frecuencias sean las mismas. Las plantillas
+# anteriores a la versión 4 no los tienen, y se leen con "fft_pnts"
+# igual a "max_pnts" (redondeado a un múltiplo de "decimation").
+# - "no_channels": número de canales de los archivos de señales.
+# - "sampling_rate": tasa de muestreo de la señal más larga (Hz).
+# - "params": string en formato JSON con los parámetros con los
+# que se generaron las plantillas (modo, frecuencia límite o
+# proporción de la suma acumulada, formato y número de archivos).
+# - "decimation": factor por el que se diezmaron las señales antes
+# de la transformada de Fourier (1 si no se diezmaron), y
+# "decimation_band": frecuencia límite que se conservó al diezmarlas,
+# dividida entre la tasa de muestreo (ver decimation_stages() en el
+# módulo spectrum_ES). El comparador diezma las señales entrantes de
+# la misma forma. Las plantillas anteriores a la versión 3 no los
+# tienen, y se leen como si no se hubieran diezmado.
+# - "version": versión del formato del archivo.
+
+# Desde la versión 2, el archivo también contiene el estado del
+# acumulador de Welford con el que se calcularon las medias y las
+# desviaciones estándar (ver el módulo template_stats_ES), para poder
+# añadir archivos de señales nuevos a las plantillas, o quitar los de
+# alguno, sin volver a leer todos los demás (ver update_templates() en
+# el módulo template_builder_ES):
+
+# - "count": número de archivos acumulados.
+# - "stats_mean" y "stats_m2": matrices de medias y M2 de todas las
+# frecuencias calculadas (sin recortar a la longitud de cada
+# plantilla), con una fila por canal.
+# - "sources": nombre de cada archivo acumulado (sin la carpeta).
+
+# Los archivos de la versión 1 no los tienen, y sus plantillas solo
+# se pueden volver a generar desde el principio.
+
+# Como el archivo no está comprimido, cada matriz ocupa una parte
+# contigua del archivo, y se puede abrir con un mapa de memoria
+# (np.memmap) sin leer ni interpretar texto. Así, el comparador
+# arranca sin tener que leer las plantillas, y los procesos que
+# comparan archivos a la vez comparten las mismas páginas de
+# memoria.
+
+# Si no existe el archivo binario, se leen las plantillas en el
+# formato anterior (un archivo TXT por canal, "templ_channel<N>.txt",
+# junto con "no_cols_and_channels.txt"), ordenándolas por su número
+# de canal.
+
+# Para comparar cada archivo con varios conjuntos de plantillas a la
+# vez (por ejemplo, uno por condición o por sujeto), se pueden reunir
+# en una biblioteca: una carpeta con una subcarpeta por conjunto, que
+# contiene su archivo "templates.npz" (la carpeta "templates" que crea
+# template_gen_ES.py, con otro nombre). El nombre de cada subcarpeta
+# es el nombre del conjunto (ver load_library() y el módulo
+# library_ES).
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - os: Se ha usado para enlistar los archivos de las plantillas.
+# - json: Se ha usado para guardar los parámetros de las plantillas.
+# - struct y zipfile: Se han usado para localizar cada matriz
+# dentro del archivo de las plantillas.
+# - numpy (np): Se ha usado para escribir, leer y abrir con un mapa
+# de memoria las matrices de las plantillas.
+
+import os
+import json
+import struct
+import zipfile
+import numpy as np
+
+###################################################
+###################################################
+###                                             ###
+###              CONSTANTES USADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+BUNDLE_NAME = "templates.npz" # nombre del archivo de las plantillas.
+BUNDLE_VERSION = 4 # versión del formato del archivo de las plantillas.
+ZIP_LOCAL_HEADER = struct.Struct("<4s22xHH") # cabecera de cada archivo dentro de un ZIP (firma, longitud del nombre y del campo extra).
+ZIP_LOCAL_SIGNATURE = b"PK\x03\x04" # firma con la que empieza la cabecera de cada archivo dentro de un ZIP.
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - make_bundle(means, stds, lengths, channel_ids, max_pnts,
+# no_channels, sampling_rate, params, stats, sources, decimation,
+# decimation_band, fft_pnts): Requiere de los módulos NumPy
+# (np) y json. Devuelve el diccionario de plantillas, con las mismas
+# etiquetas que el archivo de las plantillas (el mismo que devuelve
+# load_templates()). Los argumentos "means" y "stds" son las
+# matrices de medias y desviaciones estándar (una fila por canal), y
+# "lengths" el número de frecuencias de la plantilla de cada canal;
+# las columnas que sobran en cada fila se rellenan con ceros en las
+# medias y con unos en las desviaciones. Las matrices se guardan con
+# el mismo tipo de número que "means" (float64, o float32 si las
+# plantillas se han calculado en precisión simple). El argumento
+# "params" es un diccionario con los parámetros de las plantillas.
+# Los argumentos opcionales "stats" (el acumulador RunningStats del
+# módulo template_stats_ES con el que se han calculado las medias y
+# las desviaciones) y "sources" (el nombre de cada archivo acumulado)
+# se guardan para poder actualizar las plantillas después. Los
+# argumentos opcionales "decimation" y "decimation_band" son el factor
+# por el que se han diezmado las señales y la frecuencia límite
+# relativa que se ha conservado, y "fft_pnts", el número de puntos de
+# la transformada de Fourier ("max_pnts" si no se indica).
+
+def make_bundle(means, stds, lengths, channel_ids,
+                max_pnts, no_channels, sampling_rate, params,
+                stats = None, sources = None,
+                decimation = 1, decimation_band = 0.0, fft_pnts = None): # requiere de los módulos NumPy (np) y json.
+    lengths = np.asarray(lengths, dtype = np.int64) # número de frecuencias de cada plantilla.
+    if fft_pnts is None: # se ejecuta si no se ha indicado el número de puntos de la transformada.
+        fft_pnts = max_pnts # la transformada tiene los puntos de la señal más larga.
+    width = int(np.max(lengths)) # número de frecuencias de la plantilla más larga.
+    padded_means = np.zeros([len(lengths),width], dtype = means.dtype) # matriz de medias rellena con ceros.
+    padded_stds = np.ones([len(lengths),width], dtype = means.dtype) # matriz de desviaciones rellena con unos.
+    for row, length in enumerate(lengths): # bucle que copia cada plantilla en su fila.
+        padded_means[row,0:length] = means[row,0:length] # medias de la plantilla.
+        padded_stds[row,0:length] = stds[row,0:length] # desviaciones estándar de la plantilla.
+    bundle = {"means": padded_means,
+              "stds": padded_stds,
+              "lengths": lengths,
+              "channel_ids": np.array(channel_ids, dtype = np.int64),
+              "max_pnts": int(max_pnts),
+              "fft_pnts": int(fft_pnts),
+              "freq_step": float(sampling_rate)/int(fft_pnts),
+              "no_channels": int(no_channels),
+              "sampling_rate": float(sampling_rate),
+              "params": json.dumps(params),
+              "decimation": int(decimation),
+              "decimation_band": float(decimation_band),
+              "version": BUNDLE_VERSION} # diccionario de las plantillas.
+    if stats is not None: # se ejecuta si se guarda el estado del acumulador.
+        bundle["count"] = int(stats.count) # número de archivos acumulados.
+        bundle["stats_mean"] = np.array(stats.mean) # copia de la matriz de medias de todas las frecuencias.
+        bundle["stats_m2"] = np.array(stats.m2) # copia de la matriz de M2 de todas las frecuencias.
+        bundle["sources"] = np.array(sources, dtype = str) # nombre de cada archivo acumulado.
+    return bundle # devuelve las plantillas.
+
+# - save_templates(templ_dir, bundle): Requiere de los módulos NumPy
+# (np) y os. Escribe el diccionario de plantillas "bundle" (el que
+# devuelve make_bundle()) en el archivo de las plantillas de la
+# carpeta "templ_dir". Devuelve la localización del archivo.
+
+# El archivo se escribe primero con otro nombre y después sustituye
+# al anterior (os.replace()), de modo que un comparador que tenga
+# abiertas las plantillas anteriores con un mapa de memoria (o las
+# propias plantillas que se están actualizando) las sigue leyendo
+# enteras, y nunca se lee un archivo a medio escribir.
+
+def save_templates(templ_dir, bundle): # requiere de los módulos NumPy (np) y os.
+    bundle_path = os.path.join(templ_dir, BUNDLE_NAME) # localización del archivo de las plantillas.
+    arrays = {"means": bundle["means"],
+              "stds": bundle["stds"],
+              "lengths": bundle["lengths"],
+              "channel_ids": bundle["channel_ids"],
+              "max_pnts": np.int64(bundle["max_pnts"]),
+              "fft_pnts": np.int64(bundle["fft_pnts"]),
+              "freq_step": np.float64(bundle["freq_step"]),
+              "no_channels": np.int64(bundle["no_channels"]),
+              "sampling_rate": np.float64(bundle["sampling_rate"]),
+              "params": np.str_(bundle["params"]),
+              "decimation": np.int64(bundle["decimation"]),
+              "decimation_band": np.float64(bundle["decimation_band"]),
+              "version": np.int64(bundle["version"])} # matrices del archivo.
+    if "count" in bundle: # se ejecuta si las plantillas tienen el estado del acumulador.
+        arrays["count"] = np.int64(bundle["count"]) # número de archivos acumulados.
+        arrays["stats_mean"] = bundle["stats_mean"] # matriz de medias de todas las frecuencias.
+        arrays["stats_m2"] = bundle["stats_m2"] # matriz de M2 de todas las frecuencias.
+        arrays["sources"] = bundle["sources"] # nombre de cada archivo acumulado.
+    temp_path = bundle_path + ".tmp" # localización del archivo mientras se escribe.
+    with open(temp_path, "wb") as File: # se abre el archivo temporal.
+        np.savez(File, **arrays) # se escribe el archivo sin comprimir.
+    os.replace(temp_path, bundle_path) # el archivo nuevo sustituye al anterior.
+    return bundle_path # devuelve la localización del archivo.
+
+# - load_npz(file_name): Requiere del módulo NumPy (np). Lee todas las
+# matrices de un archivo NPZ con np.load() (sin mapa de memoria), y
+# devuelve un diccionario con una etiqueta por matriz.
+
+def load_npz(file_name): # requiere del módulo NumPy (np).
+    with np.load(file_name) as data: # se lee el archivo entero.
+        return {name: data[name] for name in data.files} # devuelve las matrices del archivo.
+
+# - mmap_npz(file_name): Requiere de los módulos NumPy (np), struct y
+# zipfile. Abre las matrices de un archivo NPZ sin comprimir con un
+# mapa de memoria, y devuelve un diccionario con una etiqueta por
+# matriz. Los valores escalares (matrices sin dimensiones) se leen
+# directamente. Si alguna matriz está comprimida, o la cabecera de
+# alguna matriz dentro del ZIP no empieza con ZIP_LOCAL_SIGNATURE (con
+# lo que la posición de sus datos no sería fiable), se lee el archivo
+# entero con load_npz(), que comprueba el ZIP y da un error si está
+# dañado.
+
+def mmap_npz(file_name): # requiere de los módulos NumPy (np), struct y zipfile.
+    arrays = {} # diccionario vacío que contendrá las matrices del archivo.
+    with zipfile.ZipFile(file_name) as archive, open(file_name, "rb") as File: # se abre el archivo como ZIP y como archivo binario.
+        for info in archive.infolist(): # bucle que itera sobre cada matriz del archivo.
+            if info.compress_type != zipfile.ZIP_STORED: # se ejecuta si la matriz está comprimida.
+                return load_npz(file_name = file_name) # devuelve las matrices del archivo.
+            File.seek(info.header_offset) # se sitúa el archivo en la cabecera de la matriz.
+            signature, name_len, extra_len = ZIP_LOCAL_HEADER.unpack(File.read(ZIP_LOCAL_HEADER.size)) # cabecera de la matriz dentro del ZIP.
+            if signature != ZIP_LOCAL_SIGNATURE: # se ejecuta si la cabecera no es la de un archivo dentro del ZIP.
+                return load_npz(file_name = file_name) # devuelve las matrices del archivo.
+            File.seek(info.header_offset + ZIP_LOCAL_HEADER.size + name_len + extra_len) # se sitúa el archivo al principio de la matriz.
+            version = np.lib.format.read_magic(File) # versión del formato de la matriz.
+            if version == (1,0): # se ejecuta si la cabecera de la matriz tiene la versión 1.0.
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(File) # forma y tipo de la matriz.
+            else: # se ejecuta si la cabecera de la matriz tiene la versión 2.0.
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(File) # forma y tipo de la matriz.
+            name = info.filename[:-len(".npy")] # nombre de la matriz.
+            if shape == (): # se ejecuta si la matriz es un valor escalar.
+                arrays[name] = np.frombuffer(File.read(dtype.itemsize),
+                                             dtype = dtype)[0] # se lee el valor.
+            else: # se ejecuta si la matriz tiene alguna dimensión.
+                arrays[name] = np.memmap(file_name,
+                                         dtype = dtype,
+                                         mode = "r",
+                                         offset = File.tell(),
+                                         shape = shape,
+                                         order = "F" if fortran_order else "C") # se abre la matriz con un mapa de memoria.
+    return arrays # devuelve el diccionario con las matrices.
+
+# - legacy_templates(templ_dir, info_file): Requiere de los módulos
+# NumPy (np) y os. Lee las plantillas en el formato anterior (un
+# archivo TXT de dos columnas por canal, con las medias y las
+# desviaciones estándar) y el archivo "info_file" con el número de
+# puntos y de canales, y devuelve un diccionario con las mismas
+# etiquetas que el archivo binario. Las plantillas se ordenan por su
+# número de canal (channel2 antes que channel10).
+
+def legacy_templates(templ_dir, info_file): # requiere de los módulos NumPy (np) y os.
+    channel_ids = sorted(int(File[len("templ_channel"):-len(".txt")])
+                         for File in os.listdir(templ_dir)
+                         if File.startswith("templ_channel") and
+                         File.endswith(".txt")) # números de canal de las plantillas, en orden.
+    columns = [np.loadtxt(templ_dir + "/templ_channel" + str(channel) + ".txt",
+                          delimiter = "\t", ndmin = 2)
+               for channel in channel_ids] # matrices de dos columnas de cada canal.
+    lengths = np.array([len(data) for data in columns], dtype = np.int64) # número de frecuencias de cada plantilla.
+    means = np.zeros([len(columns),int(np.max(lengths))]) # matriz de medias rellena con ceros.
+    stds = np.ones([len(columns),int(np.max(lengths))]) # matriz de desviaciones rellena con unos.
+    for row, data in enumerate(columns): # bucle que copia cada plantilla en su fila.
+        means[row,0:len(data)] = data[:,0] # medias de la plantilla.
+        stds[row,0:len(data)] = data[:,1] # desviaciones estándar de la plantilla.
+    with open(info_file, "r") as File: # se abre el archivo con el número de puntos y de canales.
+        file_data = File.read().splitlines() # lee los datos del archivo.
+    return {"means": means,
+            "stds": stds,
+            "lengths": lengths,
+            "channel_ids": np.array(channel_ids, dtype = np.int64),
+            "max_pnts": int(file_data[0]),
+            "fft_pnts": int(file_data[0]),
+            "freq_step": np.nan,
+            "no_channels": int(file_data[1]),
+            "sampling_rate": np.nan,
+            "params": "{}",
+            "decimation": 1,
+            "decimation_band": 0.0,
+            "version": 0} # devuelve las plantillas.
+
+# - load_templates(templ_dir, info_file): Requiere de los módulos
+# NumPy (np), os, struct y zipfile. Devuelve el diccionario con las
+# plantillas de la carpeta "templ_dir" (ver la introducción de este
+# módulo). Si existe el archivo binario, sus matrices se abren con un
+# mapa de memoria. Si no, se leen las plantillas en el formato
+# anterior, con el archivo "info_file".
+
+def load_templates(templ_dir, info_file = "no_cols_and_channels.txt"): # requiere de los módulos NumPy (np), os, struct y zipfile.
+    bundle_path = os.path.join(templ_dir, BUNDLE_NAME) # localización del archivo de las plantillas.
+    if not os.path.isfile(bundle_path): # se ejecuta si las plantillas están en el formato anterior.
+        return legacy_templates(templ_dir = templ_dir,
+                                info_file = info_file) # devuelve las plantillas leídas de los archivos TXT.
+    bundle = mmap_npz(file_name = bundle_path) # se abren las matrices del archivo.
+    bundle["max_pnts"] = int(bundle["max_pnts"]) # número de puntos de la señal más larga.
+    bundle["no_channels"] = int(bundle["no_channels"]) # número de canales.
+    bundle["params"] = str(bundle["params"]) # parámetros de las plantillas.
+    bundle["decimation"] = int(bundle.get("decimation", 1)) # factor por el que se diezmaron las señales (1 en las versiones anteriores).
+    bundle["decimation_band"] = float(bundle.get("decimation_band", 0.0)) # frecuencia límite relativa que se conservó al diezmarlas.
+    bundle["fft_pnts"] = int(bundle.get("fft_pnts",
+                                        bundle["decimation"]*(-(-bundle["max_pnts"]//bundle["decimation"])))) # número de puntos de la transformada de Fourier (en las versiones anteriores, los de la señal más larga, redondeados a un múltiplo del factor).
+    bundle["freq_step"] = float(bundle.get("freq_step",
+                                           bundle["sampling_rate"]/bundle["fft_pnts"])) # separación entre las frecuencias de la transformada.
+    if "count" in bundle: # se ejecuta si las plantillas tienen el estado del acumulador.
+        bundle["count"] = int(bundle["count"]) # número de archivos acumulados.
+    return bundle # devuelve las plantillas.
+
+# - load_library(library_dir): Requiere de los módulos NumPy (np), os,
+# struct y zipfile. Devuelve un diccionario con las plantillas de cada
+# subcarpeta de "library_dir" que contenga un archivo de plantillas,
+# con el nombre de la subcarpeta como etiqueta, en orden alfabético.
+# Si no hay ninguna, da un error ValueError.
+
+def load_library(library_dir): # requiere de los módulos NumPy (np), os, struct y zipfile.
+    names = sorted(name for name in os.listdir(library_dir)
+                   if os.path.isfile(os.path.join(library_dir, name, BUNDLE_NAME))) # subcarpetas con plantillas.
+    if len(names) == 0: # se ejecuta si no hay ningún conjunto de plantillas.
+        raise ValueError("no template sets (" + BUNDLE_NAME + ") found in " + library_dir) # error.
+    return {name: load_templates(templ_dir = os.path.join(library_dir, name))
+            for name in names} # devuelve las plantillas de cada conjunto.
@@ -0,0 +1,190 @@
+###################################################
+###################################################
+###                                             ###
+###                INTRODUCCIÓN                 ###
+###                                             ###
+###################################################
+###################################################
+
+# Este módulo contiene la vigilancia de la carpeta a la que
+# llegan los archivos de señales entrantes ("inboundSignals"),
+# que se utiliza desde el script auto_comparator_ES.py.
+
+# En lugar de enlistar los archivos de la carpeta continuamente
+# (lo que ocupa un núcleo del procesador al 100% aunque no llegue
+# ningún archivo), en Linux se utiliza inotify, un servicio del
+# sistema operativo que avisa al programa cuando se termina de
+# escribir o se mueve un archivo a la carpeta. Mientras no llega
+# ningún archivo, el programa queda en espera sin consumir
+# procesador, y cuando llega uno se entera en milisegundos.
+
+# En los sistemas donde inotify no está disponible, la carpeta se
+# enlista periódicamente, esperando entre una comprobación y otra
+# un tiempo que empieza siendo muy corto (10 ms) y se duplica cada
+# vez que no se encuentra ningún archivo nuevo, hasta un máximo
+# (1 s). En cuanto llega un archivo, la espera vuelve a ser la
+# mínima.
+
+# Los nombres de los archivos que ya se han detectado se guardan
+# en un conjunto (set), para que comprobar si un archivo es nuevo
+# tarde lo mismo sin importar cuántos archivos se hayan analizado.
+
+###################################################
+###################################################
+###                                             ###
+###               MÓDULOS USADOS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - os: Se ha usado para enlistar los archivos de la carpeta.
+# - time: Se ha usado para esperar entre las comprobaciones
+# periódicas de la carpeta.
+# - select: Se ha usado para esperar los avisos de inotify.
+# - struct: Se ha usado para leer los avisos de inotify.
+# - ctypes: Se ha usado para acceder a inotify desde la
+# biblioteca estándar de C del sistema (libc).
+
+import os
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+###################################################
+###################################################
+###                                             ###
+###              CONSTANTES USADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+IN_CLOSE_WRITE = 0x00000008 # aviso de inotify: se ha terminado de escribir un archivo.
+IN_MOVED_TO = 0x00000080 # aviso de inotify: se ha movido un archivo a la carpeta.
+IN_Q_OVERFLOW = 0x00004000 # aviso de inotify: se han perdido avisos.
+IN_NONBLOCK = 0o4000 # opción de inotify_init1(): lectura sin bloqueo.
+IN_CLOEXEC = 0o2000000 # opción de inotify_init1(): no se hereda en otros programas.
+EVENT_HEADER = struct.Struct("iIII") # cabecera de cada aviso de inotify (wd, mask, cookie, len).
+
+MIN_POLL_DELAY = 0.01 # espera mínima entre comprobaciones periódicas (s).
+MAX_POLL_DELAY = 1.0 # espera máxima entre comprobaciones periódicas (s).
+
+###################################################
+###################################################
+###                                             ###
+###              FUNCIONES CREADAS              ###
+###                                             ###
+###################################################
+###################################################
+
+# - inotify_watch(dir_name): Requiere del módulo ctypes. Si el sistema
+# dispone de inotify, empieza a vigilar la carpeta "dir_name" y
+# devuelve el descriptor de archivo desde el que se leen los avisos.
+# Si no dispone de inotify (o no se puede vigilar la carpeta),
+# devuelve None.
+
+def inotify_watch(dir_name): # requiere del módulo ctypes.
+    try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+        libc = ctypes.CDLL(ctypes.util.find_library("c"),
+                           use_errno = True) # biblioteca estándar de C.
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC) # se inicia inotify.
+    except (OSError, AttributeError, TypeError): # se ejecuta si el sistema no dispone de inotify.
+        return None # no se puede usar inotify.
+    if fd < 0: # se ejecuta si no se ha podido iniciar inotify.
+        return None # no se puede usar inotify.
+    wd = libc.inotify_add_watch(fd,
+                                os.fsencode(dir_name),
+                                IN_CLOSE_WRITE | IN_MOVED_TO) # se vigila la carpeta.
+    if wd < 0: # se ejecuta si no se ha podido vigilar la carpeta.
+        os.close(fd) # se cierra inotify.
+        return None # no se puede usar inotify.
+    return fd # devuelve el descriptor de archivo de inotify.
+
+###################################################
+###################################################
+###                                             ###
+###               CLASES CREADAS                ###
+###                                             ###
+###################################################
+###################################################
+
+# - InboxWatcher(dir_name, extensions, seen): Vigila la carpeta
+# "dir_name" y devuelve los archivos nuevos cuya extensión esté en la
+# lista "extensions" (por ejemplo, ["txt","smr","plx"]). El argumento
+# opcional "seen" contiene los nombres de los archivos que ya se han
+# analizado (por ejemplo, en una ejecución anterior del programa), que
+# no se devuelven. Sus métodos son:
+
+# - wait_new_files(): espera hasta que haya al menos un archivo
+# nuevo en la carpeta, y devuelve la lista de nombres de los
+# archivos nuevos. Los archivos que ya había en la carpeta cuando
+# se crea el objeto se devuelven en la primera llamada.
+# - mark_seen(names): indica que los archivos de la lista "names"
+# ya se han analizado, para que no se vuelvan a devolver.
+# - close(): deja de vigilar la carpeta.
+
+# El atributo "uses_inotify" indica si se está usando inotify o
+# la comprobación periódica de la carpeta.
+
+class InboxWatcher: # requiere de los módulos os, time, select y struct.
+    def __init__(self, dir_name, extensions, seen = ()):
+        self.dir_name = dir_name # carpeta que se vigila.
+        self.extensions = set(extensions) # extensiones de los archivos que se tienen en cuenta.
+        self.seen = set(seen) # nombres de los archivos que ya se han detectado.
+        self.fd = inotify_watch(dir_name = dir_name) # descriptor de archivo de inotify (None si no se usa).
+        self.uses_inotify = self.fd is not None # indica si se usa inotify.
+        self.pending = self.scan() # archivos que ya había en la carpeta.
+        self.delay = MIN_POLL_DELAY # espera actual entre comprobaciones periódicas.
+
+    def is_signal_file(self, name):
+        parts = name.split(".") # partes del nombre del archivo.
+        return len(parts) > 1 and parts[1] in self.extensions # indica si el formato del archivo es reconocido.
+
+    def mark_seen(self, names):
+        self.seen.update(names) # se añaden los nombres al conjunto de archivos ya detectados.
+
+    def scan(self):
+        return [entry.name for entry in os.scandir(self.dir_name)
+                if entry.name not in self.seen and
+                self.is_signal_file(entry.name)] # devuelve los archivos nuevos de la carpeta.
+
+    def read_events(self):
+        names = [] # lista vacía con los nombres de los archivos de los avisos.
+        try: # se trata de ejecutar. No se terminará de ejecutar si da error.
+            buffer = os.read(self.fd, 65536) # se leen los avisos pendientes.
+        except BlockingIOError: # se ejecuta si no hay avisos pendientes.
+            return names # devuelve la lista vacía.
+        offset = 0 # posición del aviso que se está leyendo.
+        while offset < len(buffer): # bucle que itera sobre cada aviso.
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(buffer, offset) # cabecera del aviso.
+            offset = offset + EVENT_HEADER.size # posición del nombre del archivo.
+            if mask & IN_Q_OVERFLOW: # se ejecuta si se han perdido avisos.
+                return self.scan() # se enlista la carpeta entera.
+            name = buffer[offset:offset+length].rstrip(b"\0") # nombre del archivo del aviso.
+            offset = offset + length # posición del siguiente aviso.
+            names.append(os.fsdecode(name)) # se incorpora el nombre a la lista.
+        return [name for name in names
+                if name not in self.seen and
+                self.is_signal_file(name)] # devuelve los nombres de los archivos nuevos.
+
+    def wait_new_files(self):
+        while True: # bucle que se ejecuta hasta que haya archivos nuevos.
+            new_files = list(dict.fromkeys(self.pending)) # archivos nuevos pendientes, sin repeticiones.
+            self.pending = [] # se vacía la lista de archivos pendientes.
+            if len(new_files) > 0: # se ejecuta si hay archivos nuevos.
+                self.mark_seen(names = new_files) # se registran como detectados.
+                self.delay = MIN_POLL_DELAY # la espera vuelve a ser la mínima.
+                return new_files # devuelve los archivos nuevos.
+            if self.uses_inotify: # se ejecuta si se usa inotify.
+                select.select([self.fd], [], []) # se espera, sin consumir procesador, hasta que haya un aviso.
+                self.pending = self.read_events() # se leen los archivos de los avisos.
+            else: # se ejecuta si se comprueba la carpeta periódicamente.
+                time.sleep(self.delay) # se espera antes de la siguiente comprobación.
+                self.delay = min(self.delay*2, MAX_POLL_DELAY) # la siguiente espera será el doble de larga.
+                self.pending = self.scan() # se enlista la carpeta.
+
+    def close(self):
+        if self.uses_inotify: # se ejecuta si se usa inotify.
+            os.close(self.fd) # se cierra inotify.
+            self.uses_inotify = False # a partir de ahora se comprueba la carpeta periódicamente.